@@ -0,0 +1,103 @@
+"""
+Синтетические корпуса тикетов для бенчмарков: в scale раз больше data/tickets.csv
+с тем же распределением классов и тем же словарём.
+
+    python -m benchmarks.corpus --scale 1 10 100 --output-dir benchmarks/corpora
+
+Количество строк каждого класса — количество в исходном файле, умноженное на scale.
+Описания строятся цепью Маркова по парам слов, обученной на описаниях того же класса:
+используются только слова и переходы из исходных данных, длина описания выбирается из
+длин реальных описаний класса. Заголовки берутся из заголовков того же класса.
+Результат детерминирован при одинаковом --seed.
+"""
+import argparse
+import csv
+import os
+import random
+from collections import defaultdict
+
+from src.config import DATA_PATH
+from src.data.dataset import DELIMITER
+
+class ClassModel:
+    """Цепь Маркова по словам описаний одного класса."""
+
+    def __init__(self, descriptions, titles):
+        self.starts = []
+        self.transitions = defaultdict(list)
+        self.lengths = []
+        self.titles = titles
+        for description in descriptions:
+            words = description.split()
+            if not words:
+                continue
+            self.starts.append(words[0])
+            self.lengths.append(len(words))
+            for current, following in zip(words, words[1:]):
+                self.transitions[current].append(following)
+
+    def description(self, rng):
+        length = rng.choice(self.lengths)
+        words = [rng.choice(self.starts)]
+        while len(words) < length:
+            following = self.transitions.get(words[-1])
+            # Слово без продолжения (конец исходного описания) начинает новое предложение
+            words.append(rng.choice(following) if following else rng.choice(self.starts))
+        return " ".join(words)
+
+    def title(self, rng):
+        return rng.choice(self.titles)
+
+def read_source(source_path=DATA_PATH):
+    """Строки исходного файла, сгруппированные по классу (колонка Type)."""
+    by_class = defaultdict(list)
+    with open(source_path, newline='', encoding='utf-8') as source_file:
+        for row in csv.DictReader(source_file, delimiter=DELIMITER):
+            if row.get('Type') and row.get('Description'):
+                by_class[row['Type']].append(row)
+    return by_class
+
+def generate_rows(by_class, scale, seed=42):
+    """Генератор строк (id, title, Type, Description) синтетического корпуса, классы перемешаны."""
+    rng = random.Random(seed)
+    models = {
+        label: ClassModel([row['Description'] for row in rows], [row.get('title') or '' for row in rows])
+        for label, rows in by_class.items()
+    }
+    labels = [label for label, rows in by_class.items() for _ in range(round(len(rows) * scale))]
+    rng.shuffle(labels)
+    for number, label in enumerate(labels, start=1):
+        model = models[label]
+        yield (f"SYN-{number}", model.title(rng), label, model.description(rng))
+
+def write_corpus(path, scale, source_path=DATA_PATH, seed=42):
+    """Записывает корпус в формате data/tickets.csv и возвращает количество строк."""
+    by_class = read_source(source_path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as corpus_file:
+        writer = csv.writer(corpus_file, delimiter=DELIMITER)
+        writer.writerow(['id', 'title', 'Type', 'Description'])
+        for row in generate_rows(by_class, scale, seed):
+            writer.writerow(row)
+            count += 1
+    return count
+
+def corpus_path(output_dir, scale):
+    return os.path.join(output_dir, f"tickets-{scale:g}x.csv")
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетические корпуса тикетов для бенчмарков")
+    parser.add_argument("--source", default=DATA_PATH, help="Исходный CSV-файл")
+    parser.add_argument("--scale", type=float, nargs="+", default=[1, 10, 100], help="Во сколько раз корпус больше исходного")
+    parser.add_argument("--output-dir", default=os.path.join("benchmarks", "corpora"))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for scale in args.scale:
+        path = corpus_path(args.output_dir, scale)
+        count = write_corpus(path, scale, args.source, args.seed)
+        print(f"{path}: {count} строк, {os.path.getsize(path) / 1024 / 1024:.1f} МБ")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Сравнение пропускной способности Flask-режима (main.py serve, gunicorn с потоками)
+и асинхронного режима (main.py serve-async) на /categorize.
+
+    python -m benchmarks.serving --concurrency 16 256 1024 --duration 10
+    python -m benchmarks.serving --modes flask async --threads 8 --client-delay-ms 50 --output serving.json
+
+Каждый режим запускается отдельным процессом на --port, нагрузку создают --concurrency
+одновременных клиентов (aiohttp). С --client-delay-ms клиент отправляет тело запроса
+двумя частями с паузой между ними — так ведут себя медленные клиенты: во Flask-режиме
+такой запрос занимает поток, в асинхронном — нет.
+Нужна запущенная PostgreSQL с таблицей ticket_predictions; записанные строки
+(ticket_id с префиксом bench-) удаляются после прогона.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from src.db.database import db_connection
+
+MODES = {
+    "flask": lambda args: ["serve", "--workers", str(args.workers), "--threads", str(args.threads), "--max-requests", "0"],
+    "async": lambda args: ["serve-async"]
+}
+
+DESCRIPTIONS = [
+    "Application crashes on login after the latest update",
+    "Add export of reports to CSV and Excel",
+    "Improve loading speed of the dashboard with large projects",
+    "Investigate intermittent timeout errors on dataset imports",
+    "Update API documentation for the new authentication flow"
+]
+
+def start_server(mode, args):
+    process = subprocess.Popen(
+        [sys.executable, "main.py", *MODES[mode](args), "--host", "127.0.0.1", "--port", str(args.port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return process
+
+async def wait_ready(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{url}/status") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError("Сервер не запустился")
+
+async def run_load(url, concurrency, duration, client_delay):
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async def body(payload):
+        # Медленный клиент: половина тела, пауза, вторая половина
+        middle = len(payload) // 2
+        yield payload[:middle]
+        await asyncio.sleep(client_delay)
+        yield payload[middle:]
+
+    async def client(number, session):
+        nonlocal errors
+        i = 0
+        while time.monotonic() < deadline:
+            payload = json.dumps({
+                "description": f"{DESCRIPTIONS[i % len(DESCRIPTIONS)]} #{number}-{i}",
+                "id": f"bench-{number}-{i}"
+            }).encode("utf-8")
+            data = body(payload) if client_delay else payload
+            started = time.perf_counter()
+            try:
+                async with session.post(f"{url}/categorize", data=data,
+                                        headers={"Content-Type": "application/json"}) as response:
+                    await response.read()
+                    if response.status == 200:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errors += 1
+            i += 1
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(*(client(number, session) for number in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(0.5),
+        "p99_ms": percentile(0.99)
+    }
+
+def cleanup_rows():
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM ticket_predictions WHERE ticket_id LIKE 'bench-%'")
+        conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение Flask-режима и асинхронного режима API")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 256], help="Количество одновременных клиентов")
+    parser.add_argument("--duration", type=float, default=10, help="Длительность каждого прогона в секундах")
+    parser.add_argument("--client-delay-ms", type=float, default=0, help="Пауза посреди отправки тела запроса")
+    parser.add_argument("--workers", type=int, default=1, help="Рабочих процессов во Flask-режиме")
+    parser.add_argument("--threads", type=int, default=8, help="Потоков в рабочем процессе во Flask-режиме")
+    parser.add_argument("--port", type=int, default=5070)
+    parser.add_argument("--output", help="Сохранить результаты в JSON-файл")
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    runs = []
+    try:
+        for mode in args.modes:
+            process = start_server(mode, args)
+            try:
+                asyncio.run(wait_ready(url))
+                for concurrency in args.concurrency:
+                    result = asyncio.run(run_load(url, concurrency, args.duration, args.client_delay_ms / 1000))
+                    runs.append({"mode": mode, "concurrency": concurrency, **result})
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait(30)
+    finally:
+        cleanup_rows()
+
+    print(f"{'режим':>6} {'клиентов':>9} {'запросов':>9} {'ошибок':>7} {'запр/с':>8} {'p50, мс':>8} {'p99, мс':>8}")
+    for run in runs:
+        print(f"{run['mode']:>6} {run['concurrency']:>9} {run['requests']:>9} {run['errors']:>7} "
+              f"{run['rps']:>8} {run['p50_ms']!s:>8} {run['p99_ms']!s:>8}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"args": vars(args), "runs": runs}, output_file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    os.environ.setdefault("PYTHONWARNINGS", "ignore")
+    main()
@@ -0,0 +1,75 @@
+"""
+Время запуска и память процесса, который только обслуживает предсказания.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modules src.routes.service src.ml.training --repeat 5 --output startup.json
+
+Каждый модуль импортируется в --repeat отдельных процессах (холодный импорт, модель
+загружается вместе с src.routes.service). Для каждого выводятся медиана времени импорта,
+резидентная память процесса после импорта (VmRSS) и тяжёлые зависимости обучения
+и документации, которые оказались загружены.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Модули, которые не нужны процессу, обслуживающему предсказания
+HEAVY_MODULES = ["imblearn", "flasgger", "jsonschema", "sklearn.ensemble", "sklearn.neighbors", "src.ml.training"]
+
+PROBE = """
+import json, sys, time, warnings
+warnings.simplefilter("ignore")
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+rss_kb = 0
+with open("/proc/self/status") as status:
+    for line in status:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "modules": len(sys.modules),
+    "heavy": [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+def probe(module):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта и память процесса сервиса")
+    parser.add_argument("--modules", nargs="+", default=["src.routes.service"], help="Импортируемые модули")
+    parser.add_argument("--repeat", type=int, default=3, help="Количество запусков каждого модуля")
+    parser.add_argument("--output", help="Сохранить результаты в JSON-файл")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        runs = [probe(module) for _ in range(args.repeat)]
+        results.append({
+            "module": module,
+            "import_seconds": round(statistics.median(run["seconds"] for run in runs), 3),
+            "rss_mb": round(statistics.median(run["rss_mb"] for run in runs), 1),
+            "modules_loaded": runs[-1]["modules"],
+            "heavy_modules": runs[-1]["heavy"]
+        })
+
+    print(f"{'модуль':<24} {'импорт, с':>10} {'RSS, МБ':>8} {'модулей':>8}  тяжёлые зависимости")
+    for result in results:
+        print(f"{result['module']:<24} {result['import_seconds']:>10} {result['rss_mb']:>8} "
+              f"{result['modules_loaded']:>8}  {', '.join(result['heavy_modules']) or '—'}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"args": vars(args), "results": results}, output_file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
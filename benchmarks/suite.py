@@ -0,0 +1,370 @@
+"""
+Набор бенчмарков сервиса на синтетических корпусах разного размера со сравнением
+с сохранённой базовой линией.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --scales 1 10 100 --train-scales 1 10 --output results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.3 --fail-on-regression
+    python -m benchmarks.suite --save-baseline
+
+Для каждого масштаба (benchmarks.corpus) создаётся рабочий каталог во временной папке:
+ссылки на src и main.py, копия models/ и корпус вместо data/tickets.csv. Сервис
+запускается из него (main.py serve, один рабочий процесс), поэтому файлы репозитория
+не меняются. Измеряется:
+- inference (один раз, на корпусе наименьшего масштаба): задержка одиночного
+  /categorize при последовательных запросах, пропускная способность при --concurrency
+  одновременных клиентах и /categorize/batch для пакетов --batch-sizes;
+- для каждого масштаба: время ответа GET /data (json, ndjson, csv) и GET /tickets
+  (страница json и поток ndjson по строкам корпуса, записанным в БД), а также пиковая
+  память рабочего процесса во время запроса (VmHWM, сбрасывается перед каждым запросом);
+- для масштабов --train-scales: подготовка признаков и подбор гиперпараметров каждого
+  семейства моделей (search_best_model в процессе бенчмарка, без кэша признаков).
+
+Результаты записываются в JSON (--output) и сравниваются с базовой линией: метрики
+*_ms, *_seconds и *_mb лучше меньше, *rps и *_per_s — больше. Регрессией считается
+ухудшение больше чем в 1 + --threshold раз, если разница больше шумового порога NOISE_FLOOR.
+Нужна запущенная PostgreSQL с таблицей ticket_predictions; записанные строки
+(ticket_id с префиксом bench-) удаляются после прогона.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+import requests
+
+from benchmarks.corpus import read_source, write_corpus
+from benchmarks.serving import cleanup_rows, run_load, wait_ready
+from src.db.database import db_connection, insert_predictions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+
+# Направление метрики по окончанию имени
+LOWER_IS_BETTER = ("_ms", "_seconds", "_mb")
+HIGHER_IS_BETTER = ("rps", "_per_s")
+# Разница меньше порога не считается регрессией при любом отношении:
+# у малых значений (задержка в единицы мс, прирост памяти около нуля) отношение шумит
+NOISE_FLOOR = {"_ms": 2.0, "_seconds": 0.2, "_mb": 5.0}
+
+def prepare_workspace(workspace, scale, seed):
+    """Рабочий каталог сервиса с корпусом масштаба scale вместо data/tickets.csv."""
+    for name in ("src", "main.py"):
+        os.symlink(os.path.join(ROOT, name), os.path.join(workspace, name))
+    shutil.copytree(os.path.join(ROOT, "models"), os.path.join(workspace, "models"),
+                    ignore=shutil.ignore_patterns("jobs", "features"))
+    data_path = os.path.join(workspace, "data", "tickets.csv")
+    rows = write_corpus(data_path, scale, os.path.join(ROOT, "data", "tickets.csv"), seed)
+    return data_path, rows
+
+def start_server(workspace, args):
+    env = dict(os.environ, PYTHONWARNINGS="ignore", PROFILE_DIR=os.path.join(workspace, "profiles"))
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    return subprocess.Popen(
+        [sys.executable, "main.py", "serve", "--workers", "1", "--threads", str(args.threads),
+         "--max-requests", "0", "--host", "127.0.0.1", "--port", str(args.port)],
+        cwd=workspace, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def worker_pid(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as children:
+        return int(children.read().split()[0])
+
+def read_memory(pid):
+    """(VmHWM, VmRSS) процесса в МБ."""
+    values = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(("VmHWM:", "VmRSS:")):
+                name, value = line.split()[:2]
+                values[name] = int(value) / 1024
+    return values["VmHWM:"], values["VmRSS:"]
+
+def reset_peak_memory(pid):
+    # Запись "5" в clear_refs сбрасывает VmHWM до текущего VmRSS
+    with open(f"/proc/{pid}/clear_refs", "w") as clear_refs:
+        clear_refs.write("5")
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+def measure_request(session, pid, method, url, repeat, **kwargs):
+    """
+    Время полного ответа (тело читается до конца) и пиковая память рабочего процесса
+    за время запроса; медиана и максимум по repeat повторам.
+    """
+    times, peaks, deltas = [], [], []
+    size = None
+    for _ in range(repeat):
+        reset_peak_memory(pid)
+        _, rss_before = read_memory(pid)
+        started = time.perf_counter()
+        with session.request(method, url, stream=True, **kwargs) as response:
+            response.raise_for_status()
+            size = sum(len(chunk) for chunk in response.iter_content(64 * 1024))
+        times.append(time.perf_counter() - started)
+        peak, _ = read_memory(pid)
+        peaks.append(peak)
+        deltas.append(peak - rss_before)
+    return {
+        "response_bytes": size,
+        "median_ms": round(statistics.median(times) * 1000, 1),
+        "peak_rss_mb": round(max(peaks), 1),
+        "peak_growth_mb": round(max(deltas), 1)
+    }
+
+def bench_inference(session, url, descriptions, args):
+    """
+    Замеры /categorize и /categorize/batch. К описанию добавляется уникальный суффикс,
+    чтобы повторяющиеся описания корпуса не попадали в кэш предсказаний сервиса.
+    """
+    def ticket(tag, i):
+        return {"id": f"bench-suite-{tag}-{i}", "description": f"{descriptions[i % len(descriptions)]} #{tag}-{i}"}
+
+    results = {}
+
+    # Перед каждым замером — запрос без учёта времени (прогрев после предыдущей нагрузки)
+    session.post(f"{url}/categorize", json=ticket("warmup", 0))
+    latencies = []
+    for i in range(args.requests):
+        started = time.perf_counter()
+        response = session.post(f"{url}/categorize", json=ticket("single", i))
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+    results["single"] = {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2)
+    }
+
+    for concurrency in args.concurrency:
+        load = asyncio.run(run_load(url, concurrency, args.duration, 0))
+        results[f"concurrency_{concurrency}"] = load
+
+    for size in args.batch_sizes:
+        session.post(f"{url}/categorize/batch", json={"tickets": [ticket(f"warmup-{size}", i) for i in range(size)]})
+        times = []
+        for attempt in range(args.repeat):
+            tickets = [ticket(f"batch-{size}-{attempt}", i) for i in range(size)]
+            started = time.perf_counter()
+            response = session.post(f"{url}/categorize/batch", json={"tickets": tickets})
+            response.raise_for_status()
+            times.append(time.perf_counter() - started)
+        median = statistics.median(times)
+        results[f"batch_{size}"] = {
+            "median_ms": round(median * 1000, 1),
+            "tickets_per_s": round(size / median, 1)
+        }
+    return results
+
+def bench_data(session, url, pid, args):
+    return {
+        output_format: measure_request(session, pid, "GET", f"{url}/data", args.repeat, params={"format": output_format})
+        for output_format in ("json", "ndjson", "csv")
+    }
+
+def insert_corpus_rows(data_path):
+    """Записывает строки корпуса в ticket_predictions и возвращает id первой записанной строки."""
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM ticket_predictions")
+            last_id = cursor.fetchone()[0]
+    by_class = read_source(data_path)
+    insert_predictions([
+        (f"bench-corpus-{row['id']}", row['title'], row['Description'], label)
+        for label, rows in by_class.items() for row in rows
+    ])
+    return last_id + 1
+
+def bench_tickets(session, url, pid, data_path, args):
+    min_id = insert_corpus_rows(data_path)
+    try:
+        return {
+            "page_json": measure_request(session, pid, "GET", f"{url}/tickets", args.repeat,
+                                         params={"format": "json", "limit": 10000, "min_id": min_id}),
+            "stream_ndjson": measure_request(session, pid, "GET", f"{url}/tickets", args.repeat,
+                                             params={"format": "ndjson", "min_id": min_id})
+        }
+    finally:
+        cleanup_rows()
+
+def bench_training(data_path, args):
+    # Обучение выполняется в процессе бенчмарка: модули обучения загружаются только здесь
+    from src.ml.training import build_models, prepare_features, search_best_model
+
+    # Предупреждения sklearn о неудачных кандидатах сетки не относятся к замеру
+    warnings.simplefilter("ignore")
+    started = time.perf_counter()
+    _, _, X_train, y_train, X_test, y_test = prepare_features(data_path, cache=None)
+    results = {"prepare_seconds": round(time.perf_counter() - started, 2), "models": {}}
+    for name in args.train_models or list(build_models()[0]):
+        started = time.perf_counter()
+        _, _, accuracy, _, summary = search_best_model(
+            X_train, y_train, X_test, y_test, n_jobs=args.n_jobs, model_names=[name]
+        )
+        results["models"][name] = {
+            "wall_seconds": round(time.perf_counter() - started, 2),
+            "accuracy": round(accuracy, 4),
+            "fits": summary["fits"]
+        }
+    return results
+
+def run_scale(scale, args, with_inference):
+    url = f"http://127.0.0.1:{args.port}"
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as workspace:
+        data_path, rows = prepare_workspace(workspace, scale, args.seed)
+        results["rows"] = rows
+        process = start_server(workspace, args)
+        try:
+            asyncio.run(wait_ready(url))
+            pid = worker_pid(process.pid)
+            with requests.Session() as session:
+                if with_inference:
+                    descriptions = [row['Description'] for rows in read_source(data_path).values() for row in rows]
+                    results["inference"] = bench_inference(session, url, descriptions, args)
+                    cleanup_rows()
+                results["data"] = bench_data(session, url, pid, args)
+                results["tickets"] = bench_tickets(session, url, pid, data_path, args)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(30)
+            cleanup_rows()
+        if scale in args.train_scales:
+            results["training"] = bench_training(data_path, args)
+    return results
+
+def flatten(results, prefix=""):
+    """Числовые метрики вложенного словаря: {"1x.data.json.median_ms": 12.3, ...}."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+def noise_floor(metric):
+    for suffix, floor in NOISE_FLOOR.items():
+        if metric.endswith(suffix):
+            return floor
+    return 0
+
+def direction(metric):
+    """1 — лучше больше, -1 — лучше меньше, None — метрика не сравнивается (количества)."""
+    name = metric.rsplit(".", 1)[-1]
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+def compare(results, baseline, threshold):
+    """
+    Сравнение с базовой линией. Возвращает строки {metric, baseline, current, ratio, regression},
+    где ratio > 1 — ухудшение (во сколько раз), < 1 — улучшение. Регрессия — ratio больше
+    1 + threshold при разнице больше NOISE_FLOOR.
+    """
+    current, previous = flatten(results), flatten(baseline)
+    rows = []
+    for metric in sorted(current.keys() & previous.keys()):
+        sign = direction(metric)
+        if sign is None or not previous[metric] or not current[metric]:
+            continue
+        ratio = previous[metric] / current[metric] if sign > 0 else current[metric] / previous[metric]
+        rows.append({
+            "metric": metric,
+            "baseline": previous[metric],
+            "current": current[metric],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold and abs(current[metric] - previous[metric]) > noise_floor(metric)
+        })
+    return rows
+
+def collect_meta(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": vars(args)
+    }
+
+def print_comparison(rows, threshold):
+    print(f"\n{'метрика':<60} {'база':>10} {'сейчас':>10} {'×':>7}")
+    for row in rows:
+        mark = "  РЕГРЕССИЯ" if row["regression"] else ""
+        print(f"{row['metric']:<60} {row['baseline']:>10} {row['current']:>10} {row['ratio']:>7}{mark}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"\nСравнено метрик: {len(rows)}, регрессий (хуже больше чем в {1 + threshold:g} раза): {regressions}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки сервиса на синтетических корпусах со сравнением с базовой линией")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100], help="Масштабы корпуса")
+    parser.add_argument("--train-scales", type=float, nargs="*", default=[1], help="Масштабы, на которых измеряется обучение")
+    parser.add_argument("--train-models", nargs="+", default=None, help="Семейства моделей (по умолчанию все)")
+    parser.add_argument("--n-jobs", type=int, default=1, help="Процессов для подбора гиперпараметров")
+    parser.add_argument("--requests", type=int, default=200, help="Последовательных запросов /categorize")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[16], help="Одновременных клиентов для замера пропускной способности")
+    parser.add_argument("--duration", type=float, default=10, help="Длительность замера пропускной способности в секундах")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[100, 1000], help="Размеры пакетов /categorize/batch")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторов каждого запроса")
+    parser.add_argument("--threads", type=int, default=4, help="Потоков в рабочем процессе сервиса")
+    parser.add_argument("--port", type=int, default=5071)
+    parser.add_argument("--seed", type=int, default=42, help="Зерно генерации корпусов")
+    parser.add_argument("--output", help="Сохранить результаты в JSON-файл")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Базовая линия для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Допустимое ухудшение (0.25 — на 25%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Код возврата 1 при регрессии")
+    parser.add_argument("--save-baseline", action="store_true", help="Записать результаты как новую базовую линию")
+    args = parser.parse_args()
+
+    results = {}
+    for scale in sorted(args.scales):
+        print(f"Масштаб {scale:g}x...", file=sys.stderr)
+        results[f"{scale:g}x"] = run_scale(scale, args, with_inference=not results)
+    report = {"meta": collect_meta(args), "results": results}
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, ensure_ascii=False, indent=2)
+
+    regressions = 0
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        rows = compare(results, baseline["results"], args.threshold)
+        print_comparison(rows, args.threshold)
+        regressions = sum(row["regression"] for row in rows)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, ensure_ascii=False, indent=2)
+            baseline_file.write("\n")
+        print(f"Базовая линия записана: {args.baseline}", file=sys.stderr)
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    os.environ.setdefault("PYTHONWARNINGS", "ignore")
+    main()
@@ -0,0 +1,68 @@
+"""
+Сравнение времени подбора гиперпараметров в последовательном режиме и в пуле процессов.
+
+    python -m benchmarks.train_search --n-jobs 1 8 32
+    python -m benchmarks.train_search --n-jobs 1 4 --models "Logistic Regression" KNN --output search.json
+    python -m benchmarks.train_search --n-jobs 1 --strategy grid halving --max-seconds 300
+
+Первый прогон (первое значение --n-jobs с первой стратегией) считается базовым,
+для остальных выводится ускорение относительно него.
+Также проверяется, что лучшая модель и её точность не зависят от количества процессов.
+"""
+import argparse
+import json
+import time
+
+from src.config import DATA_PATH
+from src.ml.training import SEARCH_STRATEGIES, build_models, prepare_features, search_best_model
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение последовательного и параллельного подбора гиперпараметров")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV-файл с тикетами")
+    parser.add_argument("--n-jobs", type=int, nargs="+", default=[1, -1], help="Количество процессов для каждого прогона")
+    parser.add_argument("--models", nargs="+", default=None, choices=list(build_models()[0]), help="Модели для подбора (по умолчанию все)")
+    parser.add_argument("--strategy", nargs="+", default=["grid"], choices=SEARCH_STRATEGIES, help="Стратегии подбора для сравнения")
+    parser.add_argument("--factor", type=int, default=3, help="Коэффициент отсева для halving")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Срок, после которого подбор новых моделей не начинается")
+    parser.add_argument("--max-fits", type=int, default=None, help="Бюджет на количество обучений")
+    parser.add_argument("--output", help="Сохранить результаты в JSON-файл")
+    args = parser.parse_args()
+
+    _, _, X_train, y_train, X_test, y_test = prepare_features(args.data)
+
+    runs = []
+    for strategy in args.strategy:
+        for n_jobs in args.n_jobs:
+            started = time.perf_counter()
+            best_model_name, _, best_accuracy, results, summary = search_best_model(
+                X_train, y_train, X_test, y_test, n_jobs=n_jobs, model_names=args.models, strategy=strategy,
+                factor=args.factor, max_seconds=args.max_seconds, max_fits=args.max_fits
+            )
+            runs.append({
+                "strategy": strategy,
+                "n_jobs": n_jobs,
+                "seconds": round(time.perf_counter() - started, 2),
+                "best_model": best_model_name,
+                "accuracy": round(best_accuracy, 4),
+                "fits": summary["fits"],
+                "fits_pruned": summary["fits_pruned"],
+                "skipped_models": summary["skipped_models"],
+                "models": {name: result["seconds"] for name, result in results.items()}
+            })
+
+    baseline = runs[0]["seconds"]
+    print(f"{'стратегия':>10} {'n_jobs':>8} {'обучений':>9} {'отсечено':>9} {'время, с':>10} {'ускорение':>10}  лучшая модель")
+    for run in runs:
+        run["speedup"] = round(baseline / run["seconds"], 2) if run["seconds"] else None
+        print(f"{run['strategy']:>10} {run['n_jobs']:>8} {run['fits']:>9} {run['fits_pruned']:>9} "
+              f"{run['seconds']:>10} {run['speedup']:>10}  {run['best_model']} ({run['accuracy']})")
+
+    if len({(run["best_model"], run["accuracy"]) for run in runs}) > 1:
+        print("ВНИМАНИЕ: лучшая модель различается между прогонами")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(runs, output_file, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
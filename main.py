@@ -5,6 +5,14 @@ import multiprocessing
 def run_service():
     os.system("python -m src.routes.service")
 
+def run_server(argv):
+    from src.routes.server import serve
+    serve(argv)
+
+def run_async_server(argv):
+    from src.routes.async_service import serve
+    serve(argv)
+
 def run_app():
     os.system("streamlit run src/ui/app.py")
 
@@ -20,6 +28,14 @@ if __name__ == "__main__":
         service_process.join()
         app_process.join()
 
+    elif sys.argv[1] == "serve":
+        print("Запуск API в многопроцессном режиме...")
+        run_server(sys.argv[2:])
+
+    elif sys.argv[1] == "serve-async":
+        print("Запуск API в асинхронном режиме...")
+        run_async_server(sys.argv[2:])
+
     elif len(sys.argv) == 2:
         command = sys.argv[1]
         if command == "service":
@@ -29,7 +45,7 @@ if __name__ == "__main__":
             print("Запуск Streamlit GUI...")
             run_app()
         else:
-            print("Неверная команда. Используйте 'service' для запуска API, 'app' для запуска интерфейса, или запустите без параметров для запуска обоих.")
+            print("Неверная команда. Используйте 'service' для запуска API, 'serve' для многопроцессного запуска API, 'serve-async' для асинхронного запуска API, 'app' для запуска интерфейса, или запустите без параметров для запуска обоих.")
             sys.exit(1)
     else:
         print("Неверное использование. Укажите только один параметр или не указывайте вовсе.")
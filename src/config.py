@@ -0,0 +1,4 @@
+# Пути к файлам
+DATA_PATH = 'data/tickets.csv'
+MODEL_PATH = 'models/ticket_classifier.pkl'
+VECTORIZER_PATH = 'models/tfidf_vectorizer.pkl'
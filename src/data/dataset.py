@@ -0,0 +1,381 @@
+import csv
+import fcntl
+import hashlib
+import io
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+from src.config import DATA_PATH
+
+# Разделитель колонок в файле данных
+DELIMITER = ';'
+# Сколько строк CSV разбирается за один раз при потоковом чтении
+DATA_CHUNK_SIZE = int(os.environ.get("DATA_CHUNK_SIZE", 10000))
+# Размер блока при побайтовой передаче файла
+RAW_BLOCK_SIZE = 64 * 1024
+# Сколько секунд ждать, пока другой запрос закончит запись файла данных
+DATA_LOCK_TIMEOUT = float(os.environ.get("DATA_LOCK_TIMEOUT", 30))
+
+# Хранилище данных: csv — файл DATA_PATH, parquet — секционированный набор (см. src/data/parquet.py)
+DATASET_BACKEND = os.environ.get("DATASET_BACKEND", "csv")
+DATASET_BACKENDS = ('csv', 'parquet')
+
+REQUIRED_COLUMNS = ['Description', 'Type']
+# Колонка со свободным текстом: в неё возвращаются поля, разрезанные лишними разделителями
+TEXT_COLUMN = 'Description'
+# replace — заменить данные, append — дописать строки, merge — дописать с заменой строк по id
+UPLOAD_MODES = ('replace', 'append', 'merge')
+
+class DatasetColumnsError(ValueError):
+    """Запрошены колонки, которых нет в файле данных."""
+
+def read_columns(data_path=DATA_PATH):
+    """Колонки файла данных — читается только заголовок."""
+    return list(pd.read_csv(data_path, delimiter=DELIMITER, nrows=0).columns)
+
+def iter_chunks(data_path=DATA_PATH, columns=None, offset=0, limit=None, chunksize=DATA_CHUNK_SIZE):
+    """
+    Читает файл данных порциями по chunksize строк и возвращает генератор DataFrame.
+    columns — список колонок (разбираются только они), offset/limit — диапазон строк
+    после пропуска некорректных. В памяти одновременно находится не больше одной порции.
+    """
+    if columns is not None:
+        missing = [column for column in columns if column not in read_columns(data_path)]
+        if missing:
+            raise DatasetColumnsError(f"Колонки отсутствуют в данных: {missing}")
+
+    reader = pd.read_csv(
+        data_path, delimiter=DELIMITER, usecols=columns, chunksize=chunksize, on_bad_lines='skip'
+    )
+    with reader:
+        yield from slice_chunks(reader, columns, offset, limit)
+
+def slice_chunks(chunks, columns=None, offset=0, limit=None):
+    """Оставляет из последовательности DataFrame строки диапазона [offset, offset + limit) и колонки columns."""
+    remaining = limit
+    for chunk in chunks:
+        if offset:
+            if offset >= len(chunk):
+                offset -= len(chunk)
+                continue
+            chunk = chunk.iloc[offset:]
+            offset = 0
+        if remaining is not None:
+            chunk = chunk.iloc[:remaining]
+            remaining -= len(chunk)
+        if columns is not None:
+            chunk = chunk[columns]
+        if len(chunk):
+            yield chunk
+        if remaining == 0:
+            return
+
+def iter_raw(data_path=DATA_PATH, block_size=RAW_BLOCK_SIZE):
+    """Содержимое файла блоками по block_size байт без разбора."""
+    with open(data_path, 'rb') as data_file:
+        for block in iter(lambda: data_file.read(block_size), b''):
+            yield block
+
+class DatasetValidationError(ValueError):
+    """Загружаемый файл не прошёл проверку."""
+
+class DataLockedError(Exception):
+    """Файл данных уже обновляется другим запросом."""
+
+class _HashingReader(io.RawIOBase):
+    """Обёртка над бинарным потоком, считающая контрольную сумму и размер прочитанных данных."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._raw.read(len(buffer))
+        self.digest.update(data)
+        self.size += len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+def _lock_path(data_path):
+    return os.path.join(os.path.dirname(data_path) or '.', f'.{os.path.basename(data_path)}.lock')
+
+@contextmanager
+def data_write_lock(data_path=DATA_PATH, timeout=DATA_LOCK_TIMEOUT):
+    """
+    Блокировка записи файла данных, общая для всех процессов сервиса (fcntl.flock на lock-файле).
+    Блокировку снимает ядро при закрытии файла или завершении держателя, поэтому брошенных
+    блокировок не бывает; сам lock-файл не удаляется.
+    """
+    deadline = time.monotonic() + timeout
+    with open(_lock_path(data_path), 'a') as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise DataLockedError("Файл данных уже обновляется")
+                time.sleep(0.1)
+        yield
+
+def ends_with_newline(data_path):
+    with open(data_path, 'rb') as data_file:
+        data_file.seek(0, os.SEEK_END)
+        if data_file.tell() == 0:
+            return True
+        data_file.seek(-1, os.SEEK_END)
+        return data_file.read(1) == b'\n'
+
+def _read_header(data_path):
+    with open(data_path, 'r', encoding='utf-8-sig', newline='') as data_file:
+        return next(csv.reader(data_file, delimiter=DELIMITER), None)
+
+def ingest_csv(stream, data_path=DATA_PATH, mode='replace', strict=False, expected_checksum=None,
+               chunksize=DATA_CHUNK_SIZE):
+    """
+    Загружает CSV из бинарного потока stream за один проход: проверяет заголовок и строки,
+    считает контрольную сумму SHA-256 и количество строк и пишет результат во временный файл
+    рядом с data_path, который затем атомарно заменяет data_path. Читатели видят либо старый,
+    либо новый файл целиком.
+
+    mode: replace — заменить данные, append — дописать строки в конец,
+    merge — дописать строки, заменив существующие строки с тем же id.
+    В режимах append и merge колонки загружаемого файла приводятся к заголовку текущего файла.
+    strict=True — отклонить файл при первой некорректной строке, иначе такие строки пропускаются.
+    Возвращает отчёт о загрузке.
+    """
+    if mode not in UPLOAD_MODES:
+        raise DatasetValidationError(f"Неизвестный режим загрузки: {mode}")
+
+    hashing = _HashingReader(stream)
+    text = io.TextIOWrapper(io.BufferedReader(hashing), encoding='utf-8-sig', newline='')
+    reader = csv.reader(text, delimiter=DELIMITER)
+
+    with data_write_lock(data_path):
+        try:
+            header = next(reader, None)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise DatasetValidationError(f"Не удалось прочитать заголовок: {e}")
+        if not header:
+            raise DatasetValidationError("Файл пуст")
+        header = [column.strip() for column in header]
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise DatasetValidationError(f"Отсутствуют обязательные колонки: {missing}")
+
+        existing = os.path.exists(data_path) and mode != 'replace'
+        target_header = _read_header(data_path) if existing else header
+        if existing and not target_header:
+            existing, target_header = False, header
+        if existing and any(column not in target_header for column in REQUIRED_COLUMNS):
+            raise DatasetValidationError("В текущем файле данных нет обязательных колонок")
+        if mode == 'merge' and ('id' not in header or 'id' not in target_header):
+            raise DatasetValidationError("Для режима merge нужна колонка id в обоих файлах")
+
+        positions = [header.index(column) if column in header else None for column in target_header]
+        required = [header.index(column) for column in REQUIRED_COLUMNS]
+        id_position = header.index('id') if 'id' in header else None
+
+        report = {
+            "mode": mode,
+            "rows_total": 0,
+            "rows_written": 0,
+            "rows_invalid": 0,
+            "rows_replaced": 0,
+            "dropped_columns": [column for column in header if column not in target_header]
+        }
+        uploaded_ids = set()
+
+        os.makedirs(os.path.dirname(data_path) or '.', exist_ok=True)
+        tmp_path = f'{data_path}.{uuid.uuid4().hex}.tmp'
+        upload_path = f'{tmp_path}.upload' if mode == 'merge' and existing else tmp_path
+        try:
+            # Проход по загружаемому файлу: проверка строк и запись порциями
+            with open(upload_path, 'w', encoding='utf-8', newline='') as upload_file:
+                writer = csv.writer(upload_file, delimiter=DELIMITER)
+                if upload_path == tmp_path:
+                    if existing:
+                        # append: сначала текущие данные, затем новые строки
+                        with open(data_path, 'r', encoding='utf-8-sig', newline='') as data_file:
+                            shutil.copyfileobj(data_file, upload_file)
+                        if not ends_with_newline(data_path):
+                            upload_file.write('\r\n')
+                    else:
+                        writer.writerow(target_header)
+
+                batch = []
+                try:
+                    for line_number, row in enumerate(reader, start=2):
+                        if not row:
+                            continue
+                        report["rows_total"] += 1
+                        if len(row) != len(header) or any(not row[i].strip() for i in required):
+                            if strict:
+                                raise DatasetValidationError(f"Некорректная строка {line_number}")
+                            report["rows_invalid"] += 1
+                            continue
+                        if id_position is not None:
+                            uploaded_ids.add(row[id_position])
+                        batch.append([row[i] if i is not None else '' for i in positions])
+                        if len(batch) >= chunksize:
+                            writer.writerows(batch)
+                            report["rows_written"] += len(batch)
+                            batch = []
+                except (UnicodeDecodeError, csv.Error) as e:
+                    raise DatasetValidationError(f"Ошибка чтения файла: {e}")
+                writer.writerows(batch)
+                report["rows_written"] += len(batch)
+
+            checksum = hashing.digest.hexdigest()
+            if expected_checksum and expected_checksum.lower() != checksum:
+                raise DatasetValidationError("Контрольная сумма файла не совпадает")
+
+            if upload_path != tmp_path:
+                # merge: текущие строки без замещённых id, затем загруженные строки
+                target_id = target_header.index('id')
+                with open(tmp_path, 'w', encoding='utf-8', newline='') as merged_file, \
+                        open(data_path, 'r', encoding='utf-8-sig', newline='') as data_file:
+                    writer = csv.writer(merged_file, delimiter=DELIMITER)
+                    data_reader = csv.reader(data_file, delimiter=DELIMITER)
+                    writer.writerow(next(data_reader))
+                    batch = []
+                    for row in data_reader:
+                        if len(row) > target_id and row[target_id] in uploaded_ids:
+                            report["rows_replaced"] += 1
+                            continue
+                        batch.append(row)
+                        if len(batch) >= chunksize:
+                            writer.writerows(batch)
+                            batch = []
+                    writer.writerows(batch)
+                    with open(upload_path, 'r', encoding='utf-8', newline='') as upload_file:
+                        shutil.copyfileobj(upload_file, merged_file)
+
+            os.replace(tmp_path, data_path)
+        finally:
+            for path in {tmp_path, upload_path}:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    report.update(checksum=checksum, bytes=hashing.size)
+    return report
+
+def file_fingerprint(path, chunk_size=1024 * 1024):
+    """Хэш содержимого файла: изменение данных меняет ключ, переименование или touch — нет."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as data_file:
+        for chunk in iter(lambda: data_file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def repair_row(row, header):
+    """
+    Восстанавливает строку, в свободном тексте которой встретился разделитель:
+    лишние поля склеиваются обратно в колонку TEXT_COLUMN. Возвращает (строка, была ли исправлена);
+    строку, которую исправить нельзя, возвращает как есть.
+    """
+    extra = len(row) - len(header)
+    if extra <= 0 or TEXT_COLUMN not in header:
+        return row, False
+    position = header.index(TEXT_COLUMN)
+    text = DELIMITER.join(row[position:position + extra + 1])
+    return row[:position] + [text] + row[position + extra + 1:], True
+
+class CsvDataset:
+    """Данные в одном CSV-файле с разделителем ';' (исходный формат data/tickets.csv)."""
+
+    backend = 'csv'
+
+    def __init__(self, path=DATA_PATH):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def columns(self):
+        return read_columns(self.path)
+
+    def read(self, columns=None):
+        return pd.read_csv(self.path, delimiter=DELIMITER, usecols=columns)
+
+    def iter_chunks(self, columns=None, offset=0, limit=None, chunksize=DATA_CHUNK_SIZE):
+        return iter_chunks(self.path, columns=columns, offset=offset, limit=limit, chunksize=chunksize)
+
+    def fingerprint(self):
+        return file_fingerprint(self.path)
+
+    def state(self):
+        """Дешёвый признак изменения данных: размер и время изменения файла."""
+        stat = os.stat(self.path)
+        return f'{stat.st_size}:{stat.st_mtime_ns}'
+
+    def iter_ids(self):
+        with open(self.path, 'r', encoding='utf-8-sig', newline='') as csv_file:
+            reader = csv.reader(csv_file, delimiter=DELIMITER)
+            header = next(reader, [])
+            if 'id' not in header:
+                return
+            position = header.index('id')
+            for row in reader:
+                if len(row) > position:
+                    yield row[position]
+
+    def write_lock(self):
+        return data_write_lock(self.path)
+
+    @contextmanager
+    def appender(self, default_header):
+        """
+        Дописывает строки в конец файла. Отдаёт функцию write(поля), где поля — словарь
+        колонка -> значение; колонки, которых нет в файле, отбрасываются.
+        Если файла нет, он создаётся с заголовком default_header.
+        """
+        if not self.exists():
+            with open(self.path, mode='w', encoding='utf-8', newline='') as csv_file:
+                csv.writer(csv_file, delimiter=DELIMITER).writerow(default_header)
+        header = _read_header(self.path) or default_header
+        needs_newline = not ends_with_newline(self.path)
+
+        with open(self.path, mode='a', encoding='utf-8', newline='') as csv_file:
+            writer = csv.writer(csv_file, delimiter=DELIMITER)
+
+            def write(fields):
+                nonlocal needs_newline
+                if needs_newline:
+                    csv_file.write('\r\n')
+                    needs_newline = False
+                writer.writerow([fields.get(column, "") for column in header])
+
+            yield write
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
+
+    def ingest(self, stream, mode='replace', strict=False, expected_checksum=None):
+        return ingest_csv(stream, self.path, mode=mode, strict=strict, expected_checksum=expected_checksum)
+
+def get_dataset(data_path=DATA_PATH, backend=None):
+    """
+    Хранилище данных выбранного бэкенда (по умолчанию — из переменной окружения DATASET_BACKEND).
+    Для parquet data_path — каталог хранилища; путь по умолчанию (DATA_PATH) означает
+    DATASET_PARQUET_DIR, путь к CSV-файлу отклоняется.
+    """
+    backend = backend or DATASET_BACKEND
+    if backend == 'csv':
+        return CsvDataset(data_path)
+    if backend == 'parquet':
+        from src.data.parquet import ParquetDataset
+        if data_path == DATA_PATH:
+            return ParquetDataset()
+        if not os.path.isdir(data_path):
+            raise ValueError(f"Для хранилища parquet data_path должен быть каталогом хранилища: {data_path}")
+        return ParquetDataset(data_path)
+    raise ValueError(f"Неизвестное хранилище данных: {backend}")
@@ -0,0 +1,317 @@
+"""
+Колоночное хранилище данных в формате Parquet (требуется пакет pyarrow).
+
+Структура каталога DATASET_PARQUET_DIR:
+
+    CURRENT                    — имя активного поколения данных
+    <поколение>/columns.json   — список колонок
+    <поколение>/part-*.parquet — секции, только дописываются и никогда не меняются
+
+Загрузка с заменой данных создаёт новое поколение и атомарно переключает CURRENT,
+дописывание добавляет новые секции в текущее поколение. Заменённое поколение
+отмечается файлом .superseded и удаляется при одной из следующих замен, когда с момента
+замены прошло PARQUET_GENERATION_GRACE секунд: читатели (обучение, поток GET /data,
+экспорт) открывают секции по мере чтения и успевают дочитать старое поколение. Колонка Type хранится
+со словарным кодированием, остальные — строками.
+
+Импорт и экспорт в формат data/tickets.csv:
+
+    python -m src.data.parquet import data/tickets.csv
+    python -m src.data.parquet export tickets_export.csv
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+from src.data.dataset import (
+    DATA_CHUNK_SIZE, DELIMITER, REQUIRED_COLUMNS, DatasetColumnsError, DatasetValidationError,
+    data_write_lock, ingest_csv, repair_row, slice_chunks
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Каталог колоночного хранилища
+DATASET_PARQUET_DIR = os.environ.get("DATASET_PARQUET_DIR", os.path.join('data', 'tickets.parquet'))
+# Максимальное количество строк в одной секции
+PARQUET_PARTITION_ROWS = int(os.environ.get("PARQUET_PARTITION_ROWS", 100000))
+
+# Сколько секунд заменённое поколение хранится для читателей, начавших чтение до замены
+PARQUET_GENERATION_GRACE = float(os.environ.get("PARQUET_GENERATION_GRACE", 3600))
+
+CURRENT_FILE = 'CURRENT'
+COLUMNS_FILE = 'columns.json'
+# Отметка заменённого поколения: время изменения файла — время замены
+SUPERSEDED_FILE = '.superseded'
+# Колонки со словарным кодированием: мало различных значений
+DICTIONARY_COLUMNS = ('Type',)
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Для хранилища parquet нужен пакет pyarrow: pip install pyarrow")
+
+def _schema(columns):
+    return pa.schema([
+        (column, pa.dictionary(pa.int32(), pa.string()) if column in DICTIONARY_COLUMNS else pa.string())
+        for column in columns
+    ])
+
+class ParquetDataset:
+    """Секционированный колоночный набор данных, совместимый по интерфейсу с CsvDataset."""
+
+    backend = 'parquet'
+
+    def __init__(self, path=DATASET_PARQUET_DIR):
+        _require_pyarrow()
+        self.path = path
+
+    # ---------- Поколения и секции ----------
+
+    def _generation(self):
+        try:
+            with open(os.path.join(self.path, CURRENT_FILE), 'r', encoding='utf-8') as current_file:
+                return current_file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _generation_dir(self, generation=None):
+        return os.path.join(self.path, generation or self._generation())
+
+    def _create_generation(self, columns):
+        generation = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        os.makedirs(self._generation_dir(generation))
+        with open(os.path.join(self._generation_dir(generation), COLUMNS_FILE), 'w', encoding='utf-8') as columns_file:
+            json.dump(list(columns), columns_file, ensure_ascii=False)
+        return generation
+
+    def _activate_generation(self, generation):
+        previous = self._generation()
+        tmp_path = os.path.join(self.path, f'{CURRENT_FILE}.{uuid.uuid4().hex}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as current_file:
+            current_file.write(generation)
+        os.replace(tmp_path, os.path.join(self.path, CURRENT_FILE))
+        if previous and previous != generation:
+            with open(os.path.join(self._generation_dir(previous), SUPERSEDED_FILE), 'w', encoding='utf-8'):
+                pass
+        self._remove_superseded(generation)
+
+    def _remove_superseded(self, current):
+        """Удаляет поколения, заменённые больше PARQUET_GENERATION_GRACE секунд назад."""
+        for name in os.listdir(self.path):
+            if name == current:
+                continue
+            marker = os.path.join(self.path, name, SUPERSEDED_FILE)
+            try:
+                superseded_at = os.path.getmtime(marker)
+            except (FileNotFoundError, NotADirectoryError):
+                # Не поколение или поколение, которое ещё записывается
+                continue
+            if time.time() - superseded_at > PARQUET_GENERATION_GRACE:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def _files(self):
+        generation_dir = self._generation_dir()
+        return sorted(
+            os.path.join(generation_dir, name) for name in os.listdir(generation_dir)
+            if name.startswith('part-') and name.endswith('.parquet')
+        )
+
+    def _write_partition(self, generation, columns, rows):
+        """Записывает секцию: сначала во временный файл, затем переименовывает."""
+        arrays = list(zip(*rows)) if rows else [[] for _ in columns]
+        table = pa.table(
+            [pa.array(values, type=pa.string()) for values in arrays], names=list(columns)
+        ).cast(_schema(columns))
+        name = f'part-{time.time_ns():020d}-{uuid.uuid4().hex[:6]}.parquet'
+        generation_dir = self._generation_dir(generation)
+        tmp_path = os.path.join(generation_dir, f'.{name}.tmp')
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(generation_dir, name))
+
+    def _dataset(self):
+        return pa_dataset.dataset(self._files(), schema=_schema(self.columns()), format='parquet')
+
+    # ---------- Интерфейс хранилища ----------
+
+    def exists(self):
+        generation = self._generation()
+        return generation is not None and os.path.isdir(self._generation_dir(generation))
+
+    def columns(self):
+        with open(os.path.join(self._generation_dir(), COLUMNS_FILE), 'r', encoding='utf-8') as columns_file:
+            return json.load(columns_file)
+
+    def _check_columns(self, columns):
+        if columns is not None:
+            missing = [column for column in columns if column not in self.columns()]
+            if missing:
+                raise DatasetColumnsError(f"Колонки отсутствуют в данных: {missing}")
+
+    def read(self, columns=None):
+        """Читает данные без разбора текста; колонки со словарным кодированием становятся категориальными."""
+        self._check_columns(columns)
+        return self._dataset().to_table(columns=columns).to_pandas()
+
+    def iter_chunks(self, columns=None, offset=0, limit=None, chunksize=DATA_CHUNK_SIZE):
+        self._check_columns(columns)
+        batches = self._dataset().to_batches(columns=columns, batch_size=chunksize)
+        yield from slice_chunks((batch.to_pandas() for batch in batches), columns, offset, limit)
+
+    def fingerprint(self):
+        """Секции неизменяемы, поэтому отпечаток — хэш поколения и имён секций."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self._generation().encode('utf-8'))
+        for path in self._files():
+            digest.update(os.path.basename(path).encode('utf-8'))
+        return digest.hexdigest()
+
+    def state(self):
+        return self.fingerprint()
+
+    def iter_ids(self):
+        if 'id' not in self.columns():
+            return
+        for batch in self._dataset().to_batches(columns=['id']):
+            for value in batch.column(0).to_pylist():
+                if value is not None:
+                    yield value
+
+    def write_lock(self):
+        return data_write_lock(self.path)
+
+    @contextmanager
+    def appender(self, default_header):
+        """Дописывает строки новыми секциями по PARQUET_PARTITION_ROWS строк."""
+        os.makedirs(self.path, exist_ok=True)
+        if not self.exists():
+            self._activate_generation(self._create_generation(default_header))
+        generation = self._generation()
+        columns = self.columns()
+        rows = []
+
+        def write(fields):
+            rows.append([fields.get(column) or None for column in columns])
+            if len(rows) >= PARQUET_PARTITION_ROWS:
+                self._write_partition(generation, columns, rows)
+                rows.clear()
+
+        yield write
+        if rows:
+            self._write_partition(generation, columns, rows)
+
+    def import_csv(self, csv_path, mode='replace'):
+        """
+        Импортирует CSV в формате data/tickets.csv. Строки, разрезанные разделителем внутри
+        описания, восстанавливаются; строки, которые восстановить нельзя, пропускаются.
+        Возвращает отчёт с количеством строк.
+        """
+        if mode not in ('replace', 'append'):
+            raise DatasetValidationError("Хранилище parquet поддерживает только режимы replace и append")
+        report = {"rows_written": 0, "rows_repaired": 0, "rows_invalid": 0}
+
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as csv_file:
+            reader = csv.reader(csv_file, delimiter=DELIMITER)
+            header = [column.strip() for column in next(reader, [])]
+            missing = [column for column in REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise DatasetValidationError(f"Отсутствуют обязательные колонки: {missing}")
+
+            os.makedirs(self.path, exist_ok=True)
+            if mode == 'append' and self.exists():
+                generation, columns = self._generation(), self.columns()
+            else:
+                generation, columns = self._create_generation(header), header
+            positions = [header.index(column) if column in header else None for column in columns]
+
+            try:
+                rows = []
+                for row in reader:
+                    if not row:
+                        continue
+                    row, repaired = repair_row(row, header)
+                    if len(row) != len(header):
+                        report["rows_invalid"] += 1
+                        continue
+                    report["rows_repaired"] += int(repaired)
+                    rows.append([row[i] or None if i is not None else None for i in positions])
+                    if len(rows) >= PARQUET_PARTITION_ROWS:
+                        self._write_partition(generation, columns, rows)
+                        report["rows_written"] += len(rows)
+                        rows = []
+                if rows:
+                    self._write_partition(generation, columns, rows)
+                    report["rows_written"] += len(rows)
+            except Exception:
+                if generation != self._generation():
+                    shutil.rmtree(self._generation_dir(generation), ignore_errors=True)
+                raise
+
+        if generation != self._generation():
+            self._activate_generation(generation)
+        return report
+
+    def export_csv(self, csv_path):
+        """Выгружает данные в CSV в формате data/tickets.csv; файл заменяется атомарно."""
+        columns = self.columns()
+        tmp_path = f'{csv_path}.{uuid.uuid4().hex}.tmp'
+        rows = 0
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as csv_file:
+                writer = csv.writer(csv_file, delimiter=DELIMITER)
+                writer.writerow(columns)
+                for batch in self._dataset().to_batches(batch_size=DATA_CHUNK_SIZE):
+                    values = [batch.column(i).to_pylist() for i in range(len(columns))]
+                    for row in zip(*values):
+                        writer.writerow(["" if value is None else value for value in row])
+                        rows += 1
+            os.replace(tmp_path, csv_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return rows
+
+    def ingest(self, stream, mode='replace', strict=False, expected_checksum=None):
+        """
+        Загрузка через POST /data: файл проверяется так же, как для CSV-хранилища,
+        во временный CSV, затем импортируется новыми секциями.
+        """
+        if mode == 'merge':
+            raise DatasetValidationError("Хранилище parquet поддерживает только режимы replace и append")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, 'upload.csv')
+            report = ingest_csv(stream, tmp_path, strict=strict, expected_checksum=expected_checksum)
+            with self.write_lock():
+                self.import_csv(tmp_path, mode=mode)
+        report["mode"] = mode
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Импорт и экспорт колоночного хранилища данных")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("csv_path", help="CSV-файл в формате data/tickets.csv")
+    parser.add_argument("--dir", default=DATASET_PARQUET_DIR, help="Каталог хранилища")
+    parser.add_argument("--append", action="store_true", help="Дописать данные вместо замены (для import)")
+    args = parser.parse_args()
+
+    dataset = ParquetDataset(args.dir)
+    with dataset.write_lock():
+        if args.command == "import":
+            report = dataset.import_csv(args.csv_path, mode="append" if args.append else "replace")
+            print(f"Импортировано строк: {report['rows_written']}, исправлено: {report['rows_repaired']}, "
+                  f"пропущено: {report['rows_invalid']}")
+        else:
+            print(f"Выгружено строк: {dataset.export_csv(args.csv_path)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Асинхронный доступ к ticket_predictions (asyncpg) для асинхронного режима сервиса
+(src.routes.async_service). Запросы совпадают с src.db.database, но ожидание БД
+не занимает поток: тысячи одновременных запросов обслуживает один цикл событий.
+"""
+import time
+from contextlib import asynccontextmanager
+
+import asyncpg
+
+from src.db.database import DB_PARAMS, DB_POOL_MAX_SIZE, DB_POOL_MIN_SIZE, DB_POOL_TIMEOUT, TICKET_COLUMNS, TICKETS_STREAM_CHUNK
+from src.metrics import DB_CONNECTION_LATENCY
+
+async def create_pool(min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE):
+    return await asyncpg.create_pool(
+        database=DB_PARAMS["dbname"], user=DB_PARAMS["user"], password=DB_PARAMS["password"] or None,
+        host=DB_PARAMS["host"], port=int(DB_PARAMS["port"]),
+        min_size=min_size, max_size=max_size
+    )
+
+def pool_stats(pool):
+    size = pool.get_size()
+    idle = pool.get_idle_size()
+    return {
+        "size": size,
+        "idle": idle,
+        "in_use": size - idle,
+        "min_size": pool.get_min_size(),
+        "max_size": pool.get_max_size()
+    }
+
+@asynccontextmanager
+async def acquire(pool):
+    """Соединение из пула; время ожидания попадает в ту же метрику, что и у пула psycopg2."""
+    started = time.perf_counter()
+    async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+        DB_CONNECTION_LATENCY.observe(time.perf_counter() - started)
+        yield conn
+
+async def insert_predictions(pool, rows):
+    """Сохраняет пачку предсказаний (ticket_id, title, description, predicted_type) одной командой COPY."""
+    # psycopg2 приводит числа к тексту сам, asyncpg требует точных типов колонок
+    records = [tuple(None if value is None else str(value) for value in row) for row in rows]
+    async with acquire(pool) as conn:
+        await conn.copy_records_to_table(
+            'ticket_predictions', records=records,
+            columns=['ticket_id', 'title', 'description', 'predicted_type']
+        )
+
+def _tickets_filter(after_id=None, predicted_type=None, min_id=None, max_id=None):
+    conditions = []
+    params = []
+    for condition, value in (("id > {}", after_id), ("id >= {}", min_id), ("id <= {}", max_id),
+                             ("predicted_type = {}", predicted_type)):
+        if value is not None:
+            params.append(value)
+            conditions.append(condition.format(f"${len(params)}"))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+async def fetch_tickets_page(pool, limit, after_id=None, predicted_type=None, min_id=None, max_id=None):
+    """Страница тикетов (keyset-пагинация), как src.db.database.fetch_tickets_page."""
+    where, params = _tickets_filter(after_id, predicted_type, min_id, max_id)
+    params.append(limit + 1)
+    async with acquire(pool) as conn:
+        rows = await conn.fetch(
+            f"SELECT id, title, description, predicted_type FROM ticket_predictions {where} "
+            f"ORDER BY id LIMIT ${len(params)}",
+            *params
+        )
+
+    tickets = [dict(zip(TICKET_COLUMNS, row)) for row in rows[:limit]]
+    next_cursor = tickets[-1]["id"] if len(rows) > limit else None
+    return tickets, next_cursor
+
+async def iter_tickets(pool, after_id=None, predicted_type=None, min_id=None, max_id=None, limit=None,
+                       chunk_size=TICKETS_STREAM_CHUNK):
+    """Асинхронный генератор тикетов по возрастанию id через серверный курсор."""
+    where, params = _tickets_filter(after_id, predicted_type, min_id, max_id)
+    query = f"SELECT id, title, description, predicted_type FROM ticket_predictions {where} ORDER BY id"
+    if limit is not None:
+        params.append(limit)
+        query += f" LIMIT ${len(params)}"
+
+    async with acquire(pool) as conn:
+        async with conn.transaction():
+            async for row in conn.cursor(query, *params, prefetch=chunk_size):
+                yield dict(zip(TICKET_COLUMNS, row))
+
+async def delete_ticket(pool, ticket_id):
+    """Удаляет запись; возвращает количество удалённых строк."""
+    async with acquire(pool) as conn:
+        status = await conn.execute("DELETE FROM ticket_predictions WHERE id = $1", ticket_id)
+    return int(status.split()[-1])
+
+async def update_ticket(pool, ticket_id, fields):
+    """Обновляет поля записи (словарь колонка — значение); возвращает количество изменённых строк."""
+    assignments = ", ".join(f"{column} = ${i}" for i, column in enumerate(fields, start=1))
+    async with acquire(pool) as conn:
+        status = await conn.execute(
+            f"UPDATE ticket_predictions SET {assignments} WHERE id = ${len(fields) + 1}",
+            *fields.values(), ticket_id
+        )
+    return int(status.split()[-1])
@@ -1,16 +1,325 @@
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.extras import RealDictCursor, execute_values
+
+from src.metrics import DB_CONNECTION_LATENCY
+
+# Параметры подключения к БД
+DB_PARAMS = {
+    "dbname": "ticket_classifier",
+    "user": "postgres",
+    "password": "",
+    "host": "localhost",
+    "port": "5432"
+}
+
+# Настройки пула соединений
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+# Сколько секунд ждать свободное соединение, прежде чем вернуть ошибку
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+# Соединение, простоявшее в пуле дольше этого времени, проверяется запросом SELECT 1
+DB_POOL_CHECK_INTERVAL = float(os.environ.get("DB_POOL_CHECK_INTERVAL", 30))
+# Сколько строк серверный курсор передаёт за один раз при потоковой выдаче тикетов
+TICKETS_STREAM_CHUNK = int(os.environ.get("TICKETS_STREAM_CHUNK", 2000))
+
+TICKET_COLUMNS = ("id", "title", "description", "predicted_type")
 
 def get_db_connection():
     try:
-        conn = psycopg2.connect(
-            dbname="ticket_classifier",
-            user="postgres",
-            password="",
-            host="localhost",
-            port="5432"
-        )
+        conn = psycopg2.connect(**DB_PARAMS)
         return conn
     except Exception as e:
         print("Ошибка подключения к БД:", e)
-        return None
\ No newline at end of file
+        return None
+
+class PoolTimeoutError(Exception):
+    """Свободное соединение не появилось за отведённое время."""
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений psycopg2.
+    Если все соединения заняты и достигнут max_size, поток ждёт освобождения соединения не дольше timeout секунд.
+    """
+
+    def __init__(self, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 timeout=DB_POOL_TIMEOUT, check_interval=DB_POOL_CHECK_INTERVAL):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Некорректные размеры пула соединений")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+
+        self._cond = threading.Condition()
+        self._idle = []  # (соединение, время возврата в пул)
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+
+        # Статистика
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        for _ in range(min_size):
+            try:
+                conn = self._connect()
+            except Exception as e:
+                print("Ошибка подключения к БД:", e)
+                break
+            self._idle.append((conn, time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        return psycopg2.connect(**DB_PARAMS)
+
+    def _is_healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self, timeout=None):
+        """
+        Выдаёт соединение из пула. Простаивавшие соединения перед выдачей проверяются,
+        разорванные заменяются новыми.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        deadline = started + timeout
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Резервируем место под новое соединение, само подключение — вне блокировки
+                    self._size += 1
+                    conn, returned_at = None, None
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(f"Нет свободных соединений с БД в течение {timeout} с")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        try:
+            if conn is not None and not self._is_healthy(conn, returned_at):
+                self._close_quietly(conn)
+                with self._cond:
+                    self._discarded += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.perf_counter() - started
+        DB_CONNECTION_LATENCY.observe(waited)
+        with self._cond:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """
+        Возвращает соединение в пул. Незавершённая транзакция откатывается,
+        сломанное соединение закрывается.
+        """
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed:
+                self._size -= 1
+                self._discarded += 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.getconn(timeout)
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def closeall(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._size -= len(self._idle)
+            self._idle = []
+
+    def stats(self):
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "checkout_avg_ms": round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "checkout_max_ms": round(self._wait_max * 1000, 3)
+            }
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Возвращает пул соединений текущего процесса, создавая его при первом обращении.
+    После fork дочерний процесс создаёт собственный пул: соединения родителя не переиспользуются.
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ConnectionPool()
+                _pool_pid = pid
+    return _pool
+
+@contextmanager
+def db_connection(timeout=None):
+    """
+    Контекстный менеджер для работы с соединением из пула:
+
+        with db_connection() as conn:
+            ...
+            conn.commit()
+
+    Незафиксированная транзакция откатывается при возврате соединения в пул.
+    """
+    with get_pool().connection(timeout) as conn:
+        yield conn
+
+def get_pool_stats():
+    return get_pool().stats()
+
+def insert_predictions(rows):
+    """
+    Сохраняет пачку предсказаний одним многострочным INSERT в рамках одной транзакции.
+    rows — список кортежей (ticket_id, title, description, predicted_type).
+    """
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO ticket_predictions (ticket_id, title, description, predicted_type)
+                VALUES %s
+                """,
+                rows,
+                page_size=1000
+            )
+        conn.commit()
+
+def _tickets_filter(after_id=None, predicted_type=None, min_id=None, max_id=None):
+    conditions = []
+    params = []
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(after_id)
+    if min_id is not None:
+        conditions.append("id >= %s")
+        params.append(min_id)
+    if max_id is not None:
+        conditions.append("id <= %s")
+        params.append(max_id)
+    if predicted_type is not None:
+        conditions.append("predicted_type = %s")
+        params.append(predicted_type)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+def fetch_tickets_page(limit, after_id=None, predicted_type=None, min_id=None, max_id=None):
+    """
+    Страница тикетов по возрастанию id, начиная после after_id (keyset-пагинация).
+    Запрос читает индекс первичного ключа с нужного места, поэтому стоимость
+    не зависит от номера страницы. Возвращает (тикеты, курсор следующей страницы или None).
+    """
+    where, params = _tickets_filter(after_id, predicted_type, min_id, max_id)
+    with db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, title, description, predicted_type FROM ticket_predictions {where} ORDER BY id LIMIT %s",
+                params + [limit + 1]
+            )
+            rows = cursor.fetchall()
+
+    tickets = [dict(zip(TICKET_COLUMNS, row)) for row in rows[:limit]]
+    next_cursor = tickets[-1]["id"] if len(rows) > limit else None
+    return tickets, next_cursor
+
+def iter_tickets(after_id=None, predicted_type=None, min_id=None, max_id=None, limit=None,
+                 chunk_size=TICKETS_STREAM_CHUNK):
+    """
+    Генератор тикетов по возрастанию id через серверный (именованный) курсор:
+    строки передаются из БД порциями по chunk_size, и память не растёт с размером таблицы.
+    Соединение занято, пока генератор не исчерпан или не закрыт.
+    """
+    where, params = _tickets_filter(after_id, predicted_type, min_id, max_id)
+    query = f"SELECT id, title, description, predicted_type FROM ticket_predictions {where} ORDER BY id"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    with db_connection() as conn:
+        with conn.cursor(name=f"tickets_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(query, params)
+            for row in cursor:
+                yield dict(zip(TICKET_COLUMNS, row))
@@ -0,0 +1,99 @@
+import csv
+import os
+import sqlite3
+import tempfile
+
+from psycopg2 import sql
+
+from src.config import DATA_PATH
+from src.data.dataset import get_dataset
+from src.db.database import db_connection
+from src.profiling import profiled
+
+# Колонки нового файла данных
+EXPORT_HEADER = ['id', 'title', 'Type', 'Description']
+
+def index_path(data_path=DATA_PATH):
+    """Индекс выгрузки хранится рядом с файлом (каталогом) данных."""
+    return os.path.join(os.path.dirname(data_path) or '.', f'.{os.path.basename(data_path)}.index.sqlite')
+
+def _open_index(data_path):
+    index = sqlite3.connect(index_path(data_path))
+    index.execute("CREATE TABLE IF NOT EXISTS ids (ticket_id TEXT PRIMARY KEY)")
+    index.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)")
+    return index
+
+def _get_state(index, key, default=None):
+    row = index.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+def _set_state(index, key, value):
+    index.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, str(value)))
+
+def _rebuild_index(index, dataset):
+    """
+    Перестраивает индекс по данным (один потоковый проход по колонке id).
+    Нужен при первом запуске и если данные изменили в обход выгрузки, например загрузкой через /data.
+    Водяной знак сбрасывается: следующая выгрузка просмотрит всю таблицу, дубликаты отсеет индекс.
+    """
+    index.execute("DELETE FROM ids")
+    index.executemany("INSERT OR IGNORE INTO ids (ticket_id) VALUES (?)", ((ticket_id,) for ticket_id in dataset.iter_ids()))
+    _set_state(index, 'watermark', 0)
+
+@profiled
+def export_tickets_to_csv(data_path=DATA_PATH, dataset=None):
+    """
+    Функция для экспорта данных из базы данных в tickets.csv (или в выбранное хранилище данных).
+    Выгружаются только строки ticket_predictions с id больше водяного знака прошлой выгрузки,
+    дельта читается через COPY ... TO STDOUT. Уже присутствующие в данных ticket_id отсеиваются
+    по индексу в SQLite, поэтому данные не перечитываются.
+    Возвращает количество добавленных записей.
+    """
+    dataset = dataset or get_dataset(data_path)
+    added = 0
+    with dataset.write_lock():
+        # Если данных нет, создаём их с корректными колонками
+        if not dataset.exists():
+            with dataset.appender(EXPORT_HEADER):
+                pass
+
+        index = _open_index(dataset.path)
+        try:
+            if _get_state(index, 'file_state') != dataset.state():
+                _rebuild_index(index, dataset)
+            watermark = int(_get_state(index, 'watermark', 0))
+
+            # Дельта из базы данных во временный файл: память не зависит от размера выгрузки
+            with tempfile.TemporaryFile(mode='w+', encoding='utf-8', newline='') as delta_file:
+                query = sql.SQL(
+                    "COPY (SELECT id, ticket_id, title, predicted_type, description FROM ticket_predictions "
+                    "WHERE id > {} ORDER BY id) TO STDOUT WITH (FORMAT csv)"
+                ).format(sql.Literal(watermark))
+                with db_connection() as connection:
+                    with connection.cursor() as cursor:
+                        cursor.copy_expert(query.as_string(connection), delta_file)
+                delta_file.seek(0)
+
+                with dataset.appender(EXPORT_HEADER) as write:
+                    for db_id, ticket_id, title, predicted_type, description in csv.reader(delta_file):
+                        watermark = max(watermark, int(db_id))
+                        if ticket_id:
+                            if index.execute("SELECT 1 FROM ids WHERE ticket_id = ?", (ticket_id,)).fetchone():
+                                continue
+                            index.execute("INSERT INTO ids (ticket_id) VALUES (?)", (ticket_id,))
+                        write({'id': ticket_id, 'title': title, 'Type': predicted_type, 'Description': description})
+                        added += 1
+
+            if added:
+                print(f"{added} новых записей добавлено в {dataset.path}.")
+            else:
+                print("Новых записей для добавления нет.")
+
+            # Индекс, водяной знак и состояние данных фиксируются только после записи
+            _set_state(index, 'watermark', watermark)
+            _set_state(index, 'file_state', dataset.state())
+            index.commit()
+        finally:
+            index.close()
+
+    return added
@@ -0,0 +1,170 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+from src.db.database import insert_predictions
+
+# Режим отложенной записи предсказаний (write-behind) для /categorize
+WRITE_BEHIND_ENABLED = os.environ.get("WRITE_BEHIND", "0") == "1"
+# Максимальное количество строк, ожидающих записи
+WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get("WRITE_BEHIND_QUEUE_SIZE", 10000))
+# Строки записываются пачками не больше этого размера...
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", 500))
+# ...и не реже, чем раз в указанное количество секунд
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", 1.0))
+# Поведение при переполнении очереди: block, drop_new или drop_oldest
+WRITE_BEHIND_OVERFLOW = os.environ.get("WRITE_BEHIND_OVERFLOW", "block")
+# Сколько секунд ждать места в очереди в режиме block, после чего строка отбрасывается
+WRITE_BEHIND_BLOCK_TIMEOUT = float(os.environ.get("WRITE_BEHIND_BLOCK_TIMEOUT", 1.0))
+
+OVERFLOW_POLICIES = ("block", "drop_new", "drop_oldest")
+
+class PredictionWriter:
+    """
+    Очередь отложенной записи предсказаний в ticket_predictions.
+    Строки копятся в ограниченной очереди, фоновый поток сохраняет их пачками
+    по размеру или по времени. При завершении процесса оставшиеся строки дописываются.
+    """
+
+    def __init__(self, write_fn=insert_predictions, queue_size=WRITE_BEHIND_QUEUE_SIZE,
+                 batch_size=WRITE_BEHIND_BATCH_SIZE, flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+                 overflow=WRITE_BEHIND_OVERFLOW, block_timeout=WRITE_BEHIND_BLOCK_TIMEOUT,
+                 max_retries=3):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Неизвестная политика переполнения: {overflow}")
+        self.write_fn = write_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._atexit_registered = False
+
+        self._counters_lock = threading.Lock()
+        self._queued = 0
+        self._flushed = 0
+        self._dropped = 0
+        self._failed = 0
+        self._batches = 0
+
+    def _count(self, name, value=1):
+        with self._counters_lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def _ensure_started(self):
+        # Поток запускается лениво: после fork в дочернем процессе его нужно создать заново
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop_event.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def put(self, row):
+        """
+        Ставит строку (ticket_id, title, description, predicted_type) в очередь на запись.
+        Возвращает False, если строка была отброшена из-за переполнения.
+        """
+        self._ensure_started()
+
+        if self.overflow == "block":
+            try:
+                self._queue.put(row, timeout=self.block_timeout)
+            except queue.Full:
+                self._count("_dropped")
+                return False
+        elif self.overflow == "drop_new":
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self._count("_dropped")
+                return False
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(row)
+                    break
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self._count("_dropped")
+                    except queue.Empty:
+                        pass
+
+        self._count("_queued")
+        return True
+
+    def _collect(self):
+        """Собирает пачку: ждёт первую строку, затем добирает до batch_size или до истечения интервала."""
+        stopping = self._stop_event.is_set()
+        batch = []
+        try:
+            # Короткое ожидание, чтобы stop() не ждал целый интервал
+            batch.append(self._queue.get_nowait() if stopping else self._queue.get(timeout=min(self.flush_interval, 0.1)))
+        except queue.Empty:
+            return batch
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if stopping or remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.write_fn(batch)
+                self._count("_flushed", len(batch))
+                self._count("_batches")
+                return
+            except Exception as e:
+                print(f"Ошибка отложенной записи в БД (попытка {attempt}/{self.max_retries}):", e)
+                if attempt < self.max_retries and not self._stop_event.is_set():
+                    time.sleep(min(0.5 * 2 ** (attempt - 1), 5))
+        self._count("_failed", len(batch))
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._stop_event.is_set():
+                break
+
+    def stop(self, timeout=30):
+        """Останавливает фоновый поток, предварительно записав всё, что осталось в очереди."""
+        self._stop_event.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._counters_lock:
+            return {
+                "overflow": self.overflow,
+                "pending": self._queue.qsize(),
+                "queued": self._queued,
+                "flushed": self._flushed,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "batches": self._batches
+            }
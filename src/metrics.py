@@ -0,0 +1,122 @@
+"""
+Метрики Prometheus (GET /metrics): количество и длительность запросов по маршрутам,
+длительность этапов /categorize, время получения соединения с БД, активная версия
+модели, длительность её загрузки и длительность задач обучения.
+
+Запись значения — одно обращение к счётчику в памяти процесса, поэтому метрики
+собираются всегда. Если задана переменная окружения PROMETHEUS_MULTIPROC_DIR
+(main.py serve задаёт её сам), каждый процесс пишет значения в свои файлы в этом
+каталоге, а /metrics суммирует их по всем рабочим процессам. Переменная должна быть
+задана до первого импорта prometheus_client.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Границы корзин гистограмм в секундах
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+MODEL_LOAD_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TRAINING_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+
+# Этапы обработки /categorize: разбор JSON, векторизация, предсказание, запись в БД.
+# При отложенной записи (WRITE_BEHIND=1) вместо db_insert измеряется постановка строки в очередь
+STAGES = ("json_parse", "vectorize", "predict", "db_insert", "db_enqueue")
+
+# Маршрут запросов, не совпавших ни с одним правилом: путь в метку не попадает
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUESTS = Counter(
+    "ticket_api_requests_total", "Количество HTTP-запросов", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "ticket_api_request_duration_seconds", "Длительность обработки HTTP-запроса",
+    ["method", "route"], buckets=REQUEST_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "ticket_api_stage_duration_seconds", "Длительность этапов обработки /categorize",
+    ["stage"], buckets=STAGE_BUCKETS
+)
+DB_CONNECTION_LATENCY = Histogram(
+    "ticket_api_db_connection_seconds", "Время получения соединения с БД из пула, включая подключение",
+    buckets=STAGE_BUCKETS
+)
+MODEL_INFO = Gauge(
+    "ticket_api_model_info", "Активная версия модели (1 — активна)", ["version"], multiprocess_mode="liveall"
+)
+MODEL_LOADED_AT = Gauge(
+    "ticket_api_model_loaded_timestamp_seconds", "Время загрузки активной модели (Unix time)",
+    multiprocess_mode="liveall"
+)
+MODEL_LOAD_LATENCY = Histogram(
+    "ticket_api_model_load_duration_seconds", "Длительность загрузки модели и векторизатора",
+    buckets=MODEL_LOAD_BUCKETS
+)
+TRAINING_DURATION = Histogram(
+    "ticket_api_training_job_duration_seconds", "Длительность задач обучения",
+    ["mode", "status"], buckets=TRAINING_BUCKETS
+)
+
+# Дочерние метрики этапов создаются заранее: на горячем пути нет поиска по меткам
+_stage_latency = {stage: STAGE_LATENCY.labels(stage) for stage in STAGES}
+_model_version = None
+
+def observe_stage(stage, seconds):
+    _stage_latency[stage].observe(seconds)
+
+def observe_request(method, route, status, seconds):
+    REQUESTS.labels(method, route, str(status)).inc()
+    REQUEST_LATENCY.labels(method, route).observe(seconds)
+
+def set_model(version, loaded_at, load_seconds=None):
+    """Отмечает активную версию модели в процессе; load_seconds — длительность её загрузки."""
+    global _model_version
+    if _model_version is not None and _model_version != version:
+        MODEL_INFO.labels(_model_version).set(0)
+    _model_version = version
+    MODEL_INFO.labels(version).set(1)
+    MODEL_LOADED_AT.set(loaded_at)
+    if load_seconds is not None:
+        MODEL_LOAD_LATENCY.observe(load_seconds)
+
+def observe_training_job(job):
+    """Длительность завершённой задачи обучения (от запуска процесса до завершения)."""
+    started_at = job.get("started_at") or job["created_at"]
+    finished_at = job.get("finished_at") or time.time()
+    mode = job.get("params", {}).get("mode", "full")
+    TRAINING_DURATION.labels(mode, job["status"]).observe(max(finished_at - started_at, 0.0))
+
+def render():
+    """Текст метрик в формате Prometheus и его Content-Type."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def instrument_flask(app):
+    """Считает запросы и их длительность по шаблону маршрута Flask (например, /tickets/<int:id>)."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+            observe_request(request.method, route, response.status_code, time.perf_counter() - started)
+        return response
+
+def mark_process_dead(pid):
+    """Убирает из /metrics значения liveall-метрик завершившегося рабочего процесса."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(pid)
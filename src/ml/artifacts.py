@@ -0,0 +1,83 @@
+"""
+Артефакты модели для отображения в память.
+
+Рядом с каждым pickle-файлом модели или векторизатора хранится его копия в формате
+joblib (<имя>.joblib): числовые массивы (коэффициенты, веса IDF, опорные векторы,
+массивы деревьев) записаны в ней отдельными выровненными блоками и при загрузке
+отображаются в память только для чтения. Процессы сервиса разделяют одну копию
+массивов через страничный кэш, а загрузка не копирует их в память процесса.
+Pickle-файлы остаются основным форматом: их отдаёт GET /model-files.
+
+Конвертация существующих pickle-файлов:
+
+    python -m src.ml.artifacts                  # legacy-файлы и все версии реестра
+    python -m src.ml.artifacts --version <id>   # одна версия
+"""
+import argparse
+import os
+import pickle
+import uuid
+
+import joblib
+
+from src.config import MODEL_PATH, VECTORIZER_PATH
+
+# Загружать модели через отображение в память (0 — всегда читать pickle-файлы)
+MODEL_MMAP = os.environ.get("MODEL_MMAP", "1") == "1"
+
+ARTIFACT_SUFFIX = '.joblib'
+
+def artifact_path(pickle_path):
+    """Путь к артефакту для отображения в память рядом с pickle-файлом."""
+    return os.path.splitext(pickle_path)[0] + ARTIFACT_SUFFIX
+
+def write_artifact(obj, pickle_path):
+    """Записывает артефакт для pickle_path атомарно: во временный файл, затем переименование."""
+    path = artifact_path(pickle_path)
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        # Без сжатия: сжатые массивы нельзя отобразить в память
+        joblib.dump(obj, tmp_path, compress=0)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+def load_artifact(pickle_path, mmap=None):
+    """
+    Загружает объект: из артефакта с отображением массивов в память, если он есть
+    и не старше pickle-файла, иначе — из pickle-файла.
+    """
+    mmap = MODEL_MMAP if mmap is None else mmap
+    path = artifact_path(pickle_path)
+    if mmap and os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(pickle_path):
+        return joblib.load(path, mmap_mode='r')
+    with open(pickle_path, 'rb') as pickle_file:
+        return pickle.load(pickle_file)
+
+def convert(pickle_path):
+    """Создаёт артефакт для отображения в память из существующего pickle-файла."""
+    with open(pickle_path, 'rb') as pickle_file:
+        obj = pickle.load(pickle_file)
+    return write_artifact(obj, pickle_path)
+
+def main():
+    from src.ml import registry
+
+    parser = argparse.ArgumentParser(description="Конвертация pickle-файлов модели в артефакты для отображения в память")
+    parser.add_argument("--version", help="Версия модели в реестре (по умолчанию — legacy-файлы и все версии)")
+    args = parser.parse_args()
+
+    if args.version:
+        paths = registry.version_files(args.version)
+    else:
+        paths = [path for path in (MODEL_PATH, VECTORIZER_PATH) if os.path.exists(path)]
+        for meta in registry.list_versions():
+            paths.extend(registry.version_files(meta["version"]))
+
+    for path in paths:
+        print(f"{path} -> {convert(path)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import os
+import queue
+import threading
+import time
+
+# Объединение одновременных запросов /categorize в пачки (micro-batching)
+MICRO_BATCH_ENABLED = os.environ.get("MICRO_BATCH", "0") == "1"
+# Максимальное количество описаний в одной пачке
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", 64))
+# Сколько миллисекунд первый запрос пачки ждёт остальные (0 — только те, что уже в очереди)
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", 2.0))
+# Сколько секунд запрос ждёт результата, после чего получает ошибку
+MICRO_BATCH_TIMEOUT = float(os.environ.get("MICRO_BATCH_TIMEOUT", 30.0))
+
+# Границы корзин гистограмм: размер пачки и время ожидания в очереди (мс)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_DELAY_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+class _Request:
+    __slots__ = ("key", "bundle", "description", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, bundle, description):
+        self.key = id(bundle)
+        self.bundle = bundle
+        self.description = description
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+def _histogram(buckets):
+    return {"buckets": dict.fromkeys(buckets, 0), "inf": 0}
+
+def _observe(histogram, value):
+    for bound in histogram["buckets"]:
+        if value <= bound:
+            histogram["buckets"][bound] += 1
+            return
+    histogram["inf"] += 1
+
+def _cumulative(histogram):
+    """Накопленные счётчики по корзинам, как в гистограммах Prometheus: le_<граница> — значения не больше границы."""
+    result, total = {}, 0
+    for bound, count in histogram["buckets"].items():
+        total += count
+        result[f"le_{bound}"] = total
+    result["le_inf"] = total + histogram["inf"]
+    return result
+
+class PredictionBatcher:
+    """
+    Диспетчер, объединяющий одновременные запросы предсказания в пачки.
+    Запросы ставятся в очередь, фоновый поток забирает всё, что накопилось
+    (не больше max_size), при необходимости ждёт остальные до max_wait_ms с момента
+    постановки первого запроса, выполняет одну векторизацию и одно предсказание
+    на пачку и раздаёт результаты ожидающим запросам.
+    Пока поток занят пачкой, новые запросы копятся в очереди, поэтому размер пачки
+    сам растёт с нагрузкой, а при одиночных запросах задержка не больше max_wait_ms.
+
+    predict_fn(bundle, descriptions) возвращает предсказания в порядке описаний.
+    Запросы к разным версиям модели в одну пачку не попадают.
+    """
+
+    def __init__(self, predict_fn, max_size=MICRO_BATCH_MAX_SIZE, max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+                 timeout=MICRO_BATCH_TIMEOUT):
+        if max_size < 1:
+            raise ValueError("Размер пачки должен быть не меньше 1")
+        self.predict_fn = predict_fn
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._failed = 0
+        self._delay_sum = 0.0
+        self._delay_max = 0.0
+        self._batch_sizes = _histogram(BATCH_SIZE_BUCKETS)
+        self._queue_delays = _histogram(QUEUE_DELAY_BUCKETS_MS)
+
+    def _ensure_started(self):
+        # Поток запускается лениво: после fork в дочернем процессе его нужно создать заново
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop_event.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="prediction-batcher", daemon=True)
+            self._thread.start()
+
+    def predict(self, bundle, description):
+        """Предсказание для одного описания; блокирует вызывающий поток до обработки его пачки."""
+        self._ensure_started()
+        request = _Request(bundle, description)
+        self._queue.put(request)
+        if not request.done.wait(self.timeout):
+            raise TimeoutError("Превышено время ожидания предсказания")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect(self):
+        """Первый запрос ждётся блокирующе, остальные добираются до max_size или до истечения max_wait."""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch(self, batch):
+        started = time.monotonic()
+        groups = {}
+        for request in batch:
+            groups.setdefault(request.key, []).append(request)
+
+        failed = 0
+        for requests in groups.values():
+            try:
+                results = self.predict_fn(requests[0].bundle, [request.description for request in requests])
+                for request, result in zip(requests, results):
+                    request.result = result
+            except Exception as e:
+                failed += len(requests)
+                for request in requests:
+                    request.error = e
+            for request in requests:
+                request.done.set()
+
+        delays = [(started - request.enqueued_at) * 1000 for request in batch]
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._failed += failed
+            _observe(self._batch_sizes, len(batch))
+            for delay in delays:
+                _observe(self._queue_delays, delay)
+            self._delay_sum += sum(delays)
+            self._delay_max = max(self._delay_max, *delays)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if batch:
+                self._dispatch(batch)
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_size": self.max_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "pending": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": self._batches,
+                "failed": self._failed,
+                "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else None,
+                "batch_size_histogram": _cumulative(self._batch_sizes),
+                "queue_delay_ms": {
+                    "avg": round(self._delay_sum / self._requests, 3) if self._requests else None,
+                    "max": round(self._delay_max, 3),
+                    "histogram": _cumulative(self._queue_delays)
+                }
+            }
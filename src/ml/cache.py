@@ -0,0 +1,107 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Максимальное количество закэшированных предсказаний (0 — кэш выключен)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+# Время жизни записи в секундах (0 — без ограничения)
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+
+def normalize_description(description, vectorizer=None):
+    """
+    Приводит описание к виду, который не меняет результат векторизации.
+    Для стандартного словного анализатора TfidfVectorizer регистр (при lowercase=True)
+    и количество пробельных символов между словами не влияют на признаки.
+    Для нестандартных анализаторов описание используется как есть.
+    """
+    if vectorizer is not None and (
+        getattr(vectorizer, "analyzer", "word") != "word"
+        or getattr(vectorizer, "tokenizer", None) is not None
+        or getattr(vectorizer, "preprocessor", None) is not None
+    ):
+        return description
+    normalized = " ".join(description.split())
+    if vectorizer is None or getattr(vectorizer, "lowercase", True):
+        normalized = normalized.lower()
+    return normalized
+
+def description_key(description, vectorizer=None):
+    """Ключ кэша — 16-байтный хэш нормализованного описания, сам текст в кэше не хранится."""
+    normalized = normalize_description(description, vectorizer)
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+class PredictionCache:
+    """
+    LRU-кэш предсказаний с ограничением по времени жизни записей.
+    Размер ограничен max_size записями: ключ 16 байт и ссылка на интернированную строку категории.
+    clear() увеличивает номер поколения, и предсказания, посчитанные старой моделью,
+    в кэш уже не попадут.
+    """
+
+    def __init__(self, max_size=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # ключ -> (момент устаревания, предсказание)
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (expires_at, sys.intern(str(value)))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "generation": self._generation,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
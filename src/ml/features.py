@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Каталог кэша признаков: каждая запись — отдельная папка с именем-ключом
+FEATURE_CACHE_DIR = os.environ.get("FEATURE_CACHE_DIR", os.path.join('models', 'features'))
+# Максимальный суммарный размер кэша в байтах (0 — кэш выключен)
+FEATURE_CACHE_MAX_BYTES = int(os.environ.get("FEATURE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+CORPUS_FILE = 'corpus.pkl'
+VECTORIZER_FILE = 'vectorizer.pkl'
+VOCABULARY_FILE = 'vocabulary.json'
+X_TRAIN_FILE = 'X_train.npz'
+X_TEST_FILE = 'X_test.npz'
+LABELS_FILE = 'labels.npz'
+
+def feature_key(data_fingerprint, params):
+    """Ключ записи — хэш содержимого датасета и всех параметров, влияющих на признаки."""
+    payload = json.dumps({"data": data_fingerprint, "params": params}, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def _dir_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+class FeatureCache:
+    """
+    Кэш векторизованных выборок на диске: очищенный корпус, обученный векторизатор
+    (со словарём) и разреженные матрицы обучающей и тестовой выборки в формате npz.
+    Записи публикуются атомарным переименованием временной папки.
+    Суммарный размер ограничен max_bytes: при превышении удаляются записи,
+    к которым дольше всего не обращались (время обращения — mtime папки).
+    """
+
+    def __init__(self, cache_dir=FEATURE_CACHE_DIR, max_bytes=FEATURE_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """Возвращает (корпус, векторизатор, X_train, y_train, X_test, y_test) или None."""
+        if not self.enabled:
+            return None
+        path = self._entry_dir(key)
+        try:
+            with open(os.path.join(path, CORPUS_FILE), 'rb') as corpus_file:
+                data = pickle.load(corpus_file)
+            with open(os.path.join(path, VECTORIZER_FILE), 'rb') as vectorizer_file:
+                vectorizer = pickle.load(vectorizer_file)
+            X_train = sparse.load_npz(os.path.join(path, X_TRAIN_FILE))
+            X_test = sparse.load_npz(os.path.join(path, X_TEST_FILE))
+            with np.load(os.path.join(path, LABELS_FILE), allow_pickle=False) as labels:
+                y_train = pd.Series(labels['y_train'], name='Type')
+                y_test = pd.Series(labels['y_test'], name='Type')
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            # Записи нет, или её удалили во время чтения
+            with self._lock:
+                self._misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._hits += 1
+        return data, vectorizer, X_train, y_train, X_test, y_test
+
+    def put(self, key, data, vectorizer, X_train, y_train, X_test, y_test):
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = os.path.join(self.cache_dir, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(tmp_dir)
+        try:
+            with open(os.path.join(tmp_dir, CORPUS_FILE), 'wb') as corpus_file:
+                pickle.dump(data, corpus_file)
+            with open(os.path.join(tmp_dir, VECTORIZER_FILE), 'wb') as vectorizer_file:
+                pickle.dump(vectorizer, vectorizer_file)
+            with open(os.path.join(tmp_dir, VOCABULARY_FILE), 'w', encoding='utf-8') as vocabulary_file:
+                json.dump({term: int(index) for term, index in vectorizer.vocabulary_.items()}, vocabulary_file)
+            sparse.save_npz(os.path.join(tmp_dir, X_TRAIN_FILE), sparse.csr_matrix(X_train))
+            sparse.save_npz(os.path.join(tmp_dir, X_TEST_FILE), sparse.csr_matrix(X_test))
+            np.savez(
+                os.path.join(tmp_dir, LABELS_FILE),
+                y_train=np.asarray(y_train, dtype=str),
+                y_test=np.asarray(y_test, dtype=str)
+            )
+            if _dir_size(tmp_dir) > self.max_bytes:
+                # Запись больше всего кэша — хранить её нет смысла
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return
+            try:
+                os.rename(tmp_dir, self._entry_dir(key))
+            except OSError:
+                # Ту же запись уже опубликовал другой процесс
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self.evict()
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith('.') or not entry.is_dir():
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path, _dir_size(entry.path)))
+            except OSError:
+                continue
+        return sorted(entries)
+
+    def evict(self):
+        """Удаляет самые давно использованные записи, пока размер кэша превышает max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            with self._lock:
+                self._evictions += 1
+
+    def clear(self):
+        for _, path, _ in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {
+                "entries": len(entries),
+                "size_bytes": sum(size for _, _, size in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions
+            }
@@ -0,0 +1,153 @@
+import math
+import os
+import re
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, Perceptron, RidgeClassifier, SGDClassifier
+from sklearn.svm import SVC, LinearSVC
+
+# Быстрые пути векторизации и предсказания (0 — всегда vectorizer.transform и model.predict)
+FAST_INFERENCE = os.environ.get("FAST_INFERENCE", "1") == "1"
+
+# Модели, предсказание которых — argmax линейных оценок классов
+LINEAR_MODELS = (LogisticRegression, SGDClassifier, LinearSVC, RidgeClassifier, Perceptron)
+
+class LinearPredictor:
+    """
+    Предсказание линейной модели без проверок входных данных sklearn: оценки классов —
+    разреженное произведение строк CSR на матрицу коэффициентов плюс свободные члены.
+    Интерфейс совпадает с model.predict для матриц, полученных от векторизатора модели.
+
+    Для одной строки коэффициенты выбираются только по её ненулевым признакам,
+    поэтому стоимость предсказания зависит от длины описания, а не от размера словаря.
+    """
+
+    def __init__(self, classes, coef, intercept, ovo=False):
+        self.classes_ = np.asarray(classes)
+        # Матрица (классы или пары классов) x признаки; массивы из артефактов joblib не копируются
+        self.coef = coef
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.ovo = ovo
+        self.n_features = coef.shape[1]
+        if ovo:
+            n_classes = len(self.classes_)
+            self._pairs = np.array([(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)])
+
+    def decision_function(self, X):
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Матрица признаков содержит {X.shape[1]} признаков, модель ожидает {self.n_features}")
+        if X.shape[0] == 1:
+            X = sparse.csr_matrix(X)
+            scores = (self.coef[:, X.indices] @ X.data)[np.newaxis, :]
+        else:
+            scores = np.asarray(X @ self.coef.T)
+        return scores + self.intercept
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if self.ovo:
+            # Голосование один-против-одного, как в libsvm: при равенстве голосов побеждает первый класс
+            wins = scores > 0
+            votes = np.zeros((scores.shape[0], len(self.classes_)), dtype=np.int64)
+            for k, (i, j) in enumerate(self._pairs):
+                votes[:, i] += wins[:, k]
+                votes[:, j] += ~wins[:, k]
+            return self.classes_[votes.argmax(axis=1)]
+        if scores.shape[1] == 1:
+            return self.classes_[(scores[:, 0] > 0).astype(np.int64)]
+        return self.classes_[scores.argmax(axis=1)]
+
+def compile_predictor(model):
+    """
+    Быстрый путь для линейной модели: LINEAR_MODELS и SVC с линейным ядром.
+    Для остальных моделей (и при FAST_INFERENCE=0) — None, предсказание выполняет sklearn.
+    """
+    if not FAST_INFERENCE:
+        return None
+    if isinstance(model, LINEAR_MODELS) and hasattr(model, "coef_"):
+        return LinearPredictor(model.classes_, np.asarray(model.coef_), model.intercept_)
+    if isinstance(model, SVC) and model.kernel == 'linear' and hasattr(model, "support_") and not model.break_ties:
+        coef = model.coef_
+        coef = coef.toarray() if sparse.issparse(coef) else np.asarray(coef)
+        # Для двух классов у SVC одна решающая функция с тем же смыслом знака, что у линейных моделей
+        return LinearPredictor(model.classes_, coef, model.intercept_, ovo=len(model.classes_) > 2)
+    return None
+
+class CompiledFeaturizer:
+    """
+    Векторизация коротких описаний без общего механизма TfidfVectorizer.transform.
+    Всё, что не зависит от текста, подготовлено заранее: скомпилированное регулярное
+    выражение токенов, множество стоп-слов, словарь в виде отсортированного массива
+    терминов с номерами признаков (поиск — np.searchsorted сразу по всем n-граммам)
+    и веса IDF. Результат побитово совпадает с vectorizer.transform.
+    """
+
+    def __init__(self, vectorizer):
+        self.preprocess = vectorizer.build_preprocessor()
+        self.token_pattern = re.compile(vectorizer.token_pattern)
+        self.stop_words = vectorizer.get_stop_words() or frozenset()
+        self.min_n, self.max_n = vectorizer.ngram_range
+        terms = sorted(vectorizer.vocabulary_)
+        self.terms = np.array(terms, dtype=str)
+        self.term_features = np.array([vectorizer.vocabulary_[term] for term in terms], dtype=np.int32)
+        self.n_features = len(terms)
+        self.binary = vectorizer.binary
+        self.sublinear_tf = vectorizer.sublinear_tf
+        self.idf = np.asarray(vectorizer.idf_, dtype=np.float64) if vectorizer.use_idf else None
+        self.norm = vectorizer.norm
+
+    def _ngrams(self, document):
+        tokens = [token for token in self.token_pattern.findall(self.preprocess(document)) if token not in self.stop_words]
+        ngrams = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n, len(tokens)) + 1):
+            ngrams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return ngrams
+
+    def _row(self, document):
+        """Индексы (по возрастанию) и значения признаков одного описания."""
+        ngrams = self._ngrams(document)
+        if not ngrams or not self.n_features:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        ngrams = np.array(ngrams, dtype=str)
+        positions = np.minimum(np.searchsorted(self.terms, ngrams), self.n_features - 1)
+        found = self.terms[positions] == ngrams
+        indices, counts = np.unique(self.term_features[positions[found]], return_counts=True)
+        data = np.ones(len(indices)) if self.binary else counts.astype(np.float64)
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1.0
+        if self.idf is not None:
+            data *= self.idf[indices]
+        if self.norm is not None:
+            # Последовательное суммирование, как в sklearn.preprocessing.normalize
+            total = 0.0
+            for value in data.tolist():
+                total += value * value if self.norm == 'l2' else abs(value)
+            if total != 0.0:
+                data /= math.sqrt(total) if self.norm == 'l2' else total
+        return indices.astype(np.int32), data
+
+    def transform(self, documents):
+        rows = [self._row(document) for document in documents]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum([len(indices) for indices, _ in rows], out=indptr[1:])
+        indices = np.concatenate([indices for indices, _ in rows]) if rows else np.empty(0, dtype=np.int32)
+        data = np.concatenate([data for _, data in rows]) if rows else np.empty(0, dtype=np.float64)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), self.n_features))
+
+def compile_featurizer(vectorizer):
+    """
+    Быстрая векторизация для TfidfVectorizer со стандартным словным анализатором.
+    Для остальных векторизаторов (и при FAST_INFERENCE=0) — None, используется transform.
+    """
+    if not FAST_INFERENCE or type(vectorizer) is not TfidfVectorizer or not hasattr(vectorizer, "vocabulary_"):
+        return None
+    if (
+        vectorizer.analyzer != 'word' or vectorizer.tokenizer is not None
+        or vectorizer.preprocessor is not None or vectorizer.input != 'content'
+        or vectorizer.norm not in (None, 'l1', 'l2') or np.dtype(vectorizer.dtype) != np.float64
+    ):
+        return None
+    return CompiledFeaturizer(vectorizer)
@@ -0,0 +1,299 @@
+import fcntl
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+# Состояние задач обучения хранится в файлах, чтобы его видели все процессы сервиса
+JOBS_DIR = os.path.join('models', 'jobs')
+LOCK_FILE = '.lock'
+# Процесс обучения обновляет heartbeat_at не реже этого интервала (секунды)
+HEARTBEAT_INTERVAL = 5
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+# full — полное обучение с подбором гиперпараметров, online — дообучение онлайн-модели
+TRAINING_MODES = ('full', 'online')
+# Стратегии подбора гиперпараметров полного обучения (src.ml.training)
+SEARCH_STRATEGIES = ("grid", "halving")
+
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+class JobNotFoundError(Exception):
+    """Задача обучения не найдена."""
+
+class JobCancelled(BaseException):
+    """SIGTERM в процессе обучения до активации модели (BaseException: не перехватывается как ошибка обучения)."""
+
+class JobAlreadyRunningError(Exception):
+    """Уже выполняется другая задача обучения."""
+
+    def __init__(self, job_id):
+        super().__init__(f"Уже выполняется задача обучения {job_id}")
+        self.job_id = job_id
+
+def _now():
+    return time.time()
+
+def _job_path(job_id, jobs_dir=JOBS_DIR):
+    if not _JOB_ID_RE.match(job_id or ''):
+        raise JobNotFoundError(f"Задача {job_id} не найдена")
+    return os.path.join(jobs_dir, f'{job_id}.json')
+
+def _cancel_marker(job_id, jobs_dir=JOBS_DIR):
+    return os.path.join(jobs_dir, f'{job_id}.cancel')
+
+def read_job(job_id, jobs_dir=JOBS_DIR):
+    path = _job_path(job_id, jobs_dir)
+    try:
+        with open(path, 'r', encoding='utf-8') as job_file:
+            job = json.load(job_file)
+    except FileNotFoundError:
+        raise JobNotFoundError(f"Задача {job_id} не найдена")
+    if job["status"] not in FINISHED_STATUSES and os.path.exists(_cancel_marker(job_id, jobs_dir)):
+        job["status"] = "cancelling"
+    return job
+
+def write_job(job, jobs_dir=JOBS_DIR):
+    """Записывает состояние задачи атомарно: читатели видят либо старую, либо новую версию файла."""
+    path = _job_path(job["id"], jobs_dir)
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as job_file:
+        json.dump(job, job_file, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+def list_jobs(jobs_dir=JOBS_DIR):
+    if not os.path.isdir(jobs_dir):
+        return []
+    jobs = []
+    for name in os.listdir(jobs_dir):
+        if name.endswith('.json'):
+            try:
+                jobs.append(read_job(name[:-len('.json')], jobs_dir))
+            except (JobNotFoundError, ValueError):
+                continue
+    return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+class TrainingJobManager:
+    """
+    Запускает обучение в отдельном процессе (python -m src.ml.jobs <id>), чтобы оно не занимало
+    процессор и GIL обслуживающего процесса. Одновременно может выполняться только одна задача:
+    это гарантирует блокировка flock на lock-файле в каталоге задач. Открытый lock-файл
+    наследует процесс обучения, поэтому блокировка держится, пока он работает, и снимается
+    системой при его завершении — брошенных блокировок не бывает. Зависшую задачу нужно
+    отменить (cancel).
+    Обученную версию активирует сам процесс обучения (registry.set_current_version), поэтому
+    она становится активной, даже если запустивший задачу рабочий процесс уже перезапущен;
+    остальные процессы подхватывают её через ModelWatcher. on_success(job) вызывается
+    в запустившем задачу процессе после успешного завершения (загрузить версию сразу),
+    on_finish(job) — после завершения любой задачи с её итоговым состоянием.
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR, on_success=None, on_finish=None):
+        self.jobs_dir = jobs_dir
+        self.on_success = on_success
+        self.on_finish = on_finish
+        self._processes = {}
+        self._monitors = {}
+
+    def _lock_path(self):
+        return os.path.join(self.jobs_dir, LOCK_FILE)
+
+    def _acquire_lock(self, job_id):
+        """
+        Захватывает блокировку и записывает в lock-файл id задачи. Возвращает открытый
+        lock-файл: блокировка держится, пока открыт он или его копия в процессе обучения.
+        """
+        lock_file = open(self._lock_path(), 'a+', encoding='utf-8')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.seek(0)
+            holder = lock_file.read().strip()
+            lock_file.close()
+            raise JobAlreadyRunningError(holder or "unknown")
+        lock_file.truncate(0)
+        lock_file.write(job_id)
+        lock_file.flush()
+        return lock_file
+
+    def start(self, params):
+        """Создаёт задачу и запускает процесс обучения. Возвращает состояние задачи."""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "params": params,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "heartbeat_at": None,
+            "pid": None,
+            "progress": {"stage": "queued", "percent": 0, "message": "Задача поставлена в очередь"},
+            "report": None,
+            "error": None
+        }
+        # Файл задачи записывается до блокировки: держатель блокировки всегда можно прочитать
+        write_job(job, self.jobs_dir)
+        try:
+            lock_file = self._acquire_lock(job_id)
+        except JobAlreadyRunningError:
+            os.remove(_job_path(job_id, self.jobs_dir))
+            raise
+        try:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'src.ml.jobs', job_id, self.jobs_dir],
+                cwd=os.getcwd(), pass_fds=(lock_file.fileno(),)
+            )
+        except Exception as e:
+            job.update(status="failed", error=f"Не удалось запустить процесс обучения: {str(e)}", finished_at=_now())
+            write_job(job, self.jobs_dir)
+            raise
+        finally:
+            # Дальше блокировку держит только процесс обучения
+            lock_file.close()
+
+        self._processes[job_id] = process
+        monitor = threading.Thread(target=self._monitor, args=(job_id, process), daemon=True)
+        self._monitors[job_id] = monitor
+        monitor.start()
+        return job
+
+    def _monitor(self, job_id, process):
+        process.wait()
+        try:
+            job = read_job(job_id, self.jobs_dir)
+            marker = _cancel_marker(job_id, self.jobs_dir)
+            # Итоговое состояние, записанное процессом обучения, главнее маркера отмены:
+            # отмена могла прийти, когда модель уже была активирована
+            if job["status"] in FINISHED_STATUSES:
+                if job["status"] == "succeeded" and job.get("version") and self.on_success is not None:
+                    try:
+                        self.on_success(job)
+                    except Exception as e:
+                        # Версия уже активирована процессом обучения, её загрузит ModelWatcher
+                        print(f"Ошибка загрузки версии {job.get('version')} после обучения:", e)
+            elif os.path.exists(marker):
+                job.update(status="cancelled", error="Обучение отменено")
+            else:
+                job.update(status="failed", error=f"Процесс обучения завершился с кодом {process.returncode}")
+            try:
+                os.remove(marker)
+            except FileNotFoundError:
+                pass
+            job["finished_at"] = job.get("finished_at") or _now()
+            write_job(job, self.jobs_dir)
+            if self.on_finish is not None:
+                self.on_finish(job)
+        finally:
+            self._processes.pop(job_id, None)
+
+    def wait(self, job_id, timeout=None):
+        """Ждёт завершения задачи, запущенной этим процессом, и возвращает её состояние."""
+        monitor = self._monitors.get(job_id)
+        if monitor is not None:
+            monitor.join(timeout)
+            if not monitor.is_alive():
+                self._monitors.pop(job_id, None)
+        return read_job(job_id, self.jobs_dir)
+
+    def get(self, job_id):
+        return read_job(job_id, self.jobs_dir)
+
+    def list(self):
+        return list_jobs(self.jobs_dir)
+
+    def cancel(self, job_id):
+        """Отменяет задачу. Возвращает False, если задача уже завершена."""
+        job = read_job(job_id, self.jobs_dir)
+        if job["status"] in FINISHED_STATUSES:
+            return False
+
+        with open(_cancel_marker(job_id, self.jobs_dir), 'w', encoding='utf-8'):
+            pass
+        process = self._processes.get(job_id)
+        if process is not None:
+            process.terminate()
+        elif job.get("pid"):
+            # Задачу запустил другой процесс сервиса
+            try:
+                os.kill(job["pid"], signal.SIGTERM)
+            except OSError:
+                pass
+        return True
+
+def run_job(job_id, jobs_dir=JOBS_DIR):
+    """Точка входа процесса обучения: выполняет задачу и записывает её состояние и отчёт."""
+    from src.ml import registry
+    from src.ml.training import TrainingError, run_training
+    from src.profiling import install_signal_handler
+
+    # kill -USR2 <pid задачи> профилирует обучение (src.profiling)
+    install_signal_handler()
+
+    job = read_job(job_id, jobs_dir)
+    params = dict(job["params"])
+    if params.pop("mode", "full") == "online":
+        from src.ml.online import run_online_training as train
+    else:
+        train = run_training
+    lock = threading.Lock()
+    stop_heartbeat = threading.Event()
+
+    def update(**fields):
+        with lock:
+            job.update(fields)
+            job["heartbeat_at"] = _now()
+            write_job(job, jobs_dir)
+
+    def heartbeat():
+        while not stop_heartbeat.wait(HEARTBEAT_INTERVAL):
+            update()
+
+    def progress(stage, percent, message):
+        update(progress={"stage": stage, "percent": percent, "message": message})
+
+    def terminate(signum, frame):
+        raise JobCancelled()
+
+    # Отмена (TrainingJobManager.cancel) прерывает обучение, но не активацию
+    previous_handler = signal.signal(signal.SIGTERM, terminate)
+    update(status="running", started_at=_now(), pid=os.getpid())
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        report = train(progress=progress, **params)
+        # Активация — последний шаг задачи: её результат не зависит от процесса, запустившего обучение.
+        # С этого момента SIGTERM игнорируется, чтобы активация и итоговое состояние не разошлись
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        # Дообучение без новых строк (changed=False) новой версии не создаёт, активировать нечего
+        version = report["version"] if report.get("changed", True) else None
+        if version is not None:
+            try:
+                registry.set_current_version(version)
+            except Exception as e:
+                raise TrainingError(f"Ошибка активации обученной модели: {str(e)}", 500)
+        update(
+            status="succeeded",
+            report=report,
+            version=version,
+            finished_at=_now(),
+            progress={"stage": "done", "percent": 100, "message": report["message"]}
+        )
+    except JobCancelled:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        update(status="cancelled", error="Обучение отменено", finished_at=_now())
+    except TrainingError as e:
+        update(status="failed", error=str(e), error_status=e.status_code, finished_at=_now())
+    except Exception as e:
+        update(status="failed", error=f"Ошибка обучения модели: {str(e)}", error_status=500, finished_at=_now())
+    finally:
+        stop_heartbeat.set()
+        signal.signal(signal.SIGTERM, previous_handler)
+
+if __name__ == '__main__':
+    run_job(sys.argv[1], *sys.argv[2:3])
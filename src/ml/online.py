@@ -0,0 +1,190 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from src.config import DATA_PATH
+from src.data.dataset import get_dataset
+from src.db.database import db_connection
+from src.ml import registry
+from src.ml.training import CLEAN_PATTERN, RANDOM_STATE, REQUIRED_COLUMNS, _notify, load_dataset
+
+# Размерность пространства признаков HashingVectorizer
+ONLINE_N_FEATURES = int(os.environ.get("ONLINE_N_FEATURES", 2 ** 18))
+# Сколько строк передаётся в partial_fit за один вызов
+ONLINE_BATCH_SIZE = int(os.environ.get("ONLINE_BATCH_SIZE", 2000))
+# Количество проходов по данным при полной пересборке онлайн-модели
+ONLINE_REBUILD_EPOCHS = int(os.environ.get("ONLINE_REBUILD_EPOCHS", 5))
+
+# Значение поля kind в метаданных версии онлайн-модели
+ONLINE_KIND = 'online'
+
+def build_featurizer():
+    """
+    Векторизатор без состояния: признаки не зависят от данных, поэтому его не нужно
+    переобучать при появлении новых слов, а новые строки можно дообучать сразу.
+    """
+    return HashingVectorizer(
+        n_features=ONLINE_N_FEATURES, stop_words='english', ngram_range=(1, 2),
+        alternate_sign=False, norm='l2'
+    )
+
+def build_estimator():
+    return SGDClassifier(loss='log_loss', alpha=1e-5, random_state=RANDOM_STATE)
+
+def clean_descriptions(descriptions):
+    return descriptions.str.lower().str.replace(CLEAN_PATTERN, '', regex=True)
+
+def find_base_version():
+    """Версия онлайн-модели для дообучения: активная, если она онлайн, иначе самая новая онлайн-версия."""
+    current = registry.get_current_version()
+    if current and current != registry.LEGACY_VERSION and registry.version_exists(current):
+        if registry.read_meta(current).get("kind") == ONLINE_KIND:
+            return current
+    online_versions = [meta["version"] for meta in registry.list_versions() if meta.get("kind") == ONLINE_KIND]
+    return online_versions[-1] if online_versions else None
+
+def fetch_types():
+    """Все категории, встречающиеся в ticket_predictions."""
+    with db_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT predicted_type FROM ticket_predictions")
+            return {row[0] for row in cursor.fetchall()}
+
+def iter_new_rows(watermark, batch_size=ONLINE_BATCH_SIZE):
+    """
+    Строки ticket_predictions с id больше watermark пачками по batch_size.
+    Пагинация по первичному ключу: каждая пачка — короткий индексный запрос.
+    """
+    while True:
+        with db_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT id, ticket_id, description, predicted_type FROM ticket_predictions "
+                    "WHERE id > %s ORDER BY id LIMIT %s",
+                    (watermark, batch_size)
+                )
+                rows = cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        watermark = rows[-1][0]
+
+def _read_dataset(data_path):
+    data = load_dataset(get_dataset(data_path))
+    data = data.dropna(subset=REQUIRED_COLUMNS)
+    data['Description'] = clean_descriptions(data['Description'].astype(str))
+    return data
+
+def _fit_batch(model, vectorizer, descriptions, labels, classes, stats):
+    """Сначала оценивает пачку текущей моделью (prequential-оценка), затем дообучает на ней."""
+    X = vectorizer.transform(descriptions)
+    if hasattr(model, "coef_"):
+        stats["evaluated"] += len(labels)
+        stats["correct"] += int(np.sum(model.predict(X) == np.asarray(labels)))
+    model.partial_fit(X, labels, classes=classes)
+    stats["rows"] += len(labels)
+
+def run_online_training(rebuild=False, data_path=DATA_PATH, progress=None):
+    """
+    Дообучение онлайн-модели (HashingVectorizer + SGDClassifier.partial_fit) на строках
+    ticket_predictions, добавленных после водяного знака предыдущей версии.
+    rebuild=True (или отсутствие онлайн-версии) — полная пересборка по tickets.csv и всей таблице.
+    Результат сохраняется новой версией в реестре с водяным знаком в метаданных; активирует её
+    задача обучения (src.ml.jobs). Если модель и водяной знак не изменились, новая версия
+    не сохраняется: в отчёте changed=False и version — базовая версия.
+    Возвращает отчёт об обучении.
+    """
+    started = time.time()
+    vectorizer = build_featurizer()
+    stats = {"rows": 0, "evaluated": 0, "correct": 0, "skipped_unknown_type": 0}
+
+    base_version = None if rebuild else find_base_version()
+    if base_version is None:
+        rebuild = True
+        _notify(progress, "load", 5, "Загрузка данных для пересборки онлайн-модели")
+        data = _read_dataset(data_path)
+        classes = np.array(sorted(set(data['Type'].astype(str)) | fetch_types()))
+        known_ids = set(data['id'].astype(str)) if 'id' in data.columns else set()
+        model = build_estimator()
+        watermark = base_watermark = 0
+
+        rng = np.random.RandomState(RANDOM_STATE)
+        descriptions = data['Description'].to_numpy()
+        labels = data['Type'].astype(str).to_numpy()
+        for epoch in range(ONLINE_REBUILD_EPOCHS):
+            _notify(progress, "fit", 10 + 60 * epoch // ONLINE_REBUILD_EPOCHS,
+                    f"Обучение на tickets.csv: проход {epoch + 1} из {ONLINE_REBUILD_EPOCHS}")
+            order = rng.permutation(len(labels))
+            for start in range(0, len(order), ONLINE_BATCH_SIZE):
+                batch = order[start:start + ONLINE_BATCH_SIZE]
+                # Prequential-точность считается только на первом проходе
+                batch_stats = stats if epoch == 0 else dict(stats)
+                _fit_batch(model, vectorizer, descriptions[batch], labels[batch], classes, batch_stats)
+        stats["rows"] = len(labels)
+    else:
+        _notify(progress, "load", 5, f"Загрузка онлайн-модели {base_version}")
+        model, _ = registry.load_version(base_version, mmap=False)
+        watermark = base_watermark = registry.read_meta(base_version).get("watermark", 0)
+        classes = model.classes_
+        known_ids = set()
+
+    # Новые строки из базы данных после водяного знака
+    _notify(progress, "fit", 75, f"Дообучение на строках ticket_predictions с id > {watermark}")
+    known_classes = set(classes)
+    for rows in iter_new_rows(watermark):
+        watermark = rows[-1][0]
+        batch = [
+            (description, predicted_type) for _, ticket_id, description, predicted_type in rows
+            if str(ticket_id) not in known_ids
+        ]
+        usable = [(description, label) for description, label in batch if label in known_classes]
+        # partial_fit не умеет добавлять классы: строки с новой категорией требуют полной пересборки
+        stats["skipped_unknown_type"] += len(batch) - len(usable)
+        if usable:
+            descriptions = clean_descriptions(pd.Series([description for description, _ in usable]))
+            _fit_batch(model, vectorizer, descriptions, [label for _, label in usable], classes, stats)
+
+    accuracy = stats["correct"] / stats["evaluated"] if stats["evaluated"] else None
+
+    # Водяной знак хранится в метаданных версии: если все новые строки пропущены, модель
+    # не изменилась, но версия всё равно сохраняется, чтобы эти строки не перечитывались снова
+    changed = bool(rebuild or stats["rows"] or watermark != base_watermark)
+    if changed:
+        _notify(progress, "save", 95, "Сохранение модели")
+        version = registry.save_version(model, vectorizer, meta={
+            "source": "online",
+            "kind": ONLINE_KIND,
+            "model_name": "SGD (online)",
+            "base_version": base_version,
+            "watermark": watermark,
+            "accuracy": round(accuracy, 4) if accuracy is not None else None
+        })
+    else:
+        # Новых строк нет: новая версия не нужна, остаётся базовая. Активировать её нельзя —
+        # текущей может быть более новая полная модель
+        version = base_version
+    model_path, vectorizer_path = registry.version_files(version)
+
+    if rebuild:
+        message = f"Пересборка онлайн-модели завершена. Обработано строк: {stats['rows']}"
+    else:
+        message = f"Дообучение онлайн-модели завершено. Обработано строк: {stats['rows']}"
+    return {
+        "message": message,
+        "best_model": "SGD (online)",
+        "accuracy": round(accuracy, 4) if accuracy is not None else None,
+        "rebuild": rebuild,
+        "base_version": base_version,
+        "watermark": watermark,
+        "rows": stats["rows"],
+        "skipped_unknown_type": stats["skipped_unknown_type"],
+        "version": version,
+        "changed": changed,
+        "model_path": model_path,
+        "vectorizer_path": vectorizer_path,
+        "seconds": round(time.time() - started, 2)
+    }
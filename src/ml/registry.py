@@ -0,0 +1,175 @@
+import json
+import os
+import pickle
+import re
+import shutil
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from src.ml import artifacts
+
+# Каталог с версиями модели: каждая версия — отдельная неизменяемая папка
+REGISTRY_DIR = os.path.join('models', 'versions')
+# Файл-указатель на активную версию
+CURRENT_VERSION_PATH = os.path.join('models', 'CURRENT')
+
+MODEL_FILE = 'model.pkl'
+VECTORIZER_FILE = 'vectorizer.pkl'
+META_FILE = 'meta.json'
+
+# Псевдоверсия для файлов models/ticket_classifier.pkl и models/tfidf_vectorizer.pkl
+LEGACY_VERSION = 'legacy'
+
+_VERSION_RE = re.compile(r'^[0-9A-Za-z][0-9A-Za-z._-]*$')
+
+class VersionNotFoundError(Exception):
+    """Запрошенной версии модели нет в реестре."""
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """
+    Неизменяемая связка модели и векторизатора одной версии.
+    Сервис заменяет её целиком одним присваиванием, поэтому запрос
+    никогда не увидит модель одной версии с векторизатором другой.
+    featurizer и predictor — быстрые пути векторизации и предсказания (src.ml.inference) или None.
+    """
+    model: object
+    vectorizer: object
+    version: str
+    loaded_at: float = field(default_factory=time.time)
+    predictor: object = None
+    featurizer: object = None
+
+    @property
+    def transformer(self):
+        """Объект с методом transform: быстрый путь, если он есть, иначе сам векторизатор."""
+        return self.featurizer if self.featurizer is not None else self.vectorizer
+
+    @property
+    def classifier(self):
+        """Объект с методом predict: быстрый путь, если он есть, иначе сама модель."""
+        return self.predictor if self.predictor is not None else self.model
+
+def new_version_id():
+    """Идентификатор с микросекундами: сортировка по имени совпадает с порядком создания версий."""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:4]}"
+
+def version_dir(version):
+    if not _VERSION_RE.match(version or ''):
+        raise VersionNotFoundError(f"Некорректный идентификатор версии: {version}")
+    return os.path.join(REGISTRY_DIR, version)
+
+def version_exists(version):
+    try:
+        return os.path.isdir(version_dir(version))
+    except VersionNotFoundError:
+        return False
+
+def _load_files(path, mmap=None):
+    """Модель и векторизатор версии; массивы отображаются в память, если есть артефакты joblib."""
+    model = artifacts.load_artifact(os.path.join(path, MODEL_FILE), mmap=mmap)
+    vectorizer = artifacts.load_artifact(os.path.join(path, VECTORIZER_FILE), mmap=mmap)
+    return model, vectorizer
+
+def _publish(write_files, meta):
+    """
+    Создаёт новую версию: файлы пишутся во временную папку, которая затем
+    атомарно переименовывается. Недописанная версия никогда не видна читателям.
+    Каждый pickle-файл проверяется загрузкой и дополняется артефактом для отображения в память.
+    """
+    version = new_version_id()
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    tmp_dir = os.path.join(REGISTRY_DIR, f'.tmp-{version}')
+    os.makedirs(tmp_dir)
+    try:
+        write_files(tmp_dir)
+        for name in (MODEL_FILE, VECTORIZER_FILE):
+            artifacts.convert(os.path.join(tmp_dir, name))
+        meta = dict(meta or {}, version=version, created_at=datetime.now().isoformat(timespec='seconds'))
+        with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as meta_file:
+            json.dump(meta, meta_file, ensure_ascii=False, indent=2)
+        os.rename(tmp_dir, version_dir(version))
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return version
+
+def save_version(model, vectorizer, meta=None):
+    """Сохраняет обученные модель и векторизатор как новую версию и возвращает её идентификатор."""
+    def write_files(path):
+        with open(os.path.join(path, MODEL_FILE), 'wb') as model_file:
+            pickle.dump(model, model_file)
+        with open(os.path.join(path, VECTORIZER_FILE), 'wb') as vectorizer_file:
+            pickle.dump(vectorizer, vectorizer_file)
+
+    return _publish(write_files, meta)
+
+def import_files(model_file, vectorizer_file, meta=None):
+    """
+    Сохраняет загруженные файлы (werkzeug FileStorage) как новую версию.
+    Перед публикацией файлы проверяются загрузкой, битые файлы в реестр не попадают.
+    """
+    def write_files(path):
+        model_file.save(os.path.join(path, MODEL_FILE))
+        vectorizer_file.save(os.path.join(path, VECTORIZER_FILE))
+
+    return _publish(write_files, meta)
+
+def load_version(version, mmap=None):
+    """
+    Загружает модель и векторизатор версии. mmap=False — обычная загрузка в память процесса:
+    массивы, отображённые в память, доступны только для чтения и не подходят для дообучения.
+    """
+    path = version_dir(version)
+    if not os.path.isdir(path):
+        raise VersionNotFoundError(f"Версия {version} не найдена")
+    return _load_files(path, mmap=mmap)
+
+def read_meta(version):
+    """Метаданные версии (meta.json); для версий без метаданных — только идентификатор."""
+    path = version_dir(version)
+    if not os.path.isdir(path):
+        raise VersionNotFoundError(f"Версия {version} не найдена")
+    meta = {"version": version}
+    meta_path = os.path.join(path, META_FILE)
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as meta_file:
+            meta.update(json.load(meta_file))
+    return meta
+
+def version_files(version):
+    """Пути к файлам модели и векторизатора версии."""
+    path = version_dir(version)
+    return os.path.join(path, MODEL_FILE), os.path.join(path, VECTORIZER_FILE)
+
+def get_current_version():
+    if not os.path.exists(CURRENT_VERSION_PATH):
+        return None
+    with open(CURRENT_VERSION_PATH, 'r', encoding='utf-8') as pointer_file:
+        return pointer_file.read().strip() or None
+
+def set_current_version(version):
+    """Атомарно переключает указатель на активную версию. None — вернуться к legacy-файлам."""
+    if version is None or version == LEGACY_VERSION:
+        if os.path.exists(CURRENT_VERSION_PATH):
+            os.remove(CURRENT_VERSION_PATH)
+        return
+    if not version_exists(version):
+        raise VersionNotFoundError(f"Версия {version} не найдена")
+    tmp_path = f'{CURRENT_VERSION_PATH}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as pointer_file:
+        pointer_file.write(version)
+    os.replace(tmp_path, CURRENT_VERSION_PATH)
+
+def list_versions():
+    if not os.path.isdir(REGISTRY_DIR):
+        return []
+    versions = []
+    for name in sorted(os.listdir(REGISTRY_DIR)):
+        path = os.path.join(REGISTRY_DIR, name)
+        if name.startswith('.') or not os.path.isdir(path):
+            continue
+        versions.append(read_meta(name))
+    return versions
@@ -0,0 +1,333 @@
+import math
+import os
+import time
+
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+from joblib import cpu_count, parallel_config
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterGrid, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.svm import SVC
+
+from src.config import DATA_PATH
+from src.data.dataset import get_dataset
+from src.db.export import export_tickets_to_csv
+from src.ml import registry
+from src.ml.features import FeatureCache, feature_key
+from src.ml.jobs import SEARCH_STRATEGIES
+from src.profiling import profiled
+
+REQUIRED_COLUMNS = ['Description', 'Type']
+
+# Количество процессов для подбора гиперпараметров (-1 — все ядра)
+TRAIN_N_JOBS = int(os.environ.get("TRAIN_N_JOBS", 1))
+# Потоков BLAS/OpenMP на один процесс; по умолчанию ядра делятся поровну между процессами
+TRAIN_INNER_THREADS = int(os.environ.get("TRAIN_INNER_THREADS", 0)) or None
+# Стратегия подбора гиперпараметров: grid (полный перебор) или halving (последовательное деление)
+TRAIN_SEARCH_STRATEGY = os.environ.get("TRAIN_SEARCH_STRATEGY", "grid")
+
+CV_FOLDS = 3
+
+# Для ансамблей в режиме halving ресурсом служит количество деревьев/итераций, а не размер выборки:
+# слабые конфигурации отсеиваются по небольшим ансамблям. Значение — максимум ресурса.
+HALVING_RESOURCES = {
+    "Random Forest": ("n_estimators", 200),
+    "Gradient Boosting": ("n_estimators", 100)
+}
+
+# Очистка описаний перед векторизацией
+CLEAN_PATTERN = r'[^a-zA-Z\s]'
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+feature_cache = FeatureCache()
+
+class TrainingError(Exception):
+    """Ошибка обучения с HTTP-кодом, который вернёт API."""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+def build_models():
+    """Модели-кандидаты и сетки гиперпараметров для поиска."""
+    models = {
+        "Logistic Regression": LogisticRegression(random_state=42, max_iter=1000),
+        "KNN": KNeighborsClassifier(),
+        "Random Forest": RandomForestClassifier(random_state=42),
+        "SVM": SVC(random_state=42, probability=True),
+        "Gradient Boosting": GradientBoostingClassifier(random_state=42)
+    }
+
+    param_grids = {
+        "Logistic Regression": {'C': [0.1, 1, 10], 'solver': ['lbfgs', 'liblinear']},
+        "KNN": {'n_neighbors': [3, 5, 7], 'weights': ['uniform', 'distance']},
+        "Random Forest": {'n_estimators': [100, 200], 'max_depth': [None, 10], 'min_samples_split': [2, 5]},
+        "SVM": {'C': [0.1, 1, 10], 'kernel': ['linear', 'rbf']},
+        "Gradient Boosting": {'n_estimators': [50, 100], 'learning_rate': [0.1, 0.2], 'max_depth': [3, 5]}
+    }
+    return models, param_grids
+
+def _notify(progress, stage, percent, message):
+    if progress is not None:
+        progress(stage, percent, message)
+
+def effective_n_jobs(n_jobs):
+    n_cores = cpu_count()
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, n_cores + 1 + n_jobs)
+    return n_jobs
+
+def build_vectorizer():
+    return TfidfVectorizer(max_features=5000, stop_words='english', ngram_range=(1, 2))
+
+def feature_params(vectorizer, smote):
+    """Параметры, от которых зависят признаки: при их изменении кэш признаков не используется."""
+    return {
+        "clean_pattern": CLEAN_PATTERN,
+        "test_size": TEST_SIZE,
+        "random_state": RANDOM_STATE,
+        "vectorizer": vectorizer.get_params(),
+        "smote": smote.get_params()
+    }
+
+def load_dataset(dataset):
+    """Данные для обучения из хранилища с проверкой обязательных колонок."""
+    if not dataset.exists():
+        raise TrainingError("Файл tickets.csv не найден", 404)
+    if not all(col in dataset.columns() for col in REQUIRED_COLUMNS):
+        raise TrainingError(f"Отсутствуют обязательные колонки: {REQUIRED_COLUMNS}", 400)
+    data = dataset.read()
+    # Колоночное хранилище возвращает Type категориальной колонкой
+    if isinstance(data['Type'].dtype, pd.CategoricalDtype):
+        data['Type'] = data['Type'].astype(object)
+    return data
+
+def prepare_features(data_path=DATA_PATH, progress=None, cache=feature_cache, dataset=None):
+    """
+    Загрузка и предобработка данных, разделение на выборки, векторизация и балансировка классов.
+    Результат кэшируется на диске по хэшу содержимого файла данных и параметрам векторизации,
+    поэтому повторное обучение на тех же данных не векторизует корпус заново.
+    Возвращает (данные, векторизатор, X_resampled, y_resampled, X_test_tfidf, y_test).
+    """
+    # Шаг 1: Загрузка данных
+    _notify(progress, "load", 5, "Загрузка данных")
+    dataset = dataset or get_dataset(data_path)
+    if not dataset.exists():
+        raise TrainingError("Файл tickets.csv не найден", 404)
+
+    vectorizer = build_vectorizer()
+    smote = SMOTE(random_state=RANDOM_STATE)
+    key = None
+    if cache is not None and cache.enabled:
+        key = feature_key(dataset.fingerprint(), feature_params(vectorizer, smote))
+        cached = cache.get(key)
+        if cached is not None:
+            _notify(progress, "resample", 20, "Признаки загружены из кэша")
+            return cached
+
+    data = load_dataset(dataset)
+
+    # Шаг 2: Предобработка данных
+    _notify(progress, "preprocess", 10, "Предобработка данных")
+    data = data.dropna(subset=REQUIRED_COLUMNS)
+    data['Description'] = data['Description'].str.lower()
+    data['Description'] = data['Description'].str.replace(CLEAN_PATTERN, '', regex=True)
+
+    X = data['Description']
+    y = data['Type']
+
+    # Шаг 3: Разделение на обучающую и тестовую выборку
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y
+    )
+
+    # Шаг 4: Векторизация текста
+    _notify(progress, "vectorize", 15, "Векторизация текста")
+    X_train_tfidf = vectorizer.fit_transform(X_train)
+    X_test_tfidf = vectorizer.transform(X_test)
+
+    # Шаг 5: Обработка дисбаланса классов
+    _notify(progress, "resample", 20, "Балансировка классов (SMOTE)")
+    X_resampled, y_resampled = smote.fit_resample(X_train_tfidf, y_train)
+
+    if key is not None:
+        cache.put(key, data, vectorizer, X_resampled, y_resampled, X_test_tfidf, y_test)
+    return data, vectorizer, X_resampled, y_resampled, X_test_tfidf, y_test
+
+def halving_fits(n_candidates, factor, cv=CV_FOLDS):
+    """Количество обучений в HalvingGridSearchCV с min_resources='exhaust'."""
+    n_iterations = 1 + int(math.floor(math.log(n_candidates, factor) + 1e-9)) if n_candidates > 1 else 1
+    return cv * sum(math.ceil(n_candidates / factor ** i) for i in range(n_iterations))
+
+def _build_search(model_name, model, param_grid, strategy, factor, n_jobs):
+    if strategy == "grid":
+        search = GridSearchCV(model, param_grid, cv=CV_FOLDS, scoring='accuracy', n_jobs=n_jobs)
+        return search, len(ParameterGrid(param_grid)) * CV_FOLDS
+
+    resource, max_resources = 'n_samples', 'auto'
+    if model_name in HALVING_RESOURCES:
+        resource, max_resources = HALVING_RESOURCES[model_name]
+        param_grid = {key: value for key, value in param_grid.items() if key != resource}
+    search = HalvingGridSearchCV(
+        model, param_grid, cv=CV_FOLDS, scoring='accuracy', n_jobs=n_jobs, factor=factor,
+        resource=resource, max_resources=max_resources, min_resources='exhaust', random_state=42
+    )
+    return search, halving_fits(len(ParameterGrid(param_grid)), factor)
+
+def search_best_model(X_train, y_train, X_test, y_test, n_jobs=TRAIN_N_JOBS,
+                      inner_threads=TRAIN_INNER_THREADS, model_names=None,
+                      strategy=TRAIN_SEARCH_STRATEGY, factor=3, max_seconds=None, max_fits=None,
+                      progress=None):
+    """
+    Подбор гиперпараметров для каждой модели и выбор лучшей по точности на тестовой выборке.
+    При n_jobs > 1 обучения для разных кандидатов и фолдов распределяются по пулу процессов.
+    Чтобы процессы не конкурировали за ядра, число потоков BLAS/OpenMP в каждом ограничивается
+    значением inner_threads (по умолчанию — ядра / процессы).
+
+    strategy='halving' использует последовательное деление (HalvingGridSearchCV): все кандидаты
+    обучаются на малой части данных или небольшом числе итераций, и только лучшие 1/factor
+    переходят на следующий, больший ресурс.
+    max_fits ограничивает общее число обучений: модель, чьи запланированные обучения в него
+    не помещаются, пропускается. max_seconds — срок, после которого подбор для новых моделей
+    не начинается; подбор уже начатой модели не прерывается, поэтому общее время может
+    превысить max_seconds на время подбора одной модели. Обучения пропущенных моделей
+    считаются отсечёнными.
+
+    Возвращает (имя лучшей модели, лучшая модель, точность, результаты по моделям, сводка поиска).
+    """
+    if strategy not in SEARCH_STRATEGIES:
+        raise TrainingError(f"Неизвестная стратегия подбора: {strategy}", 400)
+    if factor < 2:
+        raise TrainingError("Параметр factor должен быть не меньше 2", 400)
+
+    models, param_grids = build_models()
+    if model_names is not None:
+        models = {name: models[name] for name in model_names}
+
+    n_jobs = effective_n_jobs(n_jobs)
+    if inner_threads is None:
+        inner_threads = max(1, cpu_count() // n_jobs)
+
+    best_model_name = None
+    best_model = None
+    best_accuracy = 0
+    results = {}
+    skipped = []
+    total_fits = 0
+    total_pruned = 0
+    started = time.time()
+
+    with parallel_config(backend='loky', inner_max_num_threads=inner_threads):
+        for i, (model_name, model) in enumerate(models.items()):
+            grid_fits = len(ParameterGrid(param_grids[model_name])) * CV_FOLDS
+            search, planned_fits = _build_search(model_name, model, param_grids[model_name], strategy, factor, n_jobs)
+
+            # Проверка бюджета перед запуском подбора для очередной модели
+            out_of_time = max_seconds is not None and time.time() - started >= max_seconds
+            out_of_fits = max_fits is not None and total_fits + planned_fits > max_fits
+            if out_of_time or out_of_fits:
+                skipped.append(model_name)
+                total_pruned += planned_fits
+                continue
+
+            _notify(progress, "search", 25 + 70 * i // len(models), f"Подбор параметров: {model_name}")
+            model_started = time.time()
+            search.fit(X_train, y_train)
+            best_model_candidate = search.best_estimator_
+
+            if strategy == "halving":
+                fits = sum(search.n_candidates_) * CV_FOLDS
+                pruned = (search.n_candidates_[0] - search.n_candidates_[-1]) * CV_FOLDS
+            else:
+                fits, pruned = grid_fits, 0
+            total_fits += fits
+            total_pruned += pruned
+
+            # Оценка модели
+            accuracy = accuracy_score(y_test, best_model_candidate.predict(X_test))
+            results[model_name] = {
+                "accuracy": round(accuracy, 4),
+                "best_params": search.best_params_,
+                "fits": fits,
+                "fits_pruned": pruned,
+                "seconds": round(time.time() - model_started, 2)
+            }
+            if accuracy > best_accuracy:
+                best_accuracy = accuracy
+                best_model_name = model_name
+                best_model = best_model_candidate
+
+    if best_model is None:
+        raise TrainingError("Бюджет обучения исчерпан до обучения хотя бы одной модели", 400)
+
+    summary = {
+        "strategy": strategy,
+        "factor": factor if strategy == "halving" else None,
+        "max_seconds": max_seconds,
+        "max_fits": max_fits,
+        "fits": total_fits,
+        "fits_pruned": total_pruned,
+        "skipped_models": skipped
+    }
+    return best_model_name, best_model, best_accuracy, results, summary
+
+@profiled
+def run_training(load_from_db=False, data_path=DATA_PATH, n_jobs=TRAIN_N_JOBS,
+                 search_strategy=TRAIN_SEARCH_STRATEGY, halving_factor=3, max_seconds=None, max_fits=None,
+                 progress=None):
+    """
+    Полный цикл обучения: загрузка и предобработка данных, векторизация, SMOTE,
+    подбор гиперпараметров для нескольких моделей и сохранение лучшей из них новой версией в реестре.
+    Версия не активируется — это делает вызывающая сторона.
+    progress(stage, percent, message) вызывается при переходе между этапами.
+    Возвращает отчёт об обучении.
+    """
+    started = time.time()
+    db_message = ""
+    dataset = get_dataset(data_path)
+
+    if load_from_db:
+        # Догружаем записи из базы данных в tickets.csv
+        _notify(progress, "export", 0, "Выгрузка новых записей из базы данных")
+        export_tickets_to_csv(dataset=dataset)
+        db_message = "Данные из базы данных успешно добавлены в tickets.csv. "
+
+    data, vectorizer, X_resampled, y_resampled, X_test_tfidf, y_test = prepare_features(progress=progress, dataset=dataset)
+
+    # Шаг 6: Обучение моделей
+    best_model_name, best_model, best_accuracy, results, search_summary = search_best_model(
+        X_resampled, y_resampled, X_test_tfidf, y_test, n_jobs=n_jobs, strategy=search_strategy,
+        factor=halving_factor, max_seconds=max_seconds, max_fits=max_fits, progress=progress
+    )
+
+    # Шаг 7: Сохранение лучшей модели и векторизатора новой версией
+    _notify(progress, "save", 95, "Сохранение модели")
+    version = registry.save_version(best_model, vectorizer, meta={
+        "source": "training",
+        "model_name": best_model_name,
+        "accuracy": round(best_accuracy, 4)
+    })
+    model_path, vectorizer_path = registry.version_files(version)
+
+    return {
+        "message": f"{db_message}Обучение завершено. Лучшая модель: {best_model_name} с точностью {best_accuracy:.4f}",
+        "best_model": best_model_name,
+        "accuracy": round(best_accuracy, 4),
+        "models": results,
+        "search": search_summary,
+        "feature_cache": feature_cache.stats(),
+        "rows": len(data),
+        "n_jobs": effective_n_jobs(n_jobs),
+        "version": version,
+        "model_path": model_path,
+        "vectorizer_path": vectorizer_path,
+        "seconds": round(time.time() - started, 2)
+    }
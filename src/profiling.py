@@ -0,0 +1,267 @@
+"""
+Профилирование работающего процесса сервиса без перезапуска.
+
+Сеанс профилирования длится заданное количество секунд и собирает два отчёта:
+- выборочный профиль всех потоков процесса: фоновый поток раз в PROFILE_INTERVAL_MS
+  снимает стеки (sys._current_frames) и считает одинаковые стеки. Результат —
+  файл .folded в формате collapsed stacks (flamegraph.pl, speedscope, inferno);
+- статистику cProfile для вызовов, отмеченных декоратором profiled (обработка
+  /categorize, обучение, выгрузка из БД), начатых во время сеанса. В процессе
+  одновременно работает только один cProfile (с Python 3.12 второй активный профилировщик
+  вызывает ошибку), поэтому вызовы, начатые, пока профилируется другой, выполняются без
+  профиля и учитываются в отчёте полем skipped_calls.
+
+Вне сеанса декоратор profiled — одна проверка, выборочный профиль не работает.
+Сеанс запускается запросом POST /admin/profile или сигналом SIGUSR2
+(kill -USR2 <pid> рабочего процесса или процесса задачи обучения).
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+# Каталог для файлов профилей
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# Интервал снятия стеков в миллисекундах
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5.0))
+# Длительность сеанса по сигналу и по умолчанию для POST /admin/profile, в секундах
+PROFILE_DEFAULT_SECONDS = float(os.environ.get("PROFILE_DEFAULT_SECONDS", 10.0))
+# Максимальная длительность сеанса через API: запрос занимает поток на всё это время
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", 60.0))
+# Сигнал, запускающий сеанс профилирования
+PROFILE_SIGNAL = signal.SIGUSR2
+
+# Стеки, которые заканчиваются ожиданием (пул потоков, select цикла событий, очереди),
+# не попадают в профиль: они показывают простой, а не работу
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+    # Свободный поток ThreadPoolExecutor ждёт задачу в SimpleQueue.get (код на C)
+    ("thread.py", "_worker"),
+}
+
+class ProfilerBusyError(Exception):
+    """Сеанс профилирования уже выполняется в этом процессе."""
+
+def _frame_label(code):
+    filename = code.co_filename
+    try:
+        filename = os.path.relpath(filename)
+    except ValueError:
+        pass
+    if filename.startswith(".."):
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+class ProfileSession:
+    """Один сеанс: выборочный профиль всех потоков и cProfile отмеченных вызовов."""
+
+    def __init__(self, seconds, interval_ms=PROFILE_INTERVAL_MS, include_idle=False):
+        self.seconds = seconds
+        self.interval = interval_ms / 1000
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.finished_at = None
+        self._profiles = []
+        self.skipped_calls = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._labels = {}
+
+    @property
+    def active(self):
+        return self._thread is not None and not self._stop.is_set()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def _is_idle(self, frame):
+        code = frame.f_code
+        return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+    def sample(self):
+        """Снимает стеки всех потоков, кроме собственного, и добавляет их в профиль."""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own or (not self.include_idle and self._is_idle(frame)):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def _run(self):
+        deadline = self.started_at + self.seconds
+        while not self._stop.is_set() and time.time() < deadline:
+            self.sample()
+            self._stop.wait(self.interval)
+        self._stop.set()
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        self._thread.join()
+        self.finished_at = time.time()
+
+    def stop(self):
+        self._stop.set()
+        self.wait()
+
+    def add_profile(self, profile):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def add_skipped(self):
+        with self._lock:
+            self.skipped_calls += 1
+
+    def collapsed(self):
+        """Профиль в формате collapsed stacks: «кадр;кадр;... количество» на строку."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def top_functions(self, stats, limit=20):
+        """Функции с наибольшим суммарным временем по cProfile."""
+        rows = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "total_time": round(total, 6),
+                "cumulative_time": round(cumulative, 6)
+            })
+        rows.sort(key=lambda row: row["cumulative_time"], reverse=True)
+        return rows[:limit]
+
+    def save(self, profile_dir=PROFILE_DIR):
+        """Записывает .folded и .pstats и возвращает отчёт о сеансе."""
+        os.makedirs(profile_dir, exist_ok=True)
+        started = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        name = f"profile-{os.getpid()}-{started}-{int(self.started_at * 1000) % 1000:03d}"
+
+        collapsed_path = os.path.join(profile_dir, f"{name}.folded")
+        with open(collapsed_path, "w", encoding="utf-8") as collapsed_file:
+            collapsed_file.write(self.collapsed())
+
+        stats = self.stats()
+        pstats_path = None
+        if stats is not None:
+            pstats_path = os.path.join(profile_dir, f"{name}.pstats")
+            stats.dump_stats(pstats_path)
+
+        return {
+            "pid": os.getpid(),
+            "seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "profiled_calls": len(self._profiles),
+            "skipped_calls": self.skipped_calls,
+            "collapsed_path": collapsed_path,
+            "pstats_path": pstats_path,
+            "top_functions": self.top_functions(stats) if stats is not None else []
+        }
+
+_session = None
+_session_lock = threading.Lock()
+# Занят, пока выполняется вызов под cProfile: в процессе активен не больше чем один профиль
+_profile_lock = threading.Lock()
+_local = threading.local()
+
+def start_session(seconds=PROFILE_DEFAULT_SECONDS, interval_ms=PROFILE_INTERVAL_MS, include_idle=False):
+    """Запускает сеанс в фоне; в процессе может выполняться только один сеанс."""
+    global _session
+    with _session_lock:
+        if _session is not None and _session.active:
+            raise ProfilerBusyError("Профилирование уже выполняется")
+        _session = ProfileSession(seconds, interval_ms, include_idle)
+        _session.start()
+        return _session
+
+def run_session(seconds=PROFILE_DEFAULT_SECONDS, interval_ms=PROFILE_INTERVAL_MS, include_idle=False,
+                profile_dir=PROFILE_DIR):
+    """Профилирует процесс seconds секунд (блокирует вызывающий поток), записывает файлы и возвращает отчёт."""
+    session = start_session(seconds, interval_ms, include_idle)
+    session.wait()
+    return session, session.save(profile_dir)
+
+def profiled(func):
+    """
+    Вызов функции во время сеанса выполняется под cProfile, если в процессе не профилируется
+    другой вызов; иначе — без профиля. Вложенные отмеченные вызовы входят во внешний.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        session = _session
+        # Вложенный отмеченный вызов входит во внешний вызов своего потока
+        if session is None or not session.active or getattr(_local, "profiling", False):
+            return func(*args, **kwargs)
+        _local.profiling = True
+        try:
+            if not _profile_lock.acquire(blocking=False):
+                session.add_skipped()
+                return func(*args, **kwargs)
+            try:
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError:
+                    # Активен сторонний профилировщик (Python 3.12+)
+                    session.add_skipped()
+                    return func(*args, **kwargs)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profile.disable()
+                    session.add_profile(profile)
+            finally:
+                _profile_lock.release()
+        finally:
+            _local.profiling = False
+    return wrapper
+
+def _handle_signal(signum, frame):
+    # Обработчик сигнала только запускает поток: файлы пишутся по окончании сеанса
+    def run():
+        try:
+            _, report = run_session()
+        except ProfilerBusyError:
+            return
+        print(f"Профиль процесса {report['pid']} записан: {report['collapsed_path']}", file=sys.stderr)
+    threading.Thread(target=run, name="profile-signal", daemon=True).start()
+
+def install_signal_handler(signum=PROFILE_SIGNAL):
+    """Сеанс по сигналу (по умолчанию SIGUSR2); вызывается из главного потока процесса."""
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signum, _handle_signal)
@@ -0,0 +1,394 @@
+"""
+Асинхронный режим API (aiohttp + asyncpg).
+
+Маршруты с большим количеством одновременных запросов — /status, /stats, /categorize,
+/categorize/batch и /tickets — обрабатываются в цикле событий: запросы к БД идут
+через пул asyncpg, а векторизация и предсказание — в ограниченный пул потоков.
+Медленный клиент или ожидание БД не занимают поток, поэтому тысячи одновременных
+соединений обслуживаются одним процессом.
+
+Остальные маршруты (данные, файлы и версии модели, обучение) выполняет Flask-приложение
+src.routes.service в отдельном пуле потоков, поэтому их поведение не отличается.
+Модель, кэш предсказаний и реестр версий общие для обоих путей.
+
+    python main.py serve-async --port 5050
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_to_bytes
+
+from aiohttp import web
+
+from src import metrics
+from src.db import async_database
+from src.routes import service
+from src.routes.service import BATCH_MAX_SIZE, TICKETS_PAGE_DEFAULT, TICKETS_PAGE_MAX
+
+# Потоки для векторизации и предсказания
+ASYNC_INFERENCE_WORKERS = int(os.environ.get("ASYNC_INFERENCE_WORKERS", os.cpu_count() or 1))
+# Сколько задач предсказания может ожидать пула потоков одновременно, остальные ждут в цикле событий
+ASYNC_INFERENCE_QUEUE = int(os.environ.get("ASYNC_INFERENCE_QUEUE", 256))
+# Потоки для маршрутов, которые выполняет Flask-приложение
+ASYNC_FALLBACK_WORKERS = int(os.environ.get("ASYNC_FALLBACK_WORKERS", 8))
+# Максимальный размер тела JSON-запроса в байтах
+ASYNC_MAX_BODY = int(os.environ.get("ASYNC_MAX_BODY", 64 * 1024 * 1024))
+# Тело запроса для Flask-приложения до этого размера хранится в памяти, больше — во временном файле
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+def _dumps(data):
+    # Как jsonify во Flask: ключи отсортированы, без пробелов, не-ASCII символы экранируются
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+def json_response(data, status=200):
+    return web.json_response(data, status=status, dumps=_dumps)
+
+def error_response(message, status):
+    return json_response({"error": message}, status)
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+# ==================== Ресурсы приложения ====================
+
+class Resources:
+    """Пул БД, пулы потоков и счётчики приложения; создаются при запуске, изменяются во время работы."""
+
+    def __init__(self):
+        self.pool = None
+        self.pool_lock = asyncio.Lock()
+        self.inference_executor = ThreadPoolExecutor(ASYNC_INFERENCE_WORKERS, thread_name_prefix="inference")
+        self.inference_slots = asyncio.Semaphore(ASYNC_INFERENCE_QUEUE)
+        self.inference_in_flight = 0
+        self.fallback_executor = ThreadPoolExecutor(ASYNC_FALLBACK_WORKERS, thread_name_prefix="wsgi")
+
+RESOURCES = web.AppKey("resources", Resources)
+
+async def get_pool(app):
+    """Пул asyncpg создаётся при первом обращении: сервис запускается и без доступной БД."""
+    resources = app[RESOURCES]
+    async with resources.pool_lock:
+        if resources.pool is None:
+            resources.pool = await async_database.create_pool()
+    return resources.pool
+
+async def run_inference(app, fn, *args):
+    """Выполняет векторизацию и предсказание в пуле потоков, не блокируя цикл событий."""
+    resources = app[RESOURCES]
+    async with resources.inference_slots:
+        resources.inference_in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(resources.inference_executor, fn, *args)
+        finally:
+            resources.inference_in_flight -= 1
+
+async def _startup(app):
+    app[RESOURCES] = Resources()
+
+async def _cleanup(app):
+    resources = app[RESOURCES]
+    if resources.pool is not None:
+        await resources.pool.close()
+    resources.inference_executor.shutdown(wait=False)
+    resources.fallback_executor.shutdown(wait=False)
+
+# ==================== Эндпоинты ====================
+
+async def status(request):
+    return json_response({"status": "API работает"})
+
+async def stats(request):
+    resources = request.app[RESOURCES]
+    current = service.bundle
+    return json_response({
+        "model": {"version": current.version, "loaded_at": current.loaded_at} if current is not None else None,
+        "db_pool": async_database.pool_stats(resources.pool) if resources.pool is not None else None,
+        "prediction_cache": service.prediction_cache.stats(),
+        "write_behind": service.prediction_writer.stats() if service.prediction_writer is not None else None,
+        "micro_batching": service.prediction_batcher.stats() if service.prediction_batcher is not None else None,
+        "inference": {
+            "workers": ASYNC_INFERENCE_WORKERS,
+            "queue": ASYNC_INFERENCE_QUEUE,
+            "in_flight": resources.inference_in_flight
+        }
+    })
+
+async def categorize(request):
+    generation = service.prediction_cache.generation
+    current = service.bundle
+    if current is None:
+        return error_response("Модель не загружена", 500)
+
+    started = time.perf_counter()
+    data = await read_json(request)
+    metrics.observe_stage("json_parse", time.perf_counter() - started)
+    if not isinstance(data, dict):
+        return error_response("Тело запроса должно быть JSON-объектом", 400)
+    description = data.get('description', '')
+    ticket_id = data.get('id')
+    title = data.get('title', '')
+
+    if not description:
+        return error_response("Отсутствует описание тикета", 400)
+
+    try:
+        prediction = await run_inference(request.app, service.predict_description, current, description, generation)
+    except TimeoutError:
+        return error_response("Превышено время ожидания предсказания", 503)
+
+    row = (ticket_id, title, description, str(prediction))
+    started = time.perf_counter()
+    if service.prediction_writer is not None:
+        # Отложенная запись: постановка в очередь может ждать места, поэтому тоже вне цикла событий
+        await asyncio.get_running_loop().run_in_executor(request.app[RESOURCES].fallback_executor, service.prediction_writer.put, row)
+        metrics.observe_stage("db_enqueue", time.perf_counter() - started)
+    else:
+        try:
+            await async_database.insert_predictions(await get_pool(request.app), [row])
+        except Exception as e:
+            print("Ошибка сохранения в БД:", e)
+            return error_response("Ошибка сохранения данных в БД", 500)
+        metrics.observe_stage("db_insert", time.perf_counter() - started)
+
+    return json_response({
+        "description": description,
+        "predicted_type": prediction,
+        "ticket_id": ticket_id,
+        "title": title
+    })
+
+async def categorize_batch(request):
+    generation = service.prediction_cache.generation
+    current = service.bundle
+    if current is None:
+        return error_response("Модель не загружена", 500)
+
+    data = await read_json(request)
+    tickets = data.get('tickets') if isinstance(data, dict) else None
+
+    if not isinstance(tickets, list) or not tickets:
+        return error_response("Список тикетов пуст или отсутствует", 400)
+    if len(tickets) > BATCH_MAX_SIZE:
+        return error_response(f"Размер пакета превышает {BATCH_MAX_SIZE} тикетов", 400)
+
+    results, rows = await run_inference(request.app, service.classify_tickets, current, tickets, generation)
+    if rows:
+        try:
+            await async_database.insert_predictions(await get_pool(request.app), rows)
+        except Exception as e:
+            print("Ошибка сохранения в БД:", e)
+            return error_response("Ошибка сохранения данных в БД", 500)
+
+    return json_response({
+        "results": results,
+        "processed": len(rows),
+        "failed": len(tickets) - len(rows)
+    })
+
+async def get_tickets(request):
+    output_format = request.query.get('format', 'json')
+    if output_format not in ('json', 'ndjson'):
+        return error_response("Параметр format должен быть json или ndjson", 400)
+
+    filters = {"predicted_type": request.query.get('predicted_type')}
+    for name, param in (("after_id", "cursor"), ("min_id", "min_id"), ("max_id", "max_id")):
+        value = request.query.get(param)
+        if value is not None:
+            try:
+                filters[name] = int(value)
+            except ValueError:
+                return error_response(f"Параметр {param} должен быть целым числом", 400)
+
+    limit = request.query.get('limit')
+    if limit is not None or output_format == 'json':
+        try:
+            limit = int(limit) if limit is not None else TICKETS_PAGE_DEFAULT
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= TICKETS_PAGE_MAX:
+            return error_response(f"Параметр limit должен быть целым числом от 1 до {TICKETS_PAGE_MAX}", 400)
+
+    rows = None
+    try:
+        pool = await get_pool(request.app)
+        if output_format == 'json':
+            tickets, next_cursor = await async_database.fetch_tickets_page(pool, limit, **filters)
+            return json_response({"tickets": tickets, "next_cursor": next_cursor})
+
+        # Первая строка читается до начала ответа, чтобы ошибка БД вернулась кодом 500
+        rows = async_database.iter_tickets(pool, limit=limit, **filters)
+        first = await anext(rows, None)
+    except Exception as e:
+        print("Ошибка при получении данных из БД:", e)
+        if rows is not None:
+            await rows.aclose()
+        return error_response("Ошибка при получении данных из базы", 500)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    try:
+        if first is not None:
+            await response.write((json.dumps(first, ensure_ascii=False) + "\n").encode("utf-8"))
+            async for ticket in rows:
+                await response.write((json.dumps(ticket, ensure_ascii=False) + "\n").encode("utf-8"))
+    finally:
+        await rows.aclose()
+    await response.write_eof()
+    return response
+
+async def delete_ticket(request):
+    ticket_id = request.match_info['id']
+    try:
+        rows_deleted = await async_database.delete_ticket(await get_pool(request.app), int(ticket_id))
+    except Exception as e:
+        print("Ошибка при удалении записи из БД:", e)
+        return error_response("Ошибка при удалении записи из базы", 500)
+
+    if rows_deleted == 0:
+        return json_response({"message": f"Тикет с ID {ticket_id} не найден"}, 404)
+    return json_response({"message": f"Тикет с ID {ticket_id} успешно удален"})
+
+async def update_ticket(request):
+    ticket_id = request.match_info['id']
+    data = await read_json(request)
+    if not isinstance(data, dict):
+        return error_response("Ошибка при обновлении записи в базе", 500)
+
+    fields = {column: data.get(column) for column in ('title', 'description', 'predicted_type') if data.get(column)}
+    if not fields:
+        return error_response("Нет данных для обновления", 400)
+
+    try:
+        rows_updated = await async_database.update_ticket(await get_pool(request.app), int(ticket_id), fields)
+    except Exception as e:
+        print("Ошибка при обновлении записи в БД:", e)
+        return error_response("Ошибка при обновлении записи в базе", 500)
+
+    if rows_updated == 0:
+        return json_response({"message": f"Тикет с ID {ticket_id} не найден"}, 404)
+    return json_response({"message": f"Тикет с ID {ticket_id} успешно обновлен"})
+
+# ==================== Маршруты Flask-приложения ====================
+
+def _wsgi_environ(request, body, body_size):
+    environ = {
+        "REQUEST_METHOD": request.method,
+        "SCRIPT_NAME": "",
+        # PATH_INFO в WSGI — байты пути, декодированные как latin-1
+        "PATH_INFO": unquote_to_bytes(request.rel_url.raw_path).decode("latin-1"),
+        "QUERY_STRING": request.rel_url.raw_query_string,
+        "SERVER_NAME": request.host.split(":")[0],
+        "SERVER_PORT": str(request.url.port or ""),
+        "SERVER_PROTOCOL": f"HTTP/{request.version.major}.{request.version.minor}",
+        "REMOTE_ADDR": request.remote or "",
+        "CONTENT_LENGTH": str(body_size),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": request.scheme,
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False
+    }
+    for name, value in request.headers.items():
+        key = name.upper().replace("-", "_")
+        if key == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif key != "CONTENT_LENGTH":
+            environ[f"HTTP_{key}"] = value
+    return environ
+
+async def wsgi_fallback(request):
+    """
+    Выполняет запрос Flask-приложением в пуле потоков. Тело запроса передаётся через
+    временный файл, тело ответа читается и отправляется клиенту по частям,
+    поэтому потоковые загрузка и выгрузка данных работают как во Flask-режиме.
+    """
+    loop = asyncio.get_running_loop()
+    executor = request.app[RESOURCES].fallback_executor
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as body:
+        body_size = 0
+        async for chunk in request.content.iter_chunked(64 * 1024):
+            body_size += len(chunk)
+            await loop.run_in_executor(executor, body.write, chunk)
+        body.seek(0)
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+            return lambda data: None
+
+        iterable = await loop.run_in_executor(executor, service.app, _wsgi_environ(request, body, body_size), start_response)
+        try:
+            iterator = iter(iterable)
+            first = await loop.run_in_executor(executor, next, iterator, None)
+            response = web.StreamResponse(status=started["status"])
+            for name, value in started["headers"]:
+                response.headers.add(name, value)
+            await response.prepare(request)
+            chunk = first
+            while chunk is not None:
+                if chunk:
+                    await response.write(chunk)
+                chunk = await loop.run_in_executor(executor, next, iterator, None)
+        finally:
+            if hasattr(iterable, "close"):
+                await loop.run_in_executor(executor, iterable.close)
+    await response.write_eof()
+    return response
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    """Количество и длительность запросов к маршрутам цикла событий; Flask-маршруты считает само Flask-приложение."""
+    route = request.match_info.route
+    if route.handler is wsgi_fallback:
+        return await handler(request)
+
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        resource = route.resource
+        path = resource.canonical if resource is not None else metrics.UNMATCHED_ROUTE
+        metrics.observe_request(request.method, path, status, time.perf_counter() - started)
+
+def create_app():
+    app = web.Application(client_max_size=ASYNC_MAX_BODY, middlewares=[metrics_middleware])
+    app.on_startup.append(_startup)
+    app.on_cleanup.append(_cleanup)
+    app.router.add_get('/status', status)
+    app.router.add_get('/stats', stats)
+    app.router.add_post('/categorize', categorize)
+    app.router.add_post('/categorize/batch', categorize_batch)
+    app.router.add_get('/tickets', get_tickets)
+    app.router.add_delete('/tickets/{id}', delete_ticket)
+    app.router.add_put('/tickets/{id}', update_ticket)
+    # Все остальные маршруты (и Swagger) — Flask-приложение
+    app.router.add_route('*', '/{tail:.*}', wsgi_fallback)
+    return app
+
+def serve(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py serve-async", description="Асинхронный запуск API")
+    parser.add_argument("--host", default=os.environ.get("SERVE_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SERVE_PORT", 5050)))
+    args = parser.parse_args(argv)
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    serve()
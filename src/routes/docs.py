@@ -0,0 +1,61 @@
+"""
+Документация API (Swagger UI, flasgger), подключаемая при первом обращении.
+
+flasgger вместе с jsonschema, yaml и mistune заметно увеличивает время запуска и память
+каждого процесса, а нужен только для /apidocs/ и /apispec.json. LazySwagger оборачивает
+WSGI-приложение Flask: запросы к путям документации передаются отдельному Flask-приложению
+с flasgger, которое создаётся при первом таком запросе. Спецификация строится по маршрутам
+и docstring основного приложения и кэшируется flasgger до перезапуска процесса.
+"""
+import threading
+
+from flask import Flask
+
+class LazySwagger:
+    """WSGI-обёртка app.wsgi_app: пути документации обслуживает flasgger, остальные — само приложение."""
+
+    def __init__(self, app, config):
+        self.app = app
+        self.config = config
+        self.wsgi_app = app.wsgi_app
+        self.prefixes = self._prefixes(config)
+        self._docs_app = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _prefixes(config):
+        prefixes = [config["specs_route"].rstrip("/"), config["static_url_path"], "/oauth2-redirect.html"]
+        prefixes.extend(spec["route"] for spec in config["specs"])
+        return tuple(prefixes)
+
+    @property
+    def loaded(self):
+        return self._docs_app is not None
+
+    def _create_docs_app(self):
+        from flasgger import Swagger
+
+        app = self.app
+
+        class _Swagger(Swagger):
+            def get_apispecs(self, endpoint='apispec_1'):
+                # flasgger собирает маршруты из current_app — это должно быть основное приложение
+                with app.app_context():
+                    return super().get_apispecs(endpoint)
+
+        docs_app = Flask(app.import_name)
+        docs_app.config.update(app.config)
+        _Swagger(docs_app, config=self.config)
+        return docs_app
+
+    def docs_app(self):
+        if self._docs_app is None:
+            with self._lock:
+                if self._docs_app is None:
+                    self._docs_app = self._create_docs_app()
+        return self._docs_app
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").startswith(self.prefixes):
+            return self.docs_app()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
@@ -0,0 +1,171 @@
+"""
+Многопроцессный запуск API (gunicorn, prefork).
+
+Приложение и модель загружаются в главном процессе до fork: рабочие процессы
+разделяют страницы модели (copy-on-write, массивы из артефактов joblib — через
+страничный кэш). Каждый рабочий процесс обслуживает запросы в нескольких потоках
+и перезапускается после max_requests запросов.
+
+Главный процесс следит за указателем models/CURRENT: при смене активной версии
+(обучение, POST /models/<version>/activate или загрузка файлов в любом рабочем
+процессе) он загружает новую версию у себя и плавно заменяет рабочие процессы (SIGHUP):
+новые процессы стартуют уже с новой моделью, старые дообслуживают текущие запросы.
+
+Метрики Prometheus рабочие процессы пишут в общий каталог PROMETHEUS_MULTIPROC_DIR
+(по умолчанию — временный каталог), и GET /metrics в любом процессе суммирует их.
+
+    python main.py serve --workers 4 --threads 8
+"""
+import argparse
+import os
+import signal
+import tempfile
+import threading
+import time
+
+from gunicorn.app.base import BaseApplication
+
+from src.ml import registry
+
+SERVE_HOST = os.environ.get("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.environ.get("SERVE_PORT", 5050))
+# Количество рабочих процессов
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", os.cpu_count() or 1))
+# Количество потоков в каждом рабочем процессе
+SERVE_THREADS = int(os.environ.get("SERVE_THREADS", 4))
+# Рабочий процесс перезапускается после стольких запросов (0 — никогда)...
+SERVE_MAX_REQUESTS = int(os.environ.get("SERVE_MAX_REQUESTS", 10000))
+# ...плюс случайная добавка, чтобы процессы не перезапускались одновременно
+SERVE_MAX_REQUESTS_JITTER = int(os.environ.get("SERVE_MAX_REQUESTS_JITTER", 1000))
+# Сколько секунд старый процесс дообслуживает запросы при перезапуске
+SERVE_GRACEFUL_TIMEOUT = int(os.environ.get("SERVE_GRACEFUL_TIMEOUT", 30))
+# Как часто (в секундах) главный процесс проверяет смену активной версии модели
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", 2.0))
+
+class ModelWatcher:
+    """
+    Следит в главном процессе за активной версией модели. При смене версии вызывает
+    load(version), а после успешной загрузки — reload() (по умолчанию SIGHUP себе).
+    """
+
+    def __init__(self, load, reload=None, interval=MODEL_WATCH_INTERVAL, log=None):
+        self.load = load
+        self.reload = reload or (lambda: os.kill(os.getpid(), signal.SIGHUP))
+        self.interval = interval
+        self.log = log
+        self.version = self.active_version()
+
+    @staticmethod
+    def active_version():
+        return registry.get_current_version() or registry.LEGACY_VERSION
+
+    def check(self):
+        """Возвращает True, если версия сменилась и рабочие процессы перезапускаются."""
+        version = self.active_version()
+        if version == self.version:
+            return False
+        # Версия запоминается и при ошибке загрузки, чтобы не повторять её каждые interval секунд
+        previous, self.version = self.version, version
+        try:
+            loaded = self.load(version)
+        except Exception as e:
+            if self.log is not None:
+                self.log.error("Не удалось загрузить версию модели %s: %s", version, e)
+            return False
+        if loaded is False:
+            return False
+        if self.log is not None:
+            self.log.info("Активная версия модели сменилась: %s -> %s, перезапуск рабочих процессов", previous, version)
+        self.reload()
+        return True
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def start(self):
+        threading.Thread(target=self.run, name="model-watcher", daemon=True).start()
+
+def _prepare_metrics_dir(path):
+    """Создаёт каталог метрик и удаляет файлы предыдущего запуска (до импорта src.metrics)."""
+    if not path:
+        return tempfile.mkdtemp(prefix="ticket-metrics-")
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+    return path
+
+def _post_fork(server, worker):
+    from src import metrics
+    from src.routes import service
+
+    # Значения метрик главного процесса рабочий процесс не наследует
+    if service.bundle is not None:
+        metrics.set_model(service.bundle.version, service.bundle.loaded_at)
+
+def _post_worker_init(worker):
+    from src import profiling
+
+    # Рабочий процесс gunicorn сбрасывает обработчики сигналов при запуске
+    profiling.install_signal_handler()
+
+def _child_exit(server, worker):
+    from src import metrics
+
+    metrics.mark_process_dead(worker.pid)
+
+def _when_ready(server):
+    from src.routes import service
+
+    ModelWatcher(service.load_model_and_vectorizer, log=server.log).start()
+
+class ServiceApplication(BaseApplication):
+    """Приложение gunicorn для src.routes.service:app с настройками из options."""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from src.routes.service import app
+        return app
+
+def build_options(args):
+    return {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        # gthread: heartbeat рабочего процесса не зависит от длительности запросов (например, /train)
+        "worker_class": "gthread",
+        "threads": args.threads,
+        "preload_app": True,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": args.max_requests_jitter if args.max_requests else 0,
+        "graceful_timeout": args.graceful_timeout,
+        "timeout": 120,
+        "when_ready": _when_ready,
+        "post_fork": _post_fork,
+        "post_worker_init": _post_worker_init,
+        "child_exit": _child_exit
+    }
+
+def serve(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Многопроцессный запуск API")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVE_WORKERS, help="Количество рабочих процессов")
+    parser.add_argument("--threads", type=int, default=SERVE_THREADS, help="Потоков в рабочем процессе")
+    parser.add_argument("--max-requests", type=int, default=SERVE_MAX_REQUESTS,
+                        help="Перезапуск рабочего процесса после стольких запросов (0 — никогда)")
+    parser.add_argument("--max-requests-jitter", type=int, default=SERVE_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=SERVE_GRACEFUL_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    # Каталог метрик задаётся до загрузки приложения: prometheus_client читает его при импорте
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = _prepare_metrics_dir(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+    ServiceApplication(build_options(args)).run()
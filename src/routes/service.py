@@ -1,20 +1,22 @@
-import csv
+import hmac
+import json
 import os
-import pickle
-import shutil
-
-import pandas as pd
-from flask import Flask, jsonify, request, send_file
-from flasgger import Swagger
-from imblearn.over_sampling import SMOTE
-from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import GridSearchCV, train_test_split
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.svm import SVC
-from src.db.database import get_db_connection
+import time
+
+from flask import Flask, Response, jsonify, request, send_file
+from src import metrics, profiling
+from src.config import DATA_PATH, MODEL_PATH, VECTORIZER_PATH
+from src.data.dataset import DataLockedError, DatasetColumnsError, get_dataset, iter_raw
+from src.db.database import db_connection, fetch_tickets_page, get_pool_stats, insert_predictions, iter_tickets
+from src.db.writer import WRITE_BEHIND_ENABLED, PredictionWriter
+from src.ml import registry
+from src.ml.batching import MICRO_BATCH_ENABLED, PredictionBatcher
+from src.ml.artifacts import load_artifact
+from src.ml.cache import PredictionCache, description_key
+from src.ml.inference import compile_featurizer, compile_predictor
+from src.ml.jobs import SEARCH_STRATEGIES, TRAINING_MODES, JobAlreadyRunningError, JobNotFoundError, TrainingJobManager
+from src.ml.registry import ModelBundle, VersionNotFoundError
+from src.routes.docs import LazySwagger
 
 app = Flask(__name__)
 
@@ -35,77 +37,181 @@ swagger_config = {
     "version": "1.0.0",
 }
 
-swagger = Swagger(app, config=swagger_config)
+# flasgger загружается при первом запросе к документации (src.routes.docs)
+app.wsgi_app = swagger = LazySwagger(app, swagger_config)
 
-# Пути к файлам
-DATA_PATH = 'data/tickets.csv'
-MODEL_PATH = 'models/ticket_classifier.pkl'
-VECTORIZER_PATH = 'models/tfidf_vectorizer.pkl'
+# Количество и длительность запросов по маршрутам для GET /metrics
+metrics.instrument_flask(app)
 
-# Глобальные переменные для модели и векторизатора
-model, vectorizer = None, None
+# Максимальное количество тикетов в одном запросе /categorize/batch
+BATCH_MAX_SIZE = 10000
 
-# ==================== Утилиты ====================
-
-def export_tickets_to_csv():
-    """
-    Функция для экспорта данных из базы данных в tickets.csv.
-    """
-    connection = get_db_connection()
-    cursor = connection.cursor()
+# Размер страницы GET /tickets по умолчанию и максимальный
+TICKETS_PAGE_DEFAULT = 1000
+TICKETS_PAGE_MAX = 10000
 
-    cursor.execute("SELECT ticket_id, title, description, predicted_type FROM ticket_predictions")
-    tickets_from_db = cursor.fetchall()
+# Хранилище обучающих данных (переменная окружения DATASET_BACKEND)
+dataset = get_dataset(DATA_PATH)
 
-    # Если файл tickets.csv отсутствует, создаём его с корректными колонками
-    if not os.path.exists(DATA_PATH):
-        with open(DATA_PATH, mode='w', encoding='utf-8', newline='') as csv_file:
-            writer = csv.writer(csv_file, delimiter=';')
-            writer.writerow(['id', 'title', 'Type', 'Description'])
+# Активные модель и векторизатор (ModelBundle), заменяются целиком
+bundle = None
 
-    with open(DATA_PATH, mode='r', encoding='utf-8') as csv_file:
-        existing_data = list(csv.reader(csv_file, delimiter=';'))
-        existing_ids = {row[0] for row in existing_data[1:]}
+# Кэш предсказаний по нормализованному описанию, очищается при смене модели
+prediction_cache = PredictionCache()
 
-    # Преобразование данных из базы в формат CSV
-    new_tickets = []
-    for ticket in tickets_from_db:
-        ticket_id, title, description, predicted_type = ticket
+# Очередь отложенной записи предсказаний (включается переменной окружения WRITE_BEHIND=1)
+prediction_writer = PredictionWriter() if WRITE_BEHIND_ENABLED else None
 
-        new_row = [
-            ticket_id or "",    # id
-            title or "",        # title
-            predicted_type,     # Type
-            description         # Description
-        ]
+# ==================== Утилиты ====================
 
-        if str(ticket_id) not in existing_ids:
-            new_tickets.append(new_row)
+def predict_descriptions(current, descriptions):
+    """Одна векторизация и одно предсказание для списка описаний."""
+    started = time.perf_counter()
+    features = current.transformer.transform(descriptions)
+    vectorized = time.perf_counter()
+    predictions = current.classifier.predict(features)
+    metrics.observe_stage("vectorize", vectorized - started)
+    metrics.observe_stage("predict", time.perf_counter() - vectorized)
+    return predictions
+
+# Объединение одновременных запросов /categorize в пачки (включается переменной окружения MICRO_BATCH=1)
+prediction_batcher = PredictionBatcher(predict_descriptions) if MICRO_BATCH_ENABLED else None
+
+@profiling.profiled
+def predict_description(current, description, generation):
+    """Категория одного описания: из кэша или предсказанием (через пачки, если они включены)."""
+    cache_key = description_key(description, current.vectorizer)
+    prediction = prediction_cache.get(cache_key)
+    if prediction is None:
+        if prediction_batcher is not None:
+            prediction = prediction_batcher.predict(current, description)
+        else:
+            prediction = predict_descriptions(current, [description])[0]
+        prediction_cache.put(cache_key, prediction, generation)
+    return prediction
 
-    if new_tickets:
-        with open(DATA_PATH, mode='a', encoding='utf-8', newline='') as csv_file:
-            writer = csv.writer(csv_file, delimiter=';')
-            writer.writerows(new_tickets)
-        print(f"{len(new_tickets)} новых записей добавлено в {DATA_PATH}.")
+def classify_tickets(current, tickets, generation):
+    """
+    Проверка и предсказание для пакета тикетов. Возвращает результаты по каждому тикету
+    и строки (ticket_id, title, description, predicted_type) для сохранения в БД.
+    """
+    # Проверка тикетов: некорректные помечаются ошибкой и не попадают в предсказание
+    results = [None] * len(tickets)
+    valid_indexes = []
+    descriptions = []
+    for index, ticket in enumerate(tickets):
+        if not isinstance(ticket, dict):
+            results[index] = {"index": index, "error": "Некорректный формат тикета"}
+            continue
+        description = ticket.get('description', '')
+        if not description or not isinstance(description, str):
+            results[index] = {"index": index, "error": "Отсутствует описание тикета"}
+            continue
+        valid_indexes.append(index)
+        descriptions.append(description)
+
+    rows = []
+    if descriptions:
+        # Предсказание категорий одной разреженной матрицей для тикетов, которых нет в кэше
+        cache_keys = [description_key(description, current.vectorizer) for description in descriptions]
+        predictions = [prediction_cache.get(key) for key in cache_keys]
+        missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if missing:
+            predicted = predict_descriptions(current, [descriptions[i] for i in missing])
+            for i, prediction in zip(missing, predicted):
+                predictions[i] = prediction
+                prediction_cache.put(cache_keys[i], prediction, generation)
+
+        for index, description, prediction in zip(valid_indexes, descriptions, predictions):
+            ticket_id = tickets[index].get('id')
+            title = tickets[index].get('title', '')
+            prediction = str(prediction)
+            rows.append((ticket_id, title, description, prediction))
+            results[index] = {
+                "index": index,
+                "description": description,
+                "predicted_type": prediction,
+                "ticket_id": ticket_id,
+                "title": title
+            }
+
+    return results, rows
+
+def load_model_and_vectorizer(version=None):
+    """
+    Загружает версию модели из реестра (по умолчанию — активную) и атомарно подменяет
+    текущую связку модели и векторизатора. Если реестр пуст, используются
+    файлы MODEL_PATH и VECTORIZER_PATH. Числовые массивы отображаются в память
+    из артефактов joblib (src.ml.artifacts), если они есть.
+    """
+    global bundle
+    if version is None:
+        version = registry.get_current_version() or registry.LEGACY_VERSION
+
+    started = time.perf_counter()
+    if version != registry.LEGACY_VERSION:
+        model, vectorizer = registry.load_version(version)
+    elif os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
+        model = load_artifact(MODEL_PATH)
+        vectorizer = load_artifact(VECTORIZER_PATH)
     else:
-        print("Новых записей для добавления нет.")
-
-    cursor.close()
-    connection.close()
-
-def load_model_and_vectorizer():
-    global model, vectorizer
-    if os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
-        with open(MODEL_PATH, 'rb') as model_file:
-            model = pickle.load(model_file)
-        with open(VECTORIZER_PATH, 'rb') as vectorizer_file:
-            vectorizer = pickle.load(vectorizer_file)
-        return True
-    return False
+        return False
+
+    bundle = ModelBundle(
+        model, vectorizer, version,
+        predictor=compile_predictor(model), featurizer=compile_featurizer(vectorizer)
+    )
+    prediction_cache.clear()
+    metrics.set_model(version, bundle.loaded_at, time.perf_counter() - started)
+    return True
+
+def get_model_files():
+    """Пути к файлам модели и векторизатора активной версии."""
+    if bundle is not None and bundle.version != registry.LEGACY_VERSION:
+        return registry.version_files(bundle.version)
+    return MODEL_PATH, VECTORIZER_PATH
+
+def get_training_params(data):
+    """Параметры задачи обучения из тела запроса."""
+    mode = data.get('mode', 'full')
+    if mode not in TRAINING_MODES:
+        raise ValueError(f"Неизвестный режим обучения: {mode}")
+    if mode == 'online':
+        return {"mode": mode, "rebuild": bool(data.get('rebuild', False))}
+
+    params = {"load_from_db": bool(data.get('load_from_db', False))}
+    if data.get('n_jobs') is not None:
+        params["n_jobs"] = int(data['n_jobs'])
+    if data.get('search_strategy') is not None:
+        if data['search_strategy'] not in SEARCH_STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия подбора: {data['search_strategy']}")
+        params["search_strategy"] = data['search_strategy']
+    if data.get('halving_factor') is not None:
+        params["halving_factor"] = int(data['halving_factor'])
+        if params["halving_factor"] < 2:
+            raise ValueError("Параметр halving_factor должен быть не меньше 2")
+    if data.get('max_seconds') is not None:
+        params["max_seconds"] = float(data['max_seconds'])
+    if data.get('max_fits') is not None:
+        params["max_fits"] = int(data['max_fits'])
+    return params
+
+def load_trained_version(job):
+    """Загружает в этом процессе версию, которую задача job обучила и активировала."""
+    load_model_and_vectorizer(job["version"])
+
+# Задачи обучения выполняются в отдельных процессах
+training_jobs = TrainingJobManager(on_success=load_trained_version, on_finish=metrics.observe_training_job)
 
 # Загрузка модели при старте сервера
 load_model_and_vectorizer()
 
+# Профилирование по сигналу SIGUSR2 (src.profiling)
+profiling.install_signal_handler()
+
+# Токен для /admin/* (заголовок X-Admin-Token); без него эндпоинты администрирования выключены
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
 # ==================== Эндпоинты ====================
 
 @app.route('/status', methods=['GET'])
@@ -131,7 +237,286 @@ def status():
         "status": "API работает"
     })
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """
+    Статистика работы сервиса
+    ---
+    tags:
+      - Health Check
+    responses:
+      200:
+        description: Текущая статистика
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                model:
+                  type: object
+                  nullable: true
+                  description: Активная версия модели
+                  properties:
+                    version:
+                      type: string
+                      example: "20250301-120000-a1b2c3"
+                    loaded_at:
+                      type: number
+                      example: 1740830400.0
+                db_pool:
+                  type: object
+                  description: Статистика пула соединений с БД
+                  properties:
+                    size:
+                      type: integer
+                      example: 4
+                    idle:
+                      type: integer
+                      example: 3
+                    in_use:
+                      type: integer
+                      example: 1
+                    waiting:
+                      type: integer
+                      example: 0
+                    checkouts:
+                      type: integer
+                      example: 1520
+                    timeouts:
+                      type: integer
+                      example: 0
+                    checkout_avg_ms:
+                      type: number
+                      example: 0.052
+                    checkout_max_ms:
+                      type: number
+                      example: 12.7
+                prediction_cache:
+                  type: object
+                  description: Статистика кэша предсказаний
+                  properties:
+                    size:
+                      type: integer
+                      example: 812
+                    hits:
+                      type: integer
+                      example: 5310
+                    misses:
+                      type: integer
+                      example: 1204
+                    hit_ratio:
+                      type: number
+                      example: 0.8152
+                    evictions:
+                      type: integer
+                      example: 0
+                write_behind:
+                  type: object
+                  nullable: true
+                  description: Счётчики очереди отложенной записи (null, если режим выключен)
+                  properties:
+                    pending:
+                      type: integer
+                      example: 12
+                    queued:
+                      type: integer
+                      example: 10452
+                    flushed:
+                      type: integer
+                      example: 10440
+                    dropped:
+                      type: integer
+                      example: 0
+                    failed:
+                      type: integer
+                      example: 0
+                micro_batching:
+                  type: object
+                  nullable: true
+                  description: Статистика объединения запросов /categorize в пачки (null, если режим выключен)
+                  properties:
+                    requests:
+                      type: integer
+                      example: 20480
+                    batches:
+                      type: integer
+                      example: 1730
+                    avg_batch_size:
+                      type: number
+                      example: 11.84
+                    batch_size_histogram:
+                      type: object
+                      description: Накопленные счётчики пачек по размеру (le_<n> — не больше n описаний)
+                      example: {"le_1": 210, "le_2": 380, "le_4": 690, "le_8": 1020, "le_16": 1450, "le_32": 1700, "le_64": 1730, "le_inf": 1730}
+                    queue_delay_ms:
+                      type: object
+                      description: Время ожидания запроса в очереди до начала обработки его пачки
+                      properties:
+                        avg:
+                          type: number
+                          example: 1.42
+                        max:
+                          type: number
+                          example: 7.9
+                        histogram:
+                          type: object
+                          example: {"le_0.5": 4100, "le_1": 9800, "le_2": 18900, "le_5": 20400, "le_inf": 20480}
+    """
+    current = bundle
+    return jsonify({
+        "model": {"version": current.version, "loaded_at": current.loaded_at} if current is not None else None,
+        "db_pool": get_pool_stats(),
+        "prediction_cache": prediction_cache.stats(),
+        "write_behind": prediction_writer.stats() if prediction_writer is not None else None,
+        "micro_batching": prediction_batcher.stats() if prediction_batcher is not None else None
+    }), 200
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Метрики в формате Prometheus
+    ---
+    tags:
+      - Health Check
+    description: |
+      Количество и длительность запросов по маршрутам, длительность этапов /categorize
+      (json_parse, vectorize, predict, db_insert), время получения соединения с БД,
+      активная версия модели, длительность её загрузки и длительность задач обучения.
+      При запуске через main.py serve значения суммируются по всем рабочим процессам.
+    responses:
+      200:
+        description: Метрики
+        content:
+          text/plain:
+            schema:
+              type: string
+              example: |
+                ticket_api_stage_duration_seconds_bucket{le="0.0005",stage="vectorize"} 9731.0
+                ticket_api_model_info{pid="4121",version="20250301-120000-a1b2c3"} 1.0
+    """
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+@app.route('/admin/profile', methods=['POST'])
+def profile_process():
+    """
+    Профилирование процесса, обработавшего запрос
+    ---
+    tags:
+      - Health Check
+    description: |
+      Запускает на seconds секунд выборочный профиль всех потоков процесса и cProfile для
+      обработки /categorize, обучения и выгрузки из БД, затем записывает в PROFILE_DIR файл
+      collapsed stacks (.folded, для flamegraph.pl или speedscope) и статистику cProfile (.pstats).
+      Запрос ждёт окончания сеанса. Требует заголовок X-Admin-Token, равный переменной окружения
+      ADMIN_TOKEN; если она не задана, эндпоинт выключен.
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        required: true
+        schema:
+          type: string
+      - name: seconds
+        in: query
+        required: false
+        schema:
+          type: number
+          default: 10
+        description: Длительность сеанса (не больше PROFILE_MAX_SECONDS)
+      - name: interval_ms
+        in: query
+        required: false
+        schema:
+          type: number
+          default: 5
+        description: Интервал снятия стеков
+      - name: idle
+        in: query
+        required: false
+        schema:
+          type: boolean
+          default: false
+        description: Учитывать потоки, которые ждут (блокировки, select, очереди)
+      - name: format
+        in: query
+        required: false
+        schema:
+          type: string
+          enum: [json, collapsed]
+          default: json
+        description: json — отчёт о сеансе, collapsed — сам файл .folded
+    responses:
+      200:
+        description: Отчёт о сеансе или файл collapsed stacks
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                pid:
+                  type: integer
+                  example: 4121
+                samples:
+                  type: integer
+                  example: 1987
+                profiled_calls:
+                  type: integer
+                  example: 5230
+                skipped_calls:
+                  type: integer
+                  description: Вызовы, выполненные без cProfile, пока профилировался другой вызов
+                  example: 812
+                collapsed_path:
+                  type: string
+                  example: "profiles/profile-4121-20250301-120000-123.folded"
+                pstats_path:
+                  type: string
+                  nullable: true
+                  example: "profiles/profile-4121-20250301-120000-123.pstats"
+                top_functions:
+                  type: array
+                  items:
+                    type: object
+          text/plain:
+            schema:
+              type: string
+              example: "MainThread;run (gthread.py:80);categorize (service.py:395) 412"
+      400:
+        description: Некорректные параметры
+      403:
+        description: Неверный токен или профилирование выключено
+      409:
+        description: Профилирование уже выполняется
+    """
+    token = request.headers.get('X-Admin-Token', '')
+    if not ADMIN_TOKEN or not hmac.compare_digest(token, ADMIN_TOKEN):
+        return jsonify({"error": "Доступ запрещён"}), 403
+
+    try:
+        seconds = float(request.args.get('seconds', profiling.PROFILE_DEFAULT_SECONDS))
+        interval_ms = float(request.args.get('interval_ms', profiling.PROFILE_INTERVAL_MS))
+    except ValueError:
+        return jsonify({"error": "Параметры seconds и interval_ms должны быть числами"}), 400
+    if not 0 < seconds <= profiling.PROFILE_MAX_SECONDS:
+        return jsonify({"error": f"Параметр seconds должен быть от 0 до {profiling.PROFILE_MAX_SECONDS}"}), 400
+    if interval_ms <= 0:
+        return jsonify({"error": "Параметр interval_ms должен быть больше 0"}), 400
+    output_format = request.args.get('format', 'json')
+    if output_format not in ('json', 'collapsed'):
+        return jsonify({"error": "Параметр format должен быть json или collapsed"}), 400
+    include_idle = request.args.get('idle', 'false').lower() in ('1', 'true')
+
+    try:
+        _, report = profiling.run_session(seconds, interval_ms, include_idle)
+    except profiling.ProfilerBusyError as e:
+        return jsonify({"error": str(e)}), 409
+
+    if output_format == 'collapsed':
+        return send_file(os.path.abspath(report["collapsed_path"]), mimetype='text/plain')
+    return jsonify(report), 200
+
 @app.route('/categorize', methods=['POST'])
+@profiling.profiled
 def categorize():
     """
     Категоризация тикета
@@ -186,11 +571,18 @@ def categorize():
                   example: "Отсутствует описание тикета"
       500:
         description: Ошибка на сервере
+      503:
+        description: Предсказание не получено за MICRO_BATCH_TIMEOUT секунд (включён micro-batching)
     """
-    if model is None or vectorizer is None:
+    # Поколение кэша фиксируется до чтения модели: предсказание старой модели не попадёт в кэш после смены
+    generation = prediction_cache.generation
+    current = bundle
+    if current is None:
         return jsonify({"error": "Модель не загружена"}), 500
 
+    started = time.perf_counter()
     data = request.get_json()
+    metrics.observe_stage("json_parse", time.perf_counter() - started)
     description = data.get('description', '')
     ticket_id = data.get('id')
     title = data.get('title', '')
@@ -198,24 +590,33 @@ def categorize():
     if not description:
         return jsonify({"error": "Отсутствует описание тикета"}), 400
 
-    # Предсказание категории
-    vectorized_description = vectorizer.transform([description])
-    prediction = model.predict(vectorized_description)[0]
+    # Предсказание категории (повторяющиеся описания берутся из кэша)
+    try:
+        prediction = predict_description(current, description, generation)
+    except TimeoutError:
+        # Очередь micro-batching не успела обработать запрос
+        return jsonify({"error": "Превышено время ожидания предсказания"}), 503
 
     # Сохранение в БД
-    try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            query = """
-                INSERT INTO ticket_predictions (ticket_id, title, description, predicted_type)
-                VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (ticket_id, title, description, prediction))
-        conn.commit()
-        conn.close()
-    except Exception as e:
-        print("Ошибка сохранения в БД:", e)
-        return jsonify({"error": "Ошибка сохранения данных в БД"}), 500
+    started = time.perf_counter()
+    if prediction_writer is not None:
+        # Отложенная запись: строка сохраняется фоновым потоком, ошибки БД не влияют на ответ
+        prediction_writer.put((ticket_id, title, description, str(prediction)))
+        metrics.observe_stage("db_enqueue", time.perf_counter() - started)
+    else:
+        try:
+            with db_connection() as conn:
+                with conn.cursor() as cursor:
+                    query = """
+                        INSERT INTO ticket_predictions (ticket_id, title, description, predicted_type)
+                        VALUES (%s, %s, %s, %s)
+                    """
+                    cursor.execute(query, (ticket_id, title, description, prediction))
+                conn.commit()
+        except Exception as e:
+            print("Ошибка сохранения в БД:", e)
+            return jsonify({"error": "Ошибка сохранения данных в БД"}), 500
+        metrics.observe_stage("db_insert", time.perf_counter() - started)
 
     return jsonify({
         "description": description,
@@ -224,6 +625,110 @@ def categorize():
         "title": title
     }), 200
 
+@app.route('/categorize/batch', methods=['POST'])
+@profiling.profiled
+def categorize_batch():
+    """
+    Пакетная категоризация тикетов
+    ---
+    tags:
+      - Ticket Categorization
+    requestBody:
+      required: true
+      content:
+        application/json:
+          schema:
+            type: object
+            properties:
+              tickets:
+                type: array
+                items:
+                  type: object
+                  properties:
+                    description:
+                      type: string
+                      example: "Текст тикета"
+                    id:
+                      type: string
+                      example: "12345"
+                    title:
+                      type: string
+                      example: "Название тикета"
+    responses:
+      200:
+        description: Пакет обработан. Ошибки отдельных тикетов возвращаются в поле error соответствующего элемента.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                results:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      index:
+                        type: integer
+                        example: 0
+                      predicted_type:
+                        type: string
+                        example: "Bug"
+                      ticket_id:
+                        type: string
+                        example: "12345"
+                      title:
+                        type: string
+                        example: "Название тикета"
+                      error:
+                        type: string
+                        example: "Отсутствует описание тикета"
+                processed:
+                  type: integer
+                  example: 1
+                failed:
+                  type: integer
+                  example: 0
+      400:
+        description: Ошибка в запросе
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                error:
+                  type: string
+                  example: "Список тикетов пуст или отсутствует"
+      500:
+        description: Ошибка на сервере
+    """
+    generation = prediction_cache.generation
+    current = bundle
+    if current is None:
+        return jsonify({"error": "Модель не загружена"}), 500
+
+    data = request.get_json(silent=True) or {}
+    tickets = data.get('tickets')
+
+    if not isinstance(tickets, list) or not tickets:
+        return jsonify({"error": "Список тикетов пуст или отсутствует"}), 400
+    if len(tickets) > BATCH_MAX_SIZE:
+        return jsonify({"error": f"Размер пакета превышает {BATCH_MAX_SIZE} тикетов"}), 400
+
+    results, rows = classify_tickets(current, tickets, generation)
+    if rows:
+        # Сохранение в БД одним INSERT в одной транзакции
+        try:
+            insert_predictions(rows)
+        except Exception as e:
+            print("Ошибка сохранения в БД:", e)
+            return jsonify({"error": "Ошибка сохранения данных в БД"}), 500
+
+    return jsonify({
+        "results": results,
+        "processed": len(rows),
+        "failed": len(tickets) - len(rows)
+    }), 200
+
 @app.route('/data', methods=['POST', 'GET'])
 def manage_data():
     """
@@ -231,6 +736,41 @@ def manage_data():
     ---
     tags:
       - Data Management
+    description: >
+      POST загружает новый файл данных. GET возвращает данные: json — один документ {"data": [...]},
+      ndjson — поток записей по одной JSON-строке, csv — поток CSV (без параметров файл
+      передаётся как есть). Файл читается порциями, поэтому для ndjson и csv память
+      не зависит от размера данных.
+    parameters:
+      - name: format
+        in: query
+        required: false
+        schema:
+          type: string
+          enum: [json, ndjson, csv]
+          example: ndjson
+        description: Формат ответа GET (по умолчанию json).
+      - name: offset
+        in: query
+        required: false
+        schema:
+          type: integer
+          example: 0
+        description: Сколько первых строк пропустить.
+      - name: limit
+        in: query
+        required: false
+        schema:
+          type: integer
+          example: 1000
+        description: Максимальное количество строк.
+      - name: columns
+        in: query
+        required: false
+        schema:
+          type: string
+          example: "Type,Description"
+        description: Список колонок через запятую.
     requestBody:
       required: true
       content:
@@ -244,6 +784,18 @@ def manage_data():
                 type: string
                 format: binary
                 description: CSV-файл с данными тикетов
+              mode:
+                type: string
+                enum: [replace, append, merge]
+                description: replace — заменить данные, append — дописать строки, merge — дописать строки с заменой существующих по id.
+                example: replace
+              strict:
+                type: boolean
+                description: Отклонить файл при первой некорректной строке (по умолчанию такие строки пропускаются).
+                example: false
+              checksum:
+                type: string
+                description: Ожидаемая контрольная сумма SHA-256 файла.
     responses:
       200:
         description: Успешный ответ
@@ -255,6 +807,27 @@ def manage_data():
                 message:
                   type: string
                   example: "Файл успешно загружен"
+                mode:
+                  type: string
+                  example: "replace"
+                rows_total:
+                  type: integer
+                  example: 1536
+                rows_written:
+                  type: integer
+                  example: 1535
+                rows_invalid:
+                  type: integer
+                  example: 1
+                rows_replaced:
+                  type: integer
+                  example: 0
+                checksum:
+                  type: string
+                  example: "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+                bytes:
+                  type: integer
+                  example: 408874
       400:
         description: Ошибка запроса
         content:
@@ -283,23 +856,69 @@ def manage_data():
         if not file.filename.endswith('.csv'):
             return jsonify({"error": "Файл должен быть в формате CSV"}), 400
 
-        temp_path = os.path.join('data', 'temp.csv')
-        file.save(temp_path)
-
+        # Файл проверяется и записывается за один проход, текущие данные заменяются атомарно
         try:
-            data = pd.read_csv(temp_path, delimiter=';', usecols=['Description', 'Type'])
-            shutil.copy(temp_path, DATA_PATH)
-            os.remove(temp_path)
-            return jsonify({"message": "Файл успешно загружен"}), 200
+            report = dataset.ingest(
+                file.stream,
+                mode=request.form.get('mode', 'replace'),
+                strict=request.form.get('strict', 'false').lower() in ('1', 'true', 'yes'),
+                expected_checksum=request.form.get('checksum')
+            )
+            return jsonify(dict(report, message="Файл успешно загружен")), 200
+        except DataLockedError as e:
+            return jsonify({"error": str(e)}), 409
         except Exception as e:
-            os.remove(temp_path)
             return jsonify({"error": f"Ошибка при обработке файла: {str(e)}"}), 400
 
     if request.method == 'GET':
-        if not os.path.exists(DATA_PATH):
+        if not dataset.exists():
             return jsonify({"error": "Файл данных отсутствует"}), 404
-        data = pd.read_csv(DATA_PATH, delimiter=';', on_bad_lines='skip').to_dict(orient='records')
-        return jsonify({"data": data}), 200
+
+        output_format = request.args.get('format', 'json')
+        if output_format not in ('json', 'ndjson', 'csv'):
+            return jsonify({"error": "Параметр format должен быть json, ndjson или csv"}), 400
+        try:
+            offset = int(request.args.get('offset', 0))
+            limit = int(request.args['limit']) if request.args.get('limit') is not None else None
+        except ValueError:
+            return jsonify({"error": "Параметры offset и limit должны быть целыми числами"}), 400
+        if offset < 0 or (limit is not None and limit < 0):
+            return jsonify({"error": "Параметры offset и limit не могут быть отрицательными"}), 400
+        columns = request.args.get('columns')
+        columns = [column.strip() for column in columns.split(',') if column.strip()] if columns else None
+
+        # Без фильтров CSV отдаётся как есть, без разбора
+        if output_format == 'csv' and dataset.backend == 'csv' and columns is None and not offset and limit is None:
+            return Response(iter_raw(dataset.path), mimetype='text/csv')
+
+        try:
+            chunks = dataset.iter_chunks(columns=columns, offset=offset, limit=limit)
+            # Первая порция читается до начала ответа, чтобы ошибки вернулись кодом 400
+            first = next(chunks, None)
+        except (DatasetColumnsError, ValueError) as e:
+            return jsonify({"error": f"Ошибка при чтении данных: {str(e)}"}), 400
+
+        if output_format == 'json':
+            data = [] if first is None else first.to_dict(orient='records')
+            for chunk in chunks:
+                data.extend(chunk.to_dict(orient='records'))
+            return jsonify({"data": data}), 200
+
+        def generate():
+            if first is None:
+                return
+            if output_format == 'csv':
+                yield first.to_csv(sep=';', index=False)
+                for chunk in chunks:
+                    yield chunk.to_csv(sep=';', index=False, header=False)
+            else:
+                # Завершающий перевод строки to_json добавляет не во всех версиях pandas
+                yield first.to_json(orient='records', lines=True, force_ascii=False).rstrip("\n") + "\n"
+                for chunk in chunks:
+                    yield chunk.to_json(orient='records', lines=True, force_ascii=False).rstrip("\n") + "\n"
+
+        mimetype = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+        return Response(generate(), mimetype=mimetype)
 
 @app.route('/model-files', methods=['GET', 'POST'])
 def manage_model_files():
@@ -388,26 +1007,124 @@ def manage_model_files():
             return jsonify({"error": "Оба файла (модель и векторизатор) должны быть предоставлены"}), 400
 
         try:
-            model_file.save(MODEL_PATH)
-            vectorizer_file.save(VECTORIZER_PATH)
-            load_model_and_vectorizer()
-            return jsonify({"message": "Модель и векторизатор успешно загружены"}), 200
+            # Файлы сохраняются новой версией в реестре, текущая модель не перезаписывается
+            version = registry.import_files(model_file, vectorizer_file, meta={"source": "upload"})
+            registry.set_current_version(version)
+            load_model_and_vectorizer(version)
+            return jsonify({"message": "Модель и векторизатор успешно загружены", "version": version}), 200
         except Exception as e:
             return jsonify({"error": f"Ошибка при загрузке файлов: {str(e)}"}), 500
 
     elif request.method == 'GET':
         file_type = request.args.get('type')
+        model_path, vectorizer_path = get_model_files()
         if file_type == 'model':
-            if not os.path.exists(MODEL_PATH):
+            if not os.path.exists(model_path):
                 return jsonify({"error": "Файл модели отсутствует"}), 404
-            return send_file(os.path.abspath(MODEL_PATH), as_attachment=True)
+            return send_file(os.path.abspath(model_path), as_attachment=True, download_name='ticket_classifier.pkl')
         elif file_type == 'vectorizer':
-            if not os.path.exists(VECTORIZER_PATH):
+            if not os.path.exists(vectorizer_path):
                 return jsonify({"error": "Файл векторизатора отсутствует"}), 404
-            return send_file(os.path.abspath(VECTORIZER_PATH), as_attachment=True)
+            return send_file(os.path.abspath(vectorizer_path), as_attachment=True, download_name='tfidf_vectorizer.pkl')
         else:
             return jsonify({"error": "Некорректный параметр запроса. Укажите 'type=model' или 'type=vectorizer'."}), 400
 
+@app.route('/models', methods=['GET'])
+def list_models():
+    """
+    Список версий модели
+    ---
+    tags:
+      - Model Management
+    summary: Список версий модели в реестре
+    description: Возвращает все сохранённые версии модели и активную версию.
+    responses:
+      200:
+        description: Список версий.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                current:
+                  type: string
+                  example: "20250301-120000-a1b2c3"
+                versions:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      version:
+                        type: string
+                        example: "20250301-120000-a1b2c3"
+                      created_at:
+                        type: string
+                        example: "2025-03-01T12:00:00"
+                      source:
+                        type: string
+                        example: "training"
+    """
+    return jsonify({
+        "current": bundle.version if bundle is not None else None,
+        "versions": registry.list_versions()
+    }), 200
+
+@app.route('/models/<version>/activate', methods=['POST'])
+def activate_model(version):
+    """
+    Активация версии модели
+    ---
+    tags:
+      - Model Management
+    summary: Переключение на указанную версию модели
+    description: Загружает версию из реестра и атомарно подменяет ей текущую модель без перезапуска сервиса. Подходит для отката на предыдущую версию. Версия "legacy" — файлы models/ticket_classifier.pkl и models/tfidf_vectorizer.pkl.
+    parameters:
+      - name: version
+        in: path
+        required: true
+        schema:
+          type: string
+        description: Идентификатор версии
+        example: "20250301-120000-a1b2c3"
+    responses:
+      200:
+        description: Версия активирована.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  example: "Активна версия модели 20250301-120000-a1b2c3"
+      404:
+        description: Версия не найдена.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                error:
+                  type: string
+                  example: "Версия 20250301-120000-a1b2c3 не найдена"
+      500:
+        description: Ошибка загрузки версии.
+    """
+    if version != registry.LEGACY_VERSION and not registry.version_exists(version):
+        return jsonify({"error": f"Версия {version} не найдена"}), 404
+
+    try:
+        # Сначала загружаем версию в память и только потом переключаем указатель
+        if not load_model_and_vectorizer(version):
+            return jsonify({"error": f"Версия {version} не найдена"}), 404
+        registry.set_current_version(version)
+    except VersionNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        return jsonify({"error": f"Ошибка при загрузке версии: {str(e)}"}), 500
+
+    return jsonify({"message": f"Активна версия модели {version}"}), 200
+
 @app.route('/train-model', methods=['POST'])
 def train_model():
     """
@@ -426,6 +1143,27 @@ def train_model():
                 type: boolean
                 description: Загрузить дополнительные данные из базы перед обучением.
                 example: true
+              n_jobs:
+                type: integer
+                description: Количество процессов для подбора гиперпараметров (-1 — все ядра). По умолчанию берётся из переменной окружения TRAIN_N_JOBS.
+                example: 8
+              search_strategy:
+                type: string
+                enum: [grid, halving]
+                description: Стратегия подбора — полный перебор (grid) или последовательное деление (halving). По умолчанию берётся из переменной окружения TRAIN_SEARCH_STRATEGY.
+                example: halving
+              halving_factor:
+                type: integer
+                description: Во сколько раз сокращается число кандидатов на каждом шаге halving.
+                example: 3
+              max_seconds:
+                type: number
+                description: Срок в секундах, после которого подбор для следующих моделей не начинается (начатый подбор не прерывается).
+                example: 300
+              max_fits:
+                type: integer
+                description: Бюджет на общее количество обучений при подборе.
+                example: 500
     responses:
       200:
         description: Модель успешно обучена.
@@ -465,107 +1203,413 @@ def train_model():
                   example: "Ошибка обучения модели: <описание ошибки>"
     """
     # Проверяем, передал ли пользователь параметр для догрузки данных из БД
-    data = request.get_json()
-    load_from_db = data.get('load_from_db', False)
-
-    if load_from_db:
-        # Догружаем записи из базы данных в tickets.csv
-        export_tickets_to_csv()
-        db_message = "Данные из базы данных успешно добавлены в tickets.csv. "
+    data = request.get_json(silent=True) or {}
 
+    # Обучение выполняется отдельным процессом, запрос только дожидается его завершения
     try:
-        # Шаг 1: Загрузка данных
-        if not os.path.exists(DATA_PATH):
-            return jsonify({"error": "Файл tickets.csv не найден"}), 404
-        data = pd.read_csv(DATA_PATH, delimiter=';')
-
-        # Проверка наличия обязательных колонок
-        required_columns = ['Description', 'Type']
-        if not all(col in data.columns for col in required_columns):
-            return jsonify({"error": f"Отсутствуют обязательные колонки: {required_columns}"}), 400
-
-        # Шаг 2: Предобработка данных
-        data = data.dropna(subset=['Description', 'Type'])
-        data['Description'] = data['Description'].str.lower()
-        data['Description'] = data['Description'].str.replace(r'[^a-zA-Z\s]', '', regex=True)
-
-        X = data['Description']
-        y = data['Type']
-
-        # Шаг 3: Разделение на обучающую и тестовую выборку
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-
-        # Шаг 4: Векторизация текста
-        vectorizer = TfidfVectorizer(max_features=5000, stop_words='english', ngram_range=(1, 2))
-        X_train_tfidf = vectorizer.fit_transform(X_train)
-        X_test_tfidf = vectorizer.transform(X_test)
-
-        # Шаг 5: Обработка дисбаланса классов
-        smote = SMOTE(random_state=42)
-        X_resampled, y_resampled = smote.fit_resample(X_train_tfidf, y_train)
-
-        # Шаг 6: Обучение моделей
-        models = {
-            "Logistic Regression": LogisticRegression(random_state=42, max_iter=1000),
-            "KNN": KNeighborsClassifier(),
-            "Random Forest": RandomForestClassifier(random_state=42),
-            "SVM": SVC(random_state=42, probability=True),
-            "Gradient Boosting": GradientBoostingClassifier(random_state=42)
-        }
+        job = training_jobs.start(get_training_params(data))
+    except JobAlreadyRunningError as e:
+        return jsonify({"error": "Обучение уже выполняется", "job_id": e.job_id}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Некорректные параметры обучения: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"Ошибка обучения модели: {str(e)}"}), 500
 
-        param_grids = {
-            "Logistic Regression": {'C': [0.1, 1, 10], 'solver': ['lbfgs', 'liblinear']},
-            "KNN": {'n_neighbors': [3, 5, 7], 'weights': ['uniform', 'distance']},
-            "Random Forest": {'n_estimators': [100, 200], 'max_depth': [None, 10], 'min_samples_split': [2, 5]},
-            "SVM": {'C': [0.1, 1, 10], 'kernel': ['linear', 'rbf']},
-            "Gradient Boosting": {'n_estimators': [50, 100], 'learning_rate': [0.1, 0.2], 'max_depth': [3, 5]}
-        }
+    job = training_jobs.wait(job["id"])
+    if job["status"] != "succeeded":
+        return jsonify({"error": job.get("error") or "Ошибка обучения модели"}), job.get("error_status", 500)
 
-        best_model_name = None
-        best_model = None
-        best_accuracy = 0
-
-        for model_name, model in models.items():
-            grid_search = GridSearchCV(model, param_grids[model_name], cv=3, scoring='accuracy')
-            grid_search.fit(X_resampled, y_resampled)
-            best_model_candidate = grid_search.best_estimator_
-
-            # Оценка модели
-            accuracy = accuracy_score(y_test, best_model_candidate.predict(X_test_tfidf))
-            if accuracy > best_accuracy:
-                best_accuracy = accuracy
-                best_model_name = model_name
-                best_model = best_model_candidate
-
-        # Шаг 7: Сохранение лучшей модели и векторизатора
-        with open(MODEL_PATH, 'wb') as model_file:
-            pickle.dump(best_model, model_file)
-            
-        with open(VECTORIZER_PATH, 'wb') as vectorizer_file:
-            pickle.dump(vectorizer, vectorizer_file)
-
-        load_model_and_vectorizer()
-
-        return jsonify({
-            "message": f"{db_message}Обучение завершено. Лучшая модель: {best_model_name} с точностью {best_accuracy:.4f}",
-            "model_path": MODEL_PATH,
-            "vectorizer_path": VECTORIZER_PATH
-        }), 200
+    report = job["report"]
+    return jsonify({
+        "message": report["message"],
+        "version": report["version"],
+        "model_path": report["model_path"],
+        "vectorizer_path": report["vectorizer_path"]
+    }), 200
 
+@app.route('/train-online', methods=['POST'])
+def train_online():
+    """
+    Дообучение онлайн-модели
+    ---
+    tags:
+      - Model Training
+    description: >
+      Дообучает онлайн-модель (HashingVectorizer + SGDClassifier) только на строках ticket_predictions,
+      добавленных после предыдущего дообучения, и сразу активирует новую версию.
+      Если онлайн-модели ещё нет или передан rebuild=true, она пересобирается по tickets.csv и всей таблице.
+    requestBody:
+      required: false
+      content:
+        application/json:
+          schema:
+            type: object
+            properties:
+              rebuild:
+                type: boolean
+                description: Пересобрать онлайн-модель с нуля.
+                example: false
+    responses:
+      200:
+        description: Онлайн-модель обновлена.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  example: "Дообучение онлайн-модели завершено. Обработано строк: 42"
+                version:
+                  type: string
+                  example: "20240101-120000-123456-ab12"
+                changed:
+                  type: boolean
+                  description: Сохранена ли новая версия. false — новых строк нет, текущая модель не менялась.
+                  example: true
+                watermark:
+                  type: integer
+                  example: 1042
+                rows:
+                  type: integer
+                  example: 42
+      409:
+        description: Уже выполняется другая задача обучения.
+      500:
+        description: Ошибка обучения модели.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        job = training_jobs.start(get_training_params(dict(data, mode='online')))
+    except JobAlreadyRunningError as e:
+        return jsonify({"error": "Обучение уже выполняется", "job_id": e.job_id}), 409
     except Exception as e:
         return jsonify({"error": f"Ошибка обучения модели: {str(e)}"}), 500
-    
+
+    job = training_jobs.wait(job["id"])
+    if job["status"] != "succeeded":
+        return jsonify({"error": job.get("error") or "Ошибка обучения модели"}), job.get("error_status", 500)
+
+    report = job["report"]
+    return jsonify({
+        "message": report["message"],
+        "version": report["version"],
+        "changed": report.get("changed", True),
+        "rebuild": report["rebuild"],
+        "watermark": report["watermark"],
+        "rows": report["rows"],
+        "skipped_unknown_type": report["skipped_unknown_type"]
+    }), 200
+
+@app.route('/train-jobs', methods=['POST'])
+def start_training_job():
+    """
+    Запуск обучения в фоне
+    ---
+    tags:
+      - Model Training
+    summary: Запуск задачи обучения
+    description: Запускает обучение в отдельном процессе и сразу возвращает идентификатор задачи. Одновременно может выполняться только одна задача.
+    requestBody:
+      required: false
+      content:
+        application/json:
+          schema:
+            type: object
+            properties:
+              mode:
+                type: string
+                enum: [full, online]
+                description: full — полное обучение с подбором гиперпараметров, online — дообучение онлайн-модели на новых строках ticket_predictions.
+                example: full
+              rebuild:
+                type: boolean
+                description: Только для mode=online. Пересобрать онлайн-модель с нуля по tickets.csv и всей таблице.
+                example: false
+              load_from_db:
+                type: boolean
+                description: Загрузить дополнительные данные из базы перед обучением.
+                example: true
+              n_jobs:
+                type: integer
+                description: Количество процессов для подбора гиперпараметров (-1 — все ядра). По умолчанию берётся из переменной окружения TRAIN_N_JOBS.
+                example: 8
+              search_strategy:
+                type: string
+                enum: [grid, halving]
+                description: Стратегия подбора — полный перебор (grid) или последовательное деление (halving). По умолчанию берётся из переменной окружения TRAIN_SEARCH_STRATEGY.
+                example: halving
+              halving_factor:
+                type: integer
+                description: Во сколько раз сокращается число кандидатов на каждом шаге halving.
+                example: 3
+              max_seconds:
+                type: number
+                description: Срок в секундах, после которого подбор для следующих моделей не начинается (начатый подбор не прерывается).
+                example: 300
+              max_fits:
+                type: integer
+                description: Бюджет на общее количество обучений при подборе.
+                example: 500
+    responses:
+      202:
+        description: Задача запущена.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                job_id:
+                  type: string
+                  example: "5f0c6d0e8f4b4a0c9a3d2b1e7f6a5c4d"
+                status:
+                  type: string
+                  example: "queued"
+      409:
+        description: Уже выполняется другая задача обучения.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                error:
+                  type: string
+                  example: "Обучение уже выполняется"
+                job_id:
+                  type: string
+                  example: "5f0c6d0e8f4b4a0c9a3d2b1e7f6a5c4d"
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        job = training_jobs.start(get_training_params(data))
+    except JobAlreadyRunningError as e:
+        return jsonify({"error": "Обучение уже выполняется", "job_id": e.job_id}), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Некорректные параметры обучения: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": f"Ошибка запуска обучения: {str(e)}"}), 500
+
+    return jsonify({"job_id": job["id"], "status": job["status"]}), 202
+
+@app.route('/train-jobs', methods=['GET'])
+def list_training_jobs():
+    """
+    Список задач обучения
+    ---
+    tags:
+      - Model Training
+    summary: Список задач обучения
+    description: Возвращает задачи обучения, начиная с последней.
+    responses:
+      200:
+        description: Список задач.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                jobs:
+                  type: array
+                  items:
+                    type: object
+    """
+    jobs = [{key: value for key, value in job.items() if key != "report"} for job in training_jobs.list()]
+    return jsonify({"jobs": jobs}), 200
+
+@app.route('/train-jobs/<job_id>', methods=['GET'])
+def get_training_job(job_id):
+    """
+    Статус задачи обучения
+    ---
+    tags:
+      - Model Training
+    summary: Статус и прогресс задачи обучения
+    parameters:
+      - name: job_id
+        in: path
+        required: true
+        schema:
+          type: string
+        description: Идентификатор задачи
+    responses:
+      200:
+        description: Состояние задачи.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                id:
+                  type: string
+                  example: "5f0c6d0e8f4b4a0c9a3d2b1e7f6a5c4d"
+                status:
+                  type: string
+                  enum: [queued, running, cancelling, succeeded, failed, cancelled]
+                  example: "running"
+                progress:
+                  type: object
+                  properties:
+                    stage:
+                      type: string
+                      example: "search"
+                    percent:
+                      type: integer
+                      example: 39
+                    message:
+                      type: string
+                      example: "Подбор параметров: KNN"
+                error:
+                  type: string
+                  nullable: true
+      404:
+        description: Задача не найдена.
+    """
+    try:
+        job = training_jobs.get(job_id)
+    except JobNotFoundError:
+        return jsonify({"error": f"Задача {job_id} не найдена"}), 404
+    job.pop("report", None)
+    return jsonify(job), 200
+
+@app.route('/train-jobs/<job_id>/cancel', methods=['POST'])
+def cancel_training_job(job_id):
+    """
+    Отмена задачи обучения
+    ---
+    tags:
+      - Model Training
+    parameters:
+      - name: job_id
+        in: path
+        required: true
+        schema:
+          type: string
+        description: Идентификатор задачи
+    responses:
+      200:
+        description: Отмена запрошена.
+      404:
+        description: Задача не найдена.
+      409:
+        description: Задача уже завершена.
+    """
+    try:
+        cancelled = training_jobs.cancel(job_id)
+    except JobNotFoundError:
+        return jsonify({"error": f"Задача {job_id} не найдена"}), 404
+    if not cancelled:
+        return jsonify({"error": "Задача уже завершена"}), 409
+    return jsonify({"message": f"Задача {job_id} отменяется"}), 200
+
+@app.route('/train-jobs/<job_id>/report', methods=['GET'])
+def get_training_report(job_id):
+    """
+    Отчёт об обучении
+    ---
+    tags:
+      - Model Training
+    parameters:
+      - name: job_id
+        in: path
+        required: true
+        schema:
+          type: string
+        description: Идентификатор задачи
+    responses:
+      200:
+        description: Итоговый отчёт успешно завершённой задачи.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  example: "Обучение завершено. Лучшая модель: Logistic Regression с точностью 0.9452"
+                best_model:
+                  type: string
+                  example: "Logistic Regression"
+                accuracy:
+                  type: number
+                  example: 0.9452
+                models:
+                  type: object
+                  description: Точность, лучшие параметры и время подбора для каждой модели
+                version:
+                  type: string
+                  example: "20250301-120000-a1b2c3"
+      404:
+        description: Задача не найдена.
+      409:
+        description: Задача ещё выполняется или завершилась неудачно.
+    """
+    try:
+        job = training_jobs.get(job_id)
+    except JobNotFoundError:
+        return jsonify({"error": f"Задача {job_id} не найдена"}), 404
+    if job["status"] != "succeeded":
+        if job["status"] in ("failed", "cancelled"):
+            return jsonify({"error": job.get("error") or f"Задача завершилась со статусом {job['status']}"}), 409
+        return jsonify({"error": "Обучение ещё не завершено"}), 409
+    return jsonify(job["report"]), 200
+
 @app.route('/tickets', methods=['GET'])
 def get_tickets():
     """
-    Получение всех записей
+    Получение записей
     ---
     tags:
       - Tickets
-    summary: Получение всех записей тикетов
-    description: Возвращает все записи тикетов из базы данных.
+    summary: Получение записей тикетов постранично или потоком
+    description: >
+      Возвращает записи тикетов по возрастанию id. В формате json ответ содержит одну страницу
+      (не больше limit записей) и курсор next_cursor для запроса следующей страницы.
+      В формате ndjson записи передаются потоком по одной JSON-строке на тикет, без ограничения
+      количества (если не задан limit); память сервиса при этом не зависит от размера таблицы.
+    parameters:
+      - name: limit
+        in: query
+        required: false
+        schema:
+          type: integer
+          example: 100
+        description: Размер страницы (по умолчанию 1000, максимум 10000). Для ndjson — необязательное ограничение количества записей.
+      - name: cursor
+        in: query
+        required: false
+        schema:
+          type: integer
+          example: 1000
+        description: Значение next_cursor предыдущей страницы — вернуть записи с id больше него.
+      - name: predicted_type
+        in: query
+        required: false
+        schema:
+          type: string
+          example: "Bug"
+        description: Вернуть только записи с указанной категорией.
+      - name: min_id
+        in: query
+        required: false
+        schema:
+          type: integer
+          example: 1
+        description: Минимальный id (включительно).
+      - name: max_id
+        in: query
+        required: false
+        schema:
+          type: integer
+          example: 5000
+        description: Максимальный id (включительно).
+      - name: format
+        in: query
+        required: false
+        schema:
+          type: string
+          enum: [json, ndjson]
+          example: json
+        description: Формат ответа.
     responses:
       200:
         description: Записи успешно получены.
@@ -591,6 +1635,24 @@ def get_tickets():
                       predicted_type:
                         type: string
                         example: "Bug"
+                next_cursor:
+                  type: integer
+                  nullable: true
+                  example: 1000
+          application/x-ndjson:
+            schema:
+              type: string
+              example: '{"id": 1, "title": "Ошибка загрузки отчета", "description": "...", "predicted_type": "Bug"}'
+      400:
+        description: Некорректные параметры запроса.
+        content:
+          application/json:
+            schema:
+              type: object
+              properties:
+                error:
+                  type: string
+                  example: "Параметр limit должен быть целым числом от 1 до 10000"
       500:
         description: Ошибка при получении данных из базы.
         content:
@@ -602,25 +1664,49 @@ def get_tickets():
                   type: string
                   example: "Ошибка при получении данных из базы"
     """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, title, description, predicted_type FROM ticket_predictions")
-        tickets = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
+    output_format = request.args.get('format', 'json')
+    if output_format not in ('json', 'ndjson'):
+        return jsonify({"error": "Параметр format должен быть json или ndjson"}), 400
+
+    filters = {"predicted_type": request.args.get('predicted_type')}
+    for name, param in (("after_id", "cursor"), ("min_id", "min_id"), ("max_id", "max_id")):
+        value = request.args.get(param)
+        if value is not None:
+            try:
+                filters[name] = int(value)
+            except ValueError:
+                return jsonify({"error": f"Параметр {param} должен быть целым числом"}), 400
+
+    limit = request.args.get('limit')
+    if limit is not None or output_format == 'json':
+        try:
+            limit = int(limit) if limit is not None else TICKETS_PAGE_DEFAULT
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= TICKETS_PAGE_MAX:
+            return jsonify({"error": f"Параметр limit должен быть целым числом от 1 до {TICKETS_PAGE_MAX}"}), 400
 
-        tickets_list = [
-            {"id": ticket[0], "title": ticket[1], "description": ticket[2], "predicted_type": ticket[3]}
-            for ticket in tickets
-        ]
+    try:
+        if output_format == 'json':
+            tickets, next_cursor = fetch_tickets_page(limit, **filters)
+            return jsonify({"tickets": tickets, "next_cursor": next_cursor}), 200
 
-        return jsonify({"tickets": tickets_list}), 200
+        # Первая строка читается до начала ответа, чтобы ошибка БД вернулась кодом 500
+        rows = iter_tickets(limit=limit, **filters)
+        first = next(rows, None)
     except Exception as e:
         print("Ошибка при получении данных из БД:", e)
         return jsonify({"error": "Ошибка при получении данных из базы"}), 500
 
+    def generate():
+        if first is None:
+            return
+        yield json.dumps(first, ensure_ascii=False) + "\n"
+        for ticket in rows:
+            yield json.dumps(ticket, ensure_ascii=False) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/tickets/<id>', methods=['DELETE'])
 def delete_ticket(id):
     """
@@ -671,14 +1757,11 @@ def delete_ticket(id):
                   example: "Ошибка при удалении записи из базы"
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM ticket_predictions WHERE id = %s", (id,))
-        conn.commit()
-
-        rows_deleted = cursor.rowcount
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM ticket_predictions WHERE id = %s", (id,))
+                rows_deleted = cursor.rowcount
+            conn.commit()
 
         if rows_deleted == 0:
             return jsonify({"message": f"Тикет с ID {id} не найден"}), 404
@@ -790,14 +1873,11 @@ def update_ticket(id):
         params.append(id)
         sql_query = f"UPDATE ticket_predictions SET {', '.join(fields_to_update)} WHERE id = %s"
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(sql_query, tuple(params))
-        conn.commit()
-
-        rows_updated = cursor.rowcount
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql_query, tuple(params))
+                rows_updated = cursor.rowcount
+            conn.commit()
 
         if rows_updated == 0:
             return jsonify({"message": f"Тикет с ID {id} не найден"}), 404
@@ -1,10 +1,35 @@
 import streamlit as st
 import requests
 import pandas as pd
+import time
 from io import StringIO
 
 API_URL = "http://127.0.0.1:5050"
 
+# Колонки, которые нужны вкладке визуализации
+VISUALIZATION_COLUMNS = ["Type", "Description", "Created_At"]
+
+@st.cache_data(ttl=60)
+def load_visualization_data():
+    """
+    Загружает только нужные для визуализации колонки потоковым CSV.
+    Результат кэшируется на минуту, чтобы не запрашивать данные при каждом перезапуске скрипта.
+    Возвращает (DataFrame, текст ошибки).
+    """
+    # Первая запись показывает, какие колонки есть в данных
+    response = requests.get(f"{API_URL}/data", params={"format": "ndjson", "limit": 1})
+    if response.status_code != 200:
+        return None, response.json()['error']
+    if not response.text.strip():
+        return pd.DataFrame(columns=VISUALIZATION_COLUMNS[:2]), None
+    available = pd.read_json(StringIO(response.text), lines=True).columns
+    columns = [column for column in VISUALIZATION_COLUMNS if column in available]
+
+    response = requests.get(f"{API_URL}/data", params={"format": "csv", "columns": ",".join(columns)})
+    if response.status_code != 200:
+        return None, response.json()['error']
+    return pd.read_csv(StringIO(response.text), sep=";"), None
+
 st.sidebar.title("Навигация")
 menu = st.sidebar.radio(
     "Выберите действие",
@@ -51,39 +76,93 @@ elif menu == "Обучение модели":
     if st.button("Обучить модель"):
         payload = {"load_from_db": load_from_db}
         try:
-            response = requests.post(f"{API_URL}/train-model", json=payload)
-            if response.status_code == 200:
-                result = response.json()
-                st.success(result["message"])
-                st.write(result)
+            response = requests.post(f"{API_URL}/train-jobs", json=payload)
+            if response.status_code == 202:
+                st.session_state["train_job_id"] = response.json()["job_id"]
             else:
                 st.error(f"Ошибка: {response.json()['error']}")
         except Exception as e:
             st.error(f"Ошибка: {e}")
 
+    # Обучение идёт в фоне на сервере, здесь только отслеживаем прогресс задачи.
+    # Нажатие кнопки прерывает цикл опроса и перезапускает скрипт, поэтому id задачи
+    # удаляется из session_state только после итогового статуса
+    job_id = st.session_state.get("train_job_id")
+    if job_id:
+        if st.button("Отменить обучение"):
+            try:
+                requests.post(f"{API_URL}/train-jobs/{job_id}/cancel")
+            except Exception as e:
+                st.error(f"Ошибка: {e}")
+
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        try:
+            while True:
+                job = requests.get(f"{API_URL}/train-jobs/{job_id}").json()
+                if "status" not in job:
+                    # Задача не найдена: отслеживать нечего
+                    st.session_state.pop("train_job_id", None)
+                    st.error(f"Ошибка: {job.get('error')}")
+                    break
+                progress = job.get("progress") or {}
+                progress_bar.progress(min(int(progress.get("percent", 0)), 100))
+                status_text.write(progress.get("message", ""))
+                if job["status"] in ("succeeded", "failed", "cancelled"):
+                    st.session_state.pop("train_job_id", None)
+                    break
+                time.sleep(1)
+
+            if job.get("status") == "succeeded":
+                result = requests.get(f"{API_URL}/train-jobs/{job_id}/report").json()
+                st.success(result["message"])
+                st.write(result)
+            elif job.get("status") == "cancelled":
+                st.warning("Обучение отменено")
+            elif job.get("status") == "failed":
+                st.error(f"Ошибка: {job.get('error')}")
+        except Exception as e:
+            st.error(f"Ошибка: {e}")
+
 # Вкладка: Управление данными
 elif menu == "Управление данными":
     st.title("Управление данными")
     uploaded_file = st.file_uploader("Загрузите CSV файл для обновления данных", type=["csv"])
 
-    if uploaded_file is not None:
+    upload_modes = {
+        "Заменить данные": "replace",
+        "Дописать строки": "append",
+        "Объединить по id": "merge"
+    }
+    upload_mode = st.selectbox("Режим загрузки", list(upload_modes))
+
+    # Загрузка только по кнопке: иначе файл отправлялся бы при каждом перезапуске скрипта
+    if uploaded_file is not None and st.button("Загрузить"):
         try:
             response = requests.post(
                 f"{API_URL}/data",
-                files={"file": ("tickets.csv", uploaded_file.getvalue())}
+                files={"file": ("tickets.csv", uploaded_file.getvalue())},
+                data={"mode": upload_modes[upload_mode]}
             )
             if response.status_code == 200:
-                st.success("Данные успешно загружены!")
+                report = response.json()
+                st.success(
+                    f"Данные успешно загружены! Записано строк: {report['rows_written']}, "
+                    f"пропущено некорректных: {report['rows_invalid']}"
+                )
+                load_visualization_data.clear()
             else:
                 st.error(f"Ошибка загрузки данных: {response.json()['error']}")
         except Exception as e:
             st.error(f"Ошибка: {e}")
 
+    preview_offset = st.number_input("Начиная со строки", min_value=0, value=0, step=1000)
     if st.button("Посмотреть текущие данные"):
         try:
-            response = requests.get(f"{API_URL}/data")
+            response = requests.get(f"{API_URL}/data", params={"offset": int(preview_offset), "limit": 1000})
             if response.status_code == 200:
                 data = response.json()["data"]
+                st.caption("Показано не больше 1000 строк")
                 st.write(pd.DataFrame(data))
             else:
                 st.error(f"Ошибка загрузки данных: {response.json()['error']}")
@@ -95,10 +174,10 @@ elif menu == "Визуализация":
     st.title("Визуализация данных")
     
     try:
-        response = requests.get(f"{API_URL}/data")
-        if response.status_code == 200:
-            data = pd.DataFrame(response.json()["data"])
-            
+        data, error = load_visualization_data()
+        if error is None:
+            data = data.copy()
+
             if data.empty:
                 st.warning("Данные отсутствуют для визуализации.")
             else:
@@ -143,7 +222,7 @@ elif menu == "Визуализация":
                 else:
                     st.info("Выберите категории для фильтрации данных.")
         else:
-            st.error(f"Ошибка загрузки данных: {response.json()['error']}")
+            st.error(f"Ошибка загрузки данных: {error}")
     except Exception as e:
         st.error(f"Ошибка: {e}")
 
@@ -153,11 +232,34 @@ elif menu == "Работа с БД":
     action = st.selectbox("Выберите действие", ["Получить все записи", "Удалить запись", "Редактировать запись"])
 
     if action == "Получить все записи":
-        if st.button("Получить"):
-            response = requests.get(f"{API_URL}/tickets")
+        page_size = st.number_input("Записей на странице", min_value=1, max_value=10000, value=100)
+        predicted_type = st.text_input("Категория (опционально)")
+
+        # Курсоры просмотренных страниц: последний элемент — курсор текущей страницы
+        if "tickets_cursors" not in st.session_state:
+            st.session_state["tickets_cursors"] = [None]
+
+        col_first, col_next = st.columns(2)
+        if col_first.button("Получить"):
+            st.session_state["tickets_cursors"] = [None]
+            st.session_state["tickets_loaded"] = True
+        if col_next.button("Следующая страница") and st.session_state.get("tickets_next_cursor") is not None:
+            st.session_state["tickets_cursors"].append(st.session_state["tickets_next_cursor"])
+
+        if st.session_state.get("tickets_loaded"):
+            params = {"limit": int(page_size)}
+            if st.session_state["tickets_cursors"][-1] is not None:
+                params["cursor"] = st.session_state["tickets_cursors"][-1]
+            if predicted_type:
+                params["predicted_type"] = predicted_type
+            response = requests.get(f"{API_URL}/tickets", params=params)
             if response.status_code == 200:
-                record = response.json().get("tickets", {})
-                st.write(record)
+                page = response.json()
+                st.session_state["tickets_next_cursor"] = page.get("next_cursor")
+                st.caption(f"Страница {len(st.session_state['tickets_cursors'])}")
+                st.dataframe(pd.DataFrame(page.get("tickets", [])))
+                if page.get("next_cursor") is None:
+                    st.info("Это последняя страница")
             else:
                 st.error(f"Ошибка: {response.json().get('error', 'Неизвестная ошибка')}")
 
@@ -2,6 +2,7 @@ import pytest
 import requests
 import os
 import io
+import json
 
 BASE_URL = "http://127.0.0.1:5050"
 
@@ -11,6 +12,12 @@ def test_status_success():
     assert response.status_code == 200
     assert response.json() == {"status": "API работает"}
 
+# -------------------- /stats --------------------
+def test_stats_success():
+    response = requests.get(f"{BASE_URL}/stats")
+    assert response.status_code == 200
+    assert "in_use" in response.json()["db_pool"]
+
 # -------------------- /categorize --------------------
 def test_categorize_success():
     payload = {"description": "This is a test ticket", "id": "123", "title": "Test Title"}
@@ -27,13 +34,45 @@ def test_categorize_missing_description():
 def test_categorize_model_not_loaded():
     os.rename('models/ticket_classifier.pkl', 'models/ticket_classifier_backup.pkl')
     os.rename('models/tfidf_vectorizer.pkl', 'models/tfidf_vectorizer_backup.pkl')
-    payload = {"description": "This is a test ticket", "id": "123", "title": "Test Title"}
-    response = requests.post(f"{BASE_URL}/categorize", json=payload)
-    assert response.status_code == 500
-    assert response.json() == {"error": "Модель не загружена"}
-
-    os.rename('models/ticket_classifier_backup.pkl', 'models/ticket_classifier.pkl')
-    os.rename('models/tfidf_vectorizer_backup.pkl', 'models/tfidf_vectorizer.pkl')
+    try:
+        payload = {"description": "This is a test ticket", "id": "123", "title": "Test Title"}
+        response = requests.post(f"{BASE_URL}/categorize", json=payload)
+        assert response.status_code == 500
+        assert response.json() == {"error": "Модель не загружена"}
+    finally:
+        os.rename('models/ticket_classifier_backup.pkl', 'models/ticket_classifier.pkl')
+        os.rename('models/tfidf_vectorizer_backup.pkl', 'models/tfidf_vectorizer.pkl')
+
+# -------------------- /categorize/batch --------------------
+def test_categorize_batch_success():
+    payload = {"tickets": [
+        {"description": "Application crashes on login", "id": "b1", "title": "Crash"},
+        {"description": "Add export to PDF", "id": "b2", "title": "Export"}
+    ]}
+    response = requests.post(f"{BASE_URL}/categorize/batch", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["processed"] == 2
+    assert body["failed"] == 0
+    assert all("predicted_type" in item for item in body["results"])
+
+def test_categorize_batch_partial_errors():
+    payload = {"tickets": [
+        {"description": "Application crashes on login", "id": "b3"},
+        {"id": "b4", "title": "No description"}
+    ]}
+    response = requests.post(f"{BASE_URL}/categorize/batch", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["processed"] == 1
+    assert body["failed"] == 1
+    assert "predicted_type" in body["results"][0]
+    assert body["results"][1] == {"index": 1, "error": "Отсутствует описание тикета"}
+
+def test_categorize_batch_empty():
+    response = requests.post(f"{BASE_URL}/categorize/batch", json={"tickets": []})
+    assert response.status_code == 400
+    assert response.json() == {"error": "Список тикетов пуст или отсутствует"}
 
 # -------------------- /data --------------------
 def test_manage_data_get_empty():
@@ -51,7 +90,31 @@ def test_manage_data_post_success():
     files = {'file': ('test_data.csv', io.BytesIO(csv_data.encode('utf-8')), 'text/csv')}
     response = requests.post(f"{BASE_URL}/data", files=files)
     assert response.status_code == 200
-    assert response.json() == {"message": "Файл успешно загружен"}
+    assert response.json()["message"] == "Файл успешно загружен"
+    assert response.json()["rows_written"] == 2
+
+def test_manage_data_get_ndjson_projection():
+    response = requests.get(f"{BASE_URL}/data", params={"format": "ndjson", "columns": "Type", "limit": 1})
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines() if line]
+    assert len(rows) == 1
+    assert list(rows[0]) == ["Type"]
+
+def test_manage_data_get_csv_passthrough():
+    response = requests.get(f"{BASE_URL}/data", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.text.splitlines()[0].split(";")[:2] == ["Description", "Type"]
+
+def test_manage_data_get_unknown_column():
+    response = requests.get(f"{BASE_URL}/data", params={"columns": "Unknown"})
+    assert response.status_code == 400
+
+def test_manage_data_post_missing_columns():
+    csv_data = "Title;Type\nTest ticket;Bug\n"
+    files = {'file': ('test_data.csv', io.BytesIO(csv_data.encode('utf-8')), 'text/csv')}
+    response = requests.post(f"{BASE_URL}/data", files=files)
+    assert response.status_code == 400
 
 def test_manage_data_post_missing_file():
     response = requests.post(f"{BASE_URL}/data")
@@ -95,6 +158,17 @@ def test_model_files_get_invalid_type():
     assert response.status_code == 400
     assert response.json() == {"error": "Некорректный параметр запроса. Укажите 'type=model' или 'type=vectorizer'."}
 
+# -------------------- /models --------------------
+def test_list_models():
+    response = requests.get(f"{BASE_URL}/models")
+    assert response.status_code == 200
+    assert isinstance(response.json()["versions"], list)
+
+def test_activate_model_not_found():
+    response = requests.post(f"{BASE_URL}/models/20000101-000000-000000/activate")
+    assert response.status_code == 404
+    assert response.json() == {"error": "Версия 20000101-000000-000000 не найдена"}
+
 # -------------------- /train-model --------------------
 def test_train_model_without_db():
     payload = {"load_from_db": False}
@@ -106,12 +180,51 @@ def test_train_model_with_db():
     response = requests.post(f"{BASE_URL}/train-model", json=payload)
     assert response.status_code in [200, 500]
 
+# -------------------- /train-jobs --------------------
+def test_list_training_jobs():
+    response = requests.get(f"{BASE_URL}/train-jobs")
+    assert response.status_code == 200
+    assert isinstance(response.json()["jobs"], list)
+
+def test_training_job_not_found():
+    job_id = "0" * 32
+    response = requests.get(f"{BASE_URL}/train-jobs/{job_id}")
+    assert response.status_code == 404
+    assert response.json() == {"error": f"Задача {job_id} не найдена"}
+
+    response = requests.post(f"{BASE_URL}/train-jobs/{job_id}/cancel")
+    assert response.status_code == 404
+
+    response = requests.get(f"{BASE_URL}/train-jobs/{job_id}/report")
+    assert response.status_code == 404
+
 # -------------------- /tickets --------------------
 def test_get_tickets_empty():
     response = requests.get(f"{BASE_URL}/tickets")
     assert response.status_code == 200
     assert isinstance(response.json().get("tickets"), list)
 
+def test_get_tickets_pagination():
+    first = requests.get(f"{BASE_URL}/tickets", params={"limit": 2})
+    assert first.status_code == 200
+    page = first.json()
+    assert len(page["tickets"]) <= 2
+    if page["next_cursor"] is not None:
+        second = requests.get(f"{BASE_URL}/tickets", params={"limit": 2, "cursor": page["next_cursor"]})
+        assert all(ticket["id"] > page["next_cursor"] for ticket in second.json()["tickets"])
+
+def test_get_tickets_ndjson_stream():
+    response = requests.get(f"{BASE_URL}/tickets", params={"format": "ndjson", "limit": 5}, stream=True)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("application/x-ndjson")
+    tickets = [json.loads(line) for line in response.iter_lines() if line]
+    assert len(tickets) <= 5
+    assert [ticket["id"] for ticket in tickets] == sorted(ticket["id"] for ticket in tickets)
+
+def test_get_tickets_invalid_limit():
+    response = requests.get(f"{BASE_URL}/tickets", params={"limit": 0})
+    assert response.status_code == 400
+
 def test_delete_ticket_not_found():
     response = requests.delete(f"{BASE_URL}/tickets/99999")
     assert response.status_code == 404
@@ -0,0 +1,49 @@
+import os
+import pickle
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from src.ml import artifacts
+
+TEXTS = ["cannot login to app", "add export button", "login page crashes", "export to csv fails"]
+LABELS = ["Bug", "Feature", "Bug", "Bug"]
+
+def _fit():
+    vectorizer = TfidfVectorizer()
+    model = LogisticRegression().fit(vectorizer.fit_transform(TEXTS), LABELS)
+    return model, vectorizer
+
+def _pickle(obj, path):
+    with open(path, 'wb') as pickle_file:
+        pickle.dump(obj, pickle_file)
+    return str(path)
+
+def test_convert_and_mmap_load(tmp_path):
+    model, vectorizer = _fit()
+    model_path = _pickle(model, tmp_path / "model.pkl")
+    vectorizer_path = _pickle(vectorizer, tmp_path / "vectorizer.pkl")
+
+    assert artifacts.convert(model_path) == str(tmp_path / "model.joblib")
+    artifacts.convert(vectorizer_path)
+    mapped_model = artifacts.load_artifact(model_path, mmap=True)
+    mapped_vectorizer = artifacts.load_artifact(vectorizer_path, mmap=True)
+
+    assert isinstance(mapped_model.coef_, np.memmap)
+    assert not mapped_model.coef_.flags.writeable
+    assert isinstance(mapped_vectorizer.idf_, np.memmap)
+    X = mapped_vectorizer.transform(TEXTS)
+    np.testing.assert_array_equal(mapped_model.predict_proba(X), model.predict_proba(vectorizer.transform(TEXTS)))
+
+def test_falls_back_to_pickle(tmp_path):
+    model, _ = _fit()
+    model_path = _pickle(model, tmp_path / "model.pkl")
+
+    assert not isinstance(artifacts.load_artifact(model_path, mmap=True).coef_, np.memmap)
+    artifacts.convert(model_path)
+    assert not isinstance(artifacts.load_artifact(model_path, mmap=False).coef_, np.memmap)
+
+    # Артефакт старше pickle-файла (файл заменили) не используется
+    os.utime(artifacts.artifact_path(model_path), (0, 0))
+    assert not isinstance(artifacts.load_artifact(model_path, mmap=True).coef_, np.memmap)
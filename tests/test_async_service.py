@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("asyncpg")
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.db.database import get_db_connection
+from src.routes import service
+from src.routes.async_service import create_app
+
+def run_client(scenario):
+    async def run():
+        async with TestClient(TestServer(create_app())) as client:
+            return await scenario(client)
+    return asyncio.run(run())
+
+def test_status():
+    async def scenario(client):
+        response = await client.get("/status")
+        return response.status, await response.json()
+
+    status, data = run_client(scenario)
+    assert status == 200
+    assert data == {"status": "API работает"}
+
+def test_categorize_without_description():
+    async def scenario(client):
+        response = await client.post("/categorize", json={"id": "as-test"})
+        return response.status, await response.json()
+
+    status, data = run_client(scenario)
+    if service.bundle is None:
+        pytest.skip("Модель не загружена")
+    assert status == 400
+    assert "error" in data
+
+def test_categorize_saves_prediction():
+    if service.bundle is None:
+        pytest.skip("Модель не загружена")
+
+    async def scenario(client):
+        response = await client.post("/categorize", json={
+            "id": "as-test", "title": "Async", "description": "Application crashes on login"
+        })
+        return response.status, await response.json()
+
+    conn = get_db_connection()
+    try:
+        status, data = run_client(scenario)
+        assert status == 200
+        assert data["ticket_id"] == "as-test"
+        assert data["predicted_type"]
+
+        if service.prediction_writer is None:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT predicted_type FROM ticket_predictions WHERE ticket_id = %s", ("as-test",))
+                assert cursor.fetchone() == (data["predicted_type"],)
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM ticket_predictions WHERE ticket_id = %s", ("as-test",))
+        conn.commit()
+        conn.close()
+
+def test_tickets_page_matches_limit():
+    async def scenario(client):
+        response = await client.get("/tickets", params={"limit": 2})
+        return response.status, await response.json()
+
+    status, data = run_client(scenario)
+    assert status == 200
+    assert len(data["tickets"]) <= 2
+
+def test_fallback_to_flask_routes():
+    async def scenario(client):
+        response = await client.get("/models")
+        return response.status, await response.json()
+
+    status, data = run_client(scenario)
+    assert status == 200
+    assert "versions" in data
+
+def test_native_routes_counted_in_metrics():
+    from prometheus_client import REGISTRY
+
+    labels = {"method": "GET", "route": "/status", "status": "200"}
+    before = REGISTRY.get_sample_value("ticket_api_requests_total", labels) or 0.0
+
+    async def scenario(client):
+        await client.get("/status")
+        response = await client.get("/metrics")
+        return response.status, await response.text()
+
+    status, text = run_client(scenario)
+    assert status == 200
+    assert "ticket_api_requests_total" in text
+    assert REGISTRY.get_sample_value("ticket_api_requests_total", labels) == before + 1
@@ -0,0 +1,107 @@
+import threading
+import uuid
+
+import pytest
+
+from src.ml.batching import PredictionBatcher
+
+def run_concurrently(batcher, bundle, descriptions):
+    results = [None] * len(descriptions)
+    start = threading.Barrier(len(descriptions))
+
+    def worker(i):
+        start.wait()
+        results[i] = batcher.predict(bundle, descriptions[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(descriptions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_requests_are_coalesced():
+    batches = []
+
+    def predict(bundle, descriptions):
+        batches.append(list(descriptions))
+        return [f"{bundle}:{description}" for description in descriptions]
+
+    batcher = PredictionBatcher(predict, max_size=8, max_wait_ms=200)
+    descriptions = [f"ticket {i}" for i in range(16)]
+    results = run_concurrently(batcher, "v1", descriptions)
+    batcher.stop()
+
+    assert results == [f"v1:{description}" for description in descriptions]
+    assert len(batches) < len(descriptions)
+    assert max(len(batch) for batch in batches) <= 8
+
+    stats = batcher.stats()
+    assert stats["requests"] == 16
+    assert stats["batches"] == len(batches)
+    assert stats["batch_size_histogram"]["le_8"] == len(batches)
+    assert stats["queue_delay_ms"]["histogram"]["le_inf"] == 16
+
+def test_single_request_waits_at_most_max_wait():
+    batcher = PredictionBatcher(lambda bundle, descriptions: ["Bug"] * len(descriptions), max_wait_ms=0)
+    assert batcher.predict("v1", "ticket") == "Bug"
+    batcher.stop()
+
+    stats = batcher.stats()
+    assert stats["batch_size_histogram"]["le_1"] == 1
+    assert stats["queue_delay_ms"]["max"] < 100
+
+def test_errors_reach_every_request_of_the_batch():
+    def predict(bundle, descriptions):
+        raise ValueError("model failed")
+
+    batcher = PredictionBatcher(predict, max_wait_ms=0)
+    with pytest.raises(ValueError, match="model failed"):
+        batcher.predict("v1", "ticket")
+    batcher.stop()
+    assert batcher.stats()["failed"] == 1
+
+def test_versions_are_not_mixed():
+    calls = []
+
+    def predict(bundle, descriptions):
+        calls.append((bundle, len(descriptions)))
+        return [bundle] * len(descriptions)
+
+    batcher = PredictionBatcher(predict, max_size=16, max_wait_ms=200)
+    results = {}
+    threads = [
+        threading.Thread(target=lambda i=i: results.setdefault(i, batcher.predict(f"v{i % 2}", "ticket")))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+    assert all(result == f"v{i % 2}" for i, result in results.items())
+    assert sum(size for _, size in calls) == 8
+
+def test_categorize_returns_503_on_batch_timeout(monkeypatch):
+    from src.routes import service
+    if service.bundle is None:
+        pytest.skip("Модель не загружена")
+    release = threading.Event()
+
+    def predict(bundle, descriptions):
+        release.wait(5)
+        return ["Bug"] * len(descriptions)
+
+    batcher = PredictionBatcher(predict, timeout=0.1)
+    monkeypatch.setattr(service, "prediction_batcher", batcher)
+    try:
+        response = service.app.test_client().post(
+            "/categorize", json={"id": "batch-timeout-test", "description": f"Timeout ticket {uuid.uuid4().hex}"}
+        )
+    finally:
+        release.set()
+        batcher.stop()
+
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "Превышено время ожидания предсказания"}
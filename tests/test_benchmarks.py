@@ -0,0 +1,43 @@
+import csv
+from collections import Counter
+
+from benchmarks import corpus, suite
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file, delimiter=';'))
+
+def test_corpus_keeps_class_mix_and_vocabulary(tmp_path):
+    source = read_rows(corpus.DATA_PATH)
+    path = tmp_path / "tickets-2x.csv"
+    count = corpus.write_corpus(str(path), 2)
+    rows = read_rows(path)
+
+    assert count == len(rows) == 2 * len(source)
+    source_counts = Counter(row['Type'] for row in source)
+    assert Counter(row['Type'] for row in rows) == {label: 2 * n for label, n in source_counts.items()}
+
+    vocabulary = {word for row in source for word in row['Description'].split()}
+    assert {word for row in rows for word in row['Description'].split()} <= vocabulary
+    assert len({row['id'] for row in rows}) == len(rows)
+
+def test_corpus_is_deterministic(tmp_path):
+    first, second = tmp_path / "a.csv", tmp_path / "b.csv"
+    corpus.write_corpus(str(first), 0.1, seed=7)
+    corpus.write_corpus(str(second), 0.1, seed=7)
+    assert first.read_bytes() == second.read_bytes()
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {"1x": {"data": {"json": {"median_ms": 100, "response_bytes": 10, "peak_growth_mb": 0.1}},
+                       "load": {"rps": 500}}}
+    current = {"1x": {"data": {"json": {"median_ms": 130, "response_bytes": 99, "peak_growth_mb": 0.4}},
+                      "load": {"rps": 450}}}
+    rows = {row["metric"]: row for row in suite.compare(current, baseline, threshold=0.25)}
+
+    # Количества (response_bytes) не сравниваются
+    assert set(rows) == {"1x.data.json.median_ms", "1x.data.json.peak_growth_mb", "1x.load.rps"}
+    assert rows["1x.data.json.median_ms"]["regression"]
+    # Рост в 4 раза, но в пределах шумового порога
+    assert not rows["1x.data.json.peak_growth_mb"]["regression"]
+    assert not rows["1x.load.rps"]["regression"]
+    assert rows["1x.load.rps"]["ratio"] > 1
@@ -0,0 +1,46 @@
+import time
+
+from src.ml.cache import PredictionCache, description_key
+
+def test_description_key_ignores_case_and_whitespace():
+    assert description_key("Login  page\tcrashes") == description_key("login page crashes ")
+    assert description_key("Login page crashes") != description_key("Login page works")
+
+def test_cache_hit_and_miss():
+    cache = PredictionCache(max_size=10, ttl=0)
+    key = description_key("Login page crashes")
+    assert cache.get(key) is None
+    cache.put(key, "Bug")
+    assert cache.get(key) == "Bug"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_cache_evicts_least_recently_used():
+    cache = PredictionCache(max_size=2, ttl=0)
+    cache.put("a", "Bug")
+    cache.put("b", "Task")
+    cache.get("a")
+    cache.put("c", "Bug")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "Bug"
+    assert cache.stats()["evictions"] == 1
+
+def test_cache_expires_entries():
+    cache = PredictionCache(max_size=10, ttl=0.05)
+    cache.put("a", "Bug")
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_cache_clear_rejects_stale_predictions():
+    cache = PredictionCache(max_size=10, ttl=0)
+    generation = cache.generation
+    cache.clear()
+    cache.put("a", "Bug", generation)
+
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
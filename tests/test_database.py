@@ -1,5 +1,5 @@
 import pytest
-from src.db.database import get_db_connection
+from src.db.database import ConnectionPool, PoolTimeoutError, get_db_connection
 
 def test_db_connection():
     try:
@@ -36,4 +36,60 @@ def test_insert_and_delete_ticket():
         pytest.fail(f"Ошибка при удалении записи: {e}")
 
     cursor.close()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+def test_pool_reuses_connections():
+    pool = ConnectionPool(min_size=1, max_size=2, timeout=1)
+    with pool.connection() as conn:
+        first = conn
+    with pool.connection() as conn:
+        assert conn is first
+
+    stats = pool.stats()
+    assert stats["checkouts"] == 2
+    assert stats["in_use"] == 0
+    pool.closeall()
+
+def test_pool_timeout_when_exhausted():
+    pool = ConnectionPool(min_size=0, max_size=1, timeout=0.1)
+    conn = pool.getconn()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+    pool.putconn(conn)
+
+    assert pool.stats()["timeouts"] == 1
+    pool.closeall()
+
+def test_pool_replaces_closed_connection():
+    pool = ConnectionPool(min_size=1, max_size=1, timeout=1)
+    with pool.connection() as conn:
+        conn.close()
+    with pool.connection() as conn:
+        assert not conn.closed
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
+    pool.closeall()
+
+def test_tickets_keyset_pagination_and_stream():
+    from src.db.database import fetch_tickets_page, insert_predictions, iter_tickets
+
+    insert_predictions([(f"page_test_{i}", "Test Title", "Test Description", "Page Test") for i in range(5)])
+    try:
+        tickets, cursor = fetch_tickets_page(2, predicted_type="Page Test")
+        seen = [ticket["id"] for ticket in tickets]
+        while cursor is not None:
+            tickets, cursor = fetch_tickets_page(2, after_id=cursor, predicted_type="Page Test")
+            seen.extend(ticket["id"] for ticket in tickets)
+
+        assert len(seen) == 5
+        assert seen == sorted(seen)
+        streamed = [ticket["id"] for ticket in iter_tickets(predicted_type="Page Test", chunk_size=2)]
+        assert streamed == seen
+        assert [ticket["id"] for ticket in iter_tickets(min_id=seen[1], max_id=seen[3])] == seen[1:4]
+    finally:
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM ticket_predictions WHERE predicted_type = %s", ("Page Test",))
+        conn.commit()
+        conn.close()
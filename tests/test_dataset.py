@@ -0,0 +1,102 @@
+import hashlib
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.data.dataset import (
+    DataLockedError, DatasetColumnsError, DatasetValidationError, data_write_lock, ingest_csv, iter_chunks,
+    iter_raw, read_columns
+)
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / "tickets.csv"
+    rows = "".join(f"T-{i};Ticket {i};{'Bug' if i % 2 else 'Task'}\n" for i in range(25))
+    path.write_text("id;Description;Type\n" + rows)
+    return str(path)
+
+def test_iter_chunks_offset_limit_across_chunks(data_path):
+    chunks = list(iter_chunks(data_path, offset=7, limit=10, chunksize=4))
+    ids = [value for chunk in chunks for value in chunk["id"]]
+
+    assert ids == [f"T-{i}" for i in range(7, 17)]
+    assert max(len(chunk) for chunk in chunks) <= 4
+
+def test_iter_chunks_projection_keeps_requested_order(data_path):
+    chunk = next(iter_chunks(data_path, columns=["Type", "id"], limit=1))
+    assert list(chunk.columns) == ["Type", "id"]
+
+def test_iter_chunks_unknown_column(data_path):
+    with pytest.raises(DatasetColumnsError):
+        list(iter_chunks(data_path, columns=["Missing"]))
+
+def test_iter_raw_returns_file_as_is(data_path):
+    with open(data_path, 'rb') as data_file:
+        assert b"".join(iter_raw(data_path, block_size=16)) == data_file.read()
+    assert read_columns(data_path) == ["id", "Description", "Type"]
+
+def upload(text):
+    return io.BytesIO(text.encode('utf-8'))
+
+def test_ingest_replace_reports_rows_and_checksum(tmp_path):
+    path = str(tmp_path / "tickets.csv")
+    content = "Description;Type\nFirst;Bug\nbroken row\nSecond;Task\n"
+    report = ingest_csv(upload(content), path)
+
+    assert report["rows_total"] == 3
+    assert report["rows_written"] == 2
+    assert report["rows_invalid"] == 1
+    assert report["checksum"] == hashlib.sha256(content.encode('utf-8')).hexdigest()
+    assert read_columns(path) == ["Description", "Type"]
+    # Временных файлов не остаётся; lock-файл блокировки записи постоянный
+    assert [name for name in os.listdir(tmp_path) if not name.startswith("tickets.csv")] == [".tickets.csv.lock"]
+
+def test_ingest_strict_keeps_existing_file(data_path):
+    with open(data_path, 'rb') as data_file:
+        before = data_file.read()
+    with pytest.raises(DatasetValidationError):
+        ingest_csv(upload("Description;Type\nFirst;Bug\nbroken row\n"), data_path, strict=True)
+    with open(data_path, 'rb') as data_file:
+        assert data_file.read() == before
+
+def test_ingest_append_maps_columns(data_path):
+    report = ingest_csv(upload("Type;Description;Extra\nBug;Appended;x\n"), data_path, mode="append")
+
+    last = list(iter_chunks(data_path))[-1].iloc[-1]
+    assert report["dropped_columns"] == ["Extra"]
+    assert (last["Description"], last["Type"]) == ("Appended", "Bug")
+    assert sum(len(chunk) for chunk in iter_chunks(data_path)) == 26
+
+def test_ingest_merge_replaces_rows_by_id(data_path):
+    report = ingest_csv(upload("id;Description;Type\nT-3;Updated;Task\nT-99;New;Bug\n"), data_path, mode="merge")
+
+    data = next(iter_chunks(data_path, chunksize=100)).set_index("id")
+    assert report["rows_replaced"] == 1
+    assert len(data) == 26
+    assert data.loc["T-3", "Description"] == "Updated"
+    assert data.loc["T-99", "Type"] == "Bug"
+
+def test_ingest_rejects_checksum_mismatch(data_path):
+    with pytest.raises(DatasetValidationError):
+        ingest_csv(upload("Description;Type\nFirst;Bug\n"), data_path, expected_checksum="0" * 64)
+
+def test_write_lock_held_by_other_process(data_path):
+    with data_write_lock(data_path):
+        # Держатель блокировки не обновляет lock-файл: ожидающий отказывает только по таймауту
+        holder = subprocess.run([sys.executable, "-c", (
+            "import sys; from src.data.dataset import DataLockedError, data_write_lock\n"
+            "try:\n"
+            f"    with data_write_lock({data_path!r}, timeout=0.3): sys.exit(0)\n"
+            "except DataLockedError: sys.exit(3)"
+        )])
+        assert holder.returncode == 3
+        with pytest.raises(DataLockedError):
+            with data_write_lock(data_path, timeout=0.2):
+                pass
+
+    # Блокировку снимает ядро при закрытии файла
+    with data_write_lock(data_path, timeout=0):
+        pass
@@ -0,0 +1,37 @@
+import csv
+import uuid
+
+from src.db.database import get_db_connection, insert_predictions
+from src.db.export import export_tickets_to_csv, index_path
+
+def read_ids(path):
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        return [row[0] for row in csv.reader(csv_file, delimiter=';')][1:]
+
+def test_export_is_incremental_and_deduplicated(tmp_path):
+    data_path = str(tmp_path / "tickets.csv")
+    ticket_id = f"export_test_{uuid.uuid4().hex[:8]}"
+
+    export_tickets_to_csv(data_path)
+    assert export_tickets_to_csv(data_path) == 0
+
+    insert_predictions([
+        (ticket_id, "Test Title", "Test Description", "Export Test"),
+        (ticket_id, "Test Title", "Test Description", "Export Test")
+    ])
+    try:
+        assert export_tickets_to_csv(data_path) == 1
+        assert read_ids(data_path).count(ticket_id) == 1
+
+        # Файл изменён в обход выгрузки: индекс перестраивается, дубликаты по ticket_id не появляются
+        with open(data_path, 'a', encoding='utf-8', newline='') as csv_file:
+            csv_file.write("manual;;Bug;Manual row\r\n")
+        export_tickets_to_csv(data_path)
+        assert read_ids(data_path).count(ticket_id) == 1
+    finally:
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM ticket_predictions WHERE ticket_id = %s", (ticket_id,))
+        conn.commit()
+        conn.close()
+    assert index_path(data_path).startswith(str(tmp_path))
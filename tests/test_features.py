@@ -0,0 +1,50 @@
+import os
+
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.data.dataset import file_fingerprint
+from src.ml.features import FeatureCache, feature_key
+
+def make_entry():
+    corpus = pd.DataFrame({"Description": ["login page crashes", "add export button"], "Type": ["Bug", "Task"]})
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(corpus["Description"])
+    return corpus, vectorizer, X, corpus["Type"], X, corpus["Type"]
+
+def test_fingerprint_depends_on_content(tmp_path):
+    path = tmp_path / "tickets.csv"
+    path.write_text("Description;Type\nlogin;Bug\n")
+    first = file_fingerprint(path)
+    path.write_text("Description;Type\nlogin;Task\n")
+
+    assert file_fingerprint(path) != first
+    assert feature_key(first, {"max_features": 10}) != feature_key(first, {"max_features": 20})
+
+def test_cache_roundtrip(tmp_path):
+    cache = FeatureCache(cache_dir=str(tmp_path), max_bytes=10 * 1024 * 1024)
+    assert cache.get("a" * 32) is None
+
+    corpus, vectorizer, X, y, _, _ = make_entry()
+    cache.put("a" * 32, *make_entry())
+    cached_corpus, cached_vectorizer, X_train, y_train, X_test, y_test = cache.get("a" * 32)
+
+    assert cached_corpus.equals(corpus)
+    assert cached_vectorizer.vocabulary_ == vectorizer.vocabulary_
+    assert (X_train != X).nnz == 0
+    assert y_train.tolist() == y.tolist()
+    assert cache.stats()["hits"] == 1
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = FeatureCache(cache_dir=str(tmp_path), max_bytes=10 * 1024 * 1024)
+    cache.put("a" * 32, *make_entry())
+    entry_size = cache.stats()["size_bytes"]
+    cache.max_bytes = entry_size * 2
+
+    cache.put("b" * 32, *make_entry())
+    os.utime(tmp_path / ("a" * 32), (0, 0))
+    cache.put("c" * 32, *make_entry())
+
+    assert cache.get("a" * 32) is None
+    assert cache.get("b" * 32) is not None
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,93 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.svm import SVC, LinearSVC
+
+from src.config import DATA_PATH, MODEL_PATH, VECTORIZER_PATH
+from src.data.dataset import get_dataset
+from src.ml.inference import CompiledFeaturizer, LinearPredictor, compile_featurizer, compile_predictor
+from src.ml.training import load_dataset
+
+@pytest.fixture(scope="module")
+def vectorizer():
+    with open(VECTORIZER_PATH, 'rb') as vectorizer_file:
+        return pickle.load(vectorizer_file)
+
+@pytest.fixture(scope="module")
+def descriptions():
+    return load_dataset(get_dataset(DATA_PATH)).dropna(subset=["Description", "Type"])
+
+@pytest.fixture(scope="module")
+def corpus(vectorizer, descriptions):
+    X = vectorizer.transform(descriptions["Description"].astype(str).str.lower())
+    return X, descriptions["Type"].astype(str).to_numpy()
+
+def assert_parity(model, X):
+    predictor = compile_predictor(model)
+    assert isinstance(predictor, LinearPredictor)
+    np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+    # Путь для одной строки
+    for i in range(0, X.shape[0], 37):
+        assert predictor.predict(X[i])[0] == model.predict(X[i])[0]
+
+def test_shipped_model_parity(corpus):
+    with open(MODEL_PATH, 'rb') as model_file:
+        model = pickle.load(model_file)
+    assert_parity(model, corpus[0])
+
+@pytest.mark.parametrize("model", [
+    SGDClassifier(loss="log_loss", random_state=42),
+    LinearSVC(random_state=42),
+    SVC(kernel="linear", random_state=42)
+])
+def test_linear_models_parity(corpus, model):
+    X, y = corpus
+    assert_parity(model.fit(X, y), X)
+
+@pytest.mark.parametrize("model", [LogisticRegression(), SVC(kernel="linear")])
+def test_binary_parity(corpus, model):
+    X, y = corpus
+    labels, counts = np.unique(y, return_counts=True)
+    mask = np.isin(y, labels[np.argsort(counts)[-2:]])
+    assert_parity(model.fit(X[mask], y[mask]), X)
+
+def test_nonlinear_models_fall_back(corpus):
+    X, y = corpus
+    assert compile_predictor(RandomForestClassifier(n_estimators=5).fit(X[:200], y[:200])) is None
+    assert compile_predictor(SVC(kernel="rbf").fit(X[:200], y[:200])) is None
+
+def assert_identical(expected, actual):
+    assert type(actual) is type(expected)
+    assert actual.shape == expected.shape
+    np.testing.assert_array_equal(actual.indptr, expected.indptr)
+    np.testing.assert_array_equal(actual.indices, expected.indices)
+    assert actual.data.tobytes() == expected.data.tobytes()
+
+def test_shipped_featurizer_bit_identical(vectorizer, descriptions):
+    documents = descriptions["Description"].astype(str).tolist() + ["", "the and of", "ПРИВЕТ мир Login"]
+    featurizer = compile_featurizer(vectorizer)
+    assert isinstance(featurizer, CompiledFeaturizer)
+
+    assert_identical(vectorizer.transform(documents), featurizer.transform(documents))
+    for document in documents[:300]:
+        assert_identical(vectorizer.transform([document]), featurizer.transform([document]))
+
+@pytest.mark.parametrize("params", [
+    {"sublinear_tf": True, "norm": "l1"},
+    {"binary": True, "use_idf": False, "ngram_range": (2, 3)},
+    {"norm": None, "strip_accents": "unicode", "lowercase": False, "stop_words": ["login"]}
+])
+def test_featurizer_options_bit_identical(descriptions, params):
+    documents = descriptions["Description"].astype(str).tolist()
+    vectorizer = TfidfVectorizer(**params).fit(documents)
+    assert_identical(vectorizer.transform(documents), compile_featurizer(vectorizer).transform(documents))
+
+def test_custom_vectorizers_fall_back(descriptions):
+    documents = descriptions["Description"].astype(str).tolist()[:50]
+    assert compile_featurizer(TfidfVectorizer(analyzer="char").fit(documents)) is None
+    assert compile_featurizer(TfidfVectorizer(tokenizer=str.split, token_pattern=None).fit(documents)) is None
+    assert compile_featurizer(HashingVectorizer()) is None
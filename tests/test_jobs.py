@@ -0,0 +1,127 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.ml import jobs
+
+def make_job(job_id, status, heartbeat_at):
+    return {
+        "id": job_id,
+        "status": status,
+        "params": {},
+        "created_at": heartbeat_at,
+        "heartbeat_at": heartbeat_at
+    }
+
+def test_write_and_read_job(tmp_path):
+    job = make_job("a" * 32, "running", time.time())
+    jobs.write_job(job, str(tmp_path))
+
+    assert jobs.read_job("a" * 32, str(tmp_path)) == job
+    assert [item["id"] for item in jobs.list_jobs(str(tmp_path))] == ["a" * 32]
+
+def test_read_unknown_job(tmp_path):
+    with pytest.raises(jobs.JobNotFoundError):
+        jobs.read_job("b" * 32, str(tmp_path))
+    with pytest.raises(jobs.JobNotFoundError):
+        jobs.read_job("../secrets", str(tmp_path))
+
+def test_lock_rejects_second_job(tmp_path):
+    manager = jobs.TrainingJobManager(jobs_dir=str(tmp_path))
+    lock_file = manager._acquire_lock("a" * 32)
+    try:
+        with pytest.raises(jobs.JobAlreadyRunningError) as error:
+            manager._acquire_lock("b" * 32)
+        assert error.value.job_id == "a" * 32
+    finally:
+        lock_file.close()
+
+def test_lock_released_when_holder_closes(tmp_path):
+    manager = jobs.TrainingJobManager(jobs_dir=str(tmp_path))
+    manager._acquire_lock("a" * 32).close()
+    manager._acquire_lock("b" * 32).close()
+
+def test_start_rejected_while_job_process_holds_lock(tmp_path):
+    manager = jobs.TrainingJobManager(jobs_dir=str(tmp_path))
+    lock_file = manager._acquire_lock("a" * 32)
+    # Копия блокировки в другом процессе (как у процесса обучения) держит её после закрытия здесь
+    holder = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"], pass_fds=(lock_file.fileno(),))
+    lock_file.close()
+    try:
+        with pytest.raises(jobs.JobAlreadyRunningError) as error:
+            manager.start({})
+        assert error.value.job_id == "a" * 32
+        # Отклонённая задача не остаётся в списке
+        assert jobs.list_jobs(str(tmp_path)) == []
+    finally:
+        holder.kill()
+        holder.wait()
+    manager._acquire_lock("b" * 32).close()
+
+def run_online_job(tmp_path, monkeypatch, report):
+    from src.ml import online, registry
+    activated = []
+    monkeypatch.setattr(online, "run_online_training", lambda progress=None, **params: report)
+    monkeypatch.setattr(registry, "set_current_version", activated.append)
+    job = dict(make_job("c" * 32, "queued", time.time()), params={"mode": "online"})
+    jobs.write_job(job, str(tmp_path))
+    jobs.run_job(job["id"], str(tmp_path))
+    return jobs.read_job(job["id"], str(tmp_path)), activated
+
+def test_online_job_without_changes_keeps_current_version(tmp_path, monkeypatch):
+    job, activated = run_online_job(tmp_path, monkeypatch, {"version": "old-online", "changed": False, "message": ""})
+    assert job["status"] == "succeeded"
+    # Базовая онлайн-версия не активируется поверх более новой текущей модели
+    assert activated == []
+    assert job["version"] is None
+
+def test_online_job_activates_new_version(tmp_path, monkeypatch):
+    job, activated = run_online_job(tmp_path, monkeypatch, {"version": "new-online", "changed": True, "message": ""})
+    assert job["status"] == "succeeded"
+    assert activated == ["new-online"]
+    assert job["version"] == "new-online"
+
+def test_sigterm_before_activation_cancels_job(tmp_path, monkeypatch):
+    from src.ml import online, registry
+    activated = []
+
+    def train(progress=None, **params):
+        os.kill(os.getpid(), signal.SIGTERM)
+        return {"version": "new-online", "changed": True, "message": ""}
+
+    monkeypatch.setattr(online, "run_online_training", train)
+    monkeypatch.setattr(registry, "set_current_version", activated.append)
+    job = dict(make_job("d" * 32, "queued", time.time()), params={"mode": "online"})
+    jobs.write_job(job, str(tmp_path))
+    jobs.run_job(job["id"], str(tmp_path))
+
+    assert jobs.read_job(job["id"], str(tmp_path))["status"] == "cancelled"
+    assert activated == []
+
+def test_sigterm_during_activation_is_ignored(tmp_path, monkeypatch):
+    from src.ml import registry
+
+    def activate(version):
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    monkeypatch.setattr(registry, "set_current_version", activate)
+    job, _ = run_online_job(tmp_path, monkeypatch, {"version": "new-online", "changed": True, "message": ""})
+    assert job["status"] == "succeeded"
+    assert job["version"] == "new-online"
+
+def test_monitor_keeps_status_written_by_job(tmp_path):
+    loaded = []
+    manager = jobs.TrainingJobManager(jobs_dir=str(tmp_path), on_success=loaded.append)
+    job = dict(make_job("e" * 32, "succeeded", time.time()), version="new-online")
+    jobs.write_job(job, str(tmp_path))
+    # Отмена пришла после активации
+    open(tmp_path / ("e" * 32 + ".cancel"), 'w').close()
+
+    manager._monitor(job["id"], subprocess.Popen([sys.executable, "-c", "pass"]))
+    assert jobs.read_job(job["id"], str(tmp_path))["status"] == "succeeded"
+    assert [item["version"] for item in loaded] == ["new-online"]
+    assert not (tmp_path / ("e" * 32 + ".cancel")).exists()
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src import metrics
+from src.db.database import db_connection
+from src.routes import service
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_categorize_records_route_and_stages(monkeypatch, write_behind):
+    if service.bundle is None:
+        pytest.skip("Модель не загружена")
+    rows = []
+    if write_behind:
+        monkeypatch.setattr(service, "prediction_writer", SimpleNamespace(put=rows.append))
+    else:
+        monkeypatch.setattr(service, "prediction_writer", None)
+    db_stage = "db_enqueue" if write_behind else "db_insert"
+
+    before_requests = sample("ticket_api_requests_total", method="POST", route="/categorize", status="200")
+    before_stages = {stage: sample("ticket_api_stage_duration_seconds_count", stage=stage) for stage in metrics.STAGES}
+
+    client = service.app.test_client()
+    try:
+        response = client.post("/categorize", json={"id": "metrics-test", "description": f"Unique metrics test ticket {write_behind}"})
+        assert response.status_code == 200
+    finally:
+        with db_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM ticket_predictions WHERE ticket_id = %s", ("metrics-test",))
+            conn.commit()
+
+    assert sample("ticket_api_requests_total", method="POST", route="/categorize", status="200") == before_requests + 1
+    # Постановка в очередь и запись в БД — разные серии
+    for stage in metrics.STAGES:
+        expected = 1 if stage in ("json_parse", "vectorize", "predict", db_stage) else 0
+        assert sample("ticket_api_stage_duration_seconds_count", stage=stage) == before_stages[stage] + expected
+    assert len(rows) == int(write_behind)
+
+def test_metrics_endpoint():
+    response = service.app.test_client().get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    text = response.get_data(as_text=True)
+    assert "ticket_api_request_duration_seconds_bucket" in text
+    assert "ticket_api_db_connection_seconds" in text
+
+def test_training_job_duration():
+    before = sample("ticket_api_training_job_duration_seconds_count", mode="online", status="failed")
+    metrics.observe_training_job({
+        "created_at": 100.0, "started_at": 101.0, "finished_at": 131.0,
+        "status": "failed", "params": {"mode": "online"}
+    })
+    assert sample("ticket_api_training_job_duration_seconds_count", mode="online", status="failed") == before + 1
+
+def test_multiprocess_aggregation(tmp_path):
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PATH": ""}
+    record = "from src import metrics; metrics.observe_request('POST', '/categorize', 200, 0.01)"
+    for _ in range(3):
+        subprocess.run([sys.executable, "-c", record], check=True, env=env)
+
+    render = "from src import metrics; print(metrics.render()[0].decode())"
+    output = subprocess.run([sys.executable, "-c", render], check=True, env=env, capture_output=True, text=True).stdout
+    assert 'ticket_api_requests_total{method="POST",route="/categorize",status="200"} 3.0' in output
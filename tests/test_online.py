@@ -0,0 +1,78 @@
+import pytest
+
+from src.ml import online, registry
+
+ROWS = [
+    (1, "DB-1", "Login page crashes with error", "Bug"),
+    (2, "DB-2", "Add export to PDF button", "Task"),
+    (3, "DB-3", "Payment form crashes on submit", "Bug"),
+    (4, "DB-4", "Brand new category", "Unknown")
+]
+
+@pytest.fixture(autouse=True)
+def environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "REGISTRY_DIR", str(tmp_path / "versions"))
+    monkeypatch.setattr(registry, "CURRENT_VERSION_PATH", str(tmp_path / "CURRENT"))
+    monkeypatch.setattr(online, "ONLINE_N_FEATURES", 2 ** 10)
+    monkeypatch.setattr(online, "fetch_types", lambda: {"Bug", "Task"})
+
+    table = []
+    monkeypatch.setattr(online, "iter_new_rows", lambda watermark: iter(
+        [[row for row in table if row[0] > watermark]] if any(row[0] > watermark for row in table) else []
+    ))
+
+    data_path = tmp_path / "tickets.csv"
+    data_path.write_text(
+        "id;title;Type;Description\n"
+        "T-1;;Bug;App crashes on login\n"
+        "T-2;;Task;Add dark theme\n"
+        "T-3;;Bug;Error when saving profile\n"
+        "T-4;;Task;Update documentation\n"
+    )
+    return table, str(data_path)
+
+def test_incremental_update_consumes_rows_after_watermark(environment):
+    table, data_path = environment
+    first = online.run_online_training(data_path=data_path)
+    assert first["rebuild"] is True
+    assert first["watermark"] == 0
+    assert registry.read_meta(first["version"])["kind"] == online.ONLINE_KIND
+
+    table.extend(ROWS[:2])
+    second = online.run_online_training(data_path=data_path)
+    assert second["rebuild"] is False
+    assert second["base_version"] == first["version"]
+    assert second["rows"] == 2
+    assert second["watermark"] == 2
+
+    table.extend(ROWS[2:])
+    third = online.run_online_training(data_path=data_path)
+    assert third["rows"] == 1
+    assert third["skipped_unknown_type"] == 1
+    assert third["watermark"] == 4
+
+def test_no_new_rows_keeps_base_version(environment):
+    _, data_path = environment
+    first = online.run_online_training(data_path=data_path)
+    second = online.run_online_training(data_path=data_path)
+
+    assert second["version"] == first["version"]
+    assert second["changed"] is False
+    assert second["rows"] == 0
+
+def test_skipped_rows_advance_watermark(environment):
+    table, data_path = environment
+    first = online.run_online_training(data_path=data_path)
+
+    table.append(ROWS[3])
+    second = online.run_online_training(data_path=data_path)
+    assert second["rows"] == 0
+    assert second["skipped_unknown_type"] == 1
+    assert second["version"] != first["version"]
+    assert second["watermark"] == 4
+
+    # Пропущенная строка не перечитывается
+    registry.set_current_version(second["version"])
+    third = online.run_online_training(data_path=data_path)
+    assert third["skipped_unknown_type"] == 0
+    assert third["version"] == second["version"]
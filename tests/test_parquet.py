@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from src.data import parquet
+from src.data.dataset import get_dataset
+from src.data.parquet import ParquetDataset
+
+CSV = (
+    "id;title;Type;Description\n"
+    "T-1;Login;Bug;App crashes on login\n"
+    "T-2;Export;Task;Add export; also add import\n"
+    "T-3;Docs;Task;Update documentation\n"
+)
+
+@pytest.fixture
+def dataset(tmp_path):
+    csv_path = tmp_path / "tickets.csv"
+    csv_path.write_text(CSV)
+    dataset = ParquetDataset(str(tmp_path / "tickets.parquet"))
+    report = dataset.import_csv(str(csv_path))
+    assert report == {"rows_written": 3, "rows_repaired": 1, "rows_invalid": 0}
+    return dataset
+
+def test_import_repairs_embedded_delimiters(dataset):
+    data = dataset.read()
+    assert data.loc[1, "Description"] == "Add export; also add import"
+    assert str(data["Type"].dtype) == "category"
+
+def test_projection_and_slicing(dataset):
+    chunks = list(dataset.iter_chunks(columns=["Type", "id"], offset=1, limit=1))
+    assert len(chunks) == 1
+    assert list(chunks[0].columns) == ["Type", "id"]
+    assert chunks[0]["id"].tolist() == ["T-2"]
+
+def test_append_adds_partition(dataset):
+    before = dataset.fingerprint()
+    with dataset.appender(["id", "title", "Type", "Description"]) as write:
+        write({"id": "T-4", "Type": "Bug", "Description": "Payment fails"})
+
+    assert dataset.fingerprint() != before
+    assert list(dataset.iter_ids()) == ["T-1", "T-2", "T-3", "T-4"]
+    assert dataset.read(columns=["title"])["title"].isna().tolist() == [False, False, False, True]
+
+def test_export_roundtrip(dataset, tmp_path):
+    csv_path = tmp_path / "export.csv"
+    assert dataset.export_csv(str(csv_path)) == 3
+    assert csv_path.read_text().splitlines()[2] == 'T-2;Export;Task;"Add export; also add import"'
+    assert ParquetDataset(str(tmp_path / "copy.parquet")).import_csv(str(csv_path))["rows_repaired"] == 0
+
+def test_replace_switches_generation(dataset, tmp_path):
+    csv_path = tmp_path / "new.csv"
+    csv_path.write_text("Description;Type\nOnly row;Bug\n")
+    dataset.import_csv(str(csv_path))
+
+    assert dataset.columns() == ["Description", "Type"]
+    assert len(dataset.read()) == 1
+
+def test_replaced_generation_kept_for_readers(tmp_path, monkeypatch):
+    # По секции на строку: секции открываются по мере чтения
+    monkeypatch.setattr(parquet, "PARQUET_PARTITION_ROWS", 1)
+    rows = "".join(f"T-{i};Title;Bug;Description {i}\n" for i in range(50))
+    (tmp_path / "tickets.csv").write_text("id;title;Type;Description\n" + rows)
+    dataset = ParquetDataset(str(tmp_path / "tickets.parquet"))
+    dataset.import_csv(str(tmp_path / "tickets.csv"))
+
+    # Поток начал читать первое поколение до замены
+    chunks = dataset.iter_chunks(chunksize=1)
+    first = next(chunks)
+    csv_path = tmp_path / "new.csv"
+    csv_path.write_text("Description;Type\nOnly row;Bug\n")
+    dataset.import_csv(str(csv_path))
+
+    assert len(first) + sum(len(chunk) for chunk in chunks) == 50
+
+    # Следующая замена после истечения срока удаляет заменённые поколения
+    monkeypatch.setattr(parquet, "PARQUET_GENERATION_GRACE", 0)
+    dataset.import_csv(str(csv_path))
+    generations = [name for name in os.listdir(dataset.path) if os.path.isdir(os.path.join(dataset.path, name))]
+    assert generations == [dataset._generation()]
+
+def test_get_dataset_parquet_path(dataset, tmp_path):
+    assert get_dataset(dataset.path, backend="parquet").path == dataset.path
+    with pytest.raises(ValueError):
+        get_dataset(str(tmp_path / "tickets.csv"), backend="parquet")
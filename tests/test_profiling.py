@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src import profiling
+from src.routes import service
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+@profiling.profiled
+def outer(n):
+    return inner(n) + 1
+
+@profiling.profiled
+def inner(n):
+    return sum(range(n))
+
+def test_session_samples_threads_and_profiles_hooks(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        session = profiling.start_session(0.3, interval_ms=1)
+        outer(1000)
+        session.wait()
+        report = session.save(str(tmp_path))
+    finally:
+        stop.set()
+        worker.join()
+
+    assert report["samples"] > 0
+    with open(report["collapsed_path"], encoding="utf-8") as collapsed_file:
+        lines = collapsed_file.read().splitlines()
+    assert any(line.startswith("busy;") and "busy_loop (" in line for line in lines)
+    # Строка collapsed stacks заканчивается количеством выборок
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    # Вложенный отмеченный вызов входит во внешний профиль, а не создаёт второй
+    assert report["profiled_calls"] == 1
+    assert os.path.exists(report["pstats_path"])
+    assert any(row["function"].startswith("inner (") for row in report["top_functions"])
+
+@profiling.profiled
+def wait_for(started, release):
+    started.set()
+    release.wait(5)
+
+def test_concurrent_call_runs_unprofiled():
+    session = profiling.start_session(5)
+    started, release = threading.Event(), threading.Event()
+    worker = threading.Thread(target=wait_for, args=(started, release))
+    worker.start()
+    try:
+        started.wait(5)
+        # Профиль уже активен в другом потоке: второй вызов выполняется без него
+        assert outer(10) == 46
+    finally:
+        release.set()
+        worker.join()
+        session.stop()
+
+    assert len(session._profiles) == 1
+    assert session.skipped_calls == 1
+
+def test_profiled_is_passthrough_without_session():
+    assert outer(10) == 46
+
+def test_second_session_is_rejected():
+    session = profiling.start_session(5)
+    try:
+        with pytest.raises(profiling.ProfilerBusyError):
+            profiling.start_session(1)
+    finally:
+        session.stop()
+
+def test_signal_starts_session(tmp_path):
+    code = (
+        "import os, signal, time; from src import profiling; profiling.install_signal_handler(); "
+        "os.kill(os.getpid(), signal.SIGUSR2); time.sleep(1.5)"
+    )
+    env = dict(os.environ, PROFILE_DIR=str(tmp_path), PROFILE_DEFAULT_SECONDS="0.2")
+    subprocess.run([sys.executable, "-c", code], check=True, env=env, capture_output=True)
+    assert any(name.endswith(".folded") for name in os.listdir(tmp_path))
+
+def test_admin_profile_requires_token(monkeypatch):
+    client = service.app.test_client()
+    monkeypatch.setattr(service, "ADMIN_TOKEN", None)
+    assert client.post("/admin/profile", headers={"X-Admin-Token": ""}).status_code == 403
+
+    monkeypatch.setattr(service, "ADMIN_TOKEN", "secret")
+    assert client.post("/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.post("/admin/profile?seconds=1000", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 400
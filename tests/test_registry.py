@@ -0,0 +1,53 @@
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from src.ml import registry
+
+@pytest.fixture(autouse=True)
+def registry_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "REGISTRY_DIR", str(tmp_path / "versions"))
+    monkeypatch.setattr(registry, "CURRENT_VERSION_PATH", str(tmp_path / "CURRENT"))
+    return tmp_path
+
+def test_save_and_load_version():
+    version = registry.save_version({"coef": [1, 2]}, {"vocabulary": ["a"]}, meta={"source": "test"})
+
+    assert registry.load_version(version) == ({"coef": [1, 2]}, {"vocabulary": ["a"]})
+    assert [meta["version"] for meta in registry.list_versions()] == [version]
+    assert registry.list_versions()[0]["source"] == "test"
+
+def test_current_version_pointer():
+    assert registry.get_current_version() is None
+    first = registry.save_version("model-1", "vectorizer-1")
+    second = registry.save_version("model-2", "vectorizer-2")
+
+    registry.set_current_version(second)
+    assert registry.get_current_version() == second
+    registry.set_current_version(first)
+    assert registry.get_current_version() == first
+    registry.set_current_version(registry.LEGACY_VERSION)
+    assert registry.get_current_version() is None
+
+def test_unknown_version():
+    with pytest.raises(registry.VersionNotFoundError):
+        registry.set_current_version("missing")
+    with pytest.raises(registry.VersionNotFoundError):
+        registry.load_version("../models")
+
+def test_import_rejects_broken_files(registry_dir):
+    model_file = FileStorage(io.BytesIO(b"not a pickle"), filename="model.pkl")
+    vectorizer_file = FileStorage(io.BytesIO(b"not a pickle"), filename="vectorizer.pkl")
+
+    with pytest.raises(Exception):
+        registry.import_files(model_file, vectorizer_file)
+    assert registry.list_versions() == []
+    assert os.listdir(registry_dir / "versions") == []
+
+def test_versions_store_mmap_artifacts(registry_dir):
+    version = registry.save_version("model", "vectorizer")
+
+    names = os.listdir(registry_dir / "versions" / version)
+    assert "model.joblib" in names and "vectorizer.joblib" in names
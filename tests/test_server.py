@@ -0,0 +1,47 @@
+import argparse
+
+from src.ml import registry
+from src.routes.server import ModelWatcher, build_options
+
+def make_watcher(monkeypatch, load):
+    current = {"version": None}
+    monkeypatch.setattr(registry, "get_current_version", lambda: current["version"])
+    reloads = []
+    watcher = ModelWatcher(load, reload=lambda: reloads.append(True), interval=0)
+    return watcher, current, reloads
+
+def test_watcher_reloads_on_version_change(monkeypatch):
+    loaded = []
+    watcher, current, reloads = make_watcher(monkeypatch, lambda version: loaded.append(version) or True)
+
+    assert watcher.version == registry.LEGACY_VERSION
+    assert not watcher.check()
+    current["version"] = "v2"
+    assert watcher.check()
+    assert not watcher.check()
+
+    assert loaded == ["v2"]
+    assert reloads == [True]
+
+def test_watcher_keeps_workers_when_load_fails(monkeypatch):
+    def load(version):
+        raise ValueError("broken model")
+
+    watcher, current, reloads = make_watcher(monkeypatch, load)
+    current["version"] = "broken"
+    assert not watcher.check()
+    # Ошибка не повторяется на каждой проверке
+    assert not watcher.check()
+    assert reloads == []
+
+def test_options_preload_and_recycle():
+    args = argparse.Namespace(
+        host="127.0.0.1", port=5051, workers=3, threads=8,
+        max_requests=0, max_requests_jitter=100, graceful_timeout=10
+    )
+    options = build_options(args)
+
+    assert options["bind"] == "127.0.0.1:5051"
+    assert options["preload_app"] is True
+    assert options["worker_class"] == "gthread"
+    assert options["max_requests_jitter"] == 0
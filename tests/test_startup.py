@@ -0,0 +1,24 @@
+import json
+import subprocess
+import sys
+
+from src.routes import service
+
+def test_service_import_skips_training_and_docs():
+    code = (
+        "import json, sys, warnings; warnings.simplefilter('ignore'); import src.routes.service; "
+        "print(json.dumps([m for m in ('imblearn', 'flasgger', 'src.ml.training') if m in sys.modules]))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    assert json.loads(output.strip().splitlines()[-1]) == []
+
+def test_docs_loaded_on_first_request():
+    client = service.app.test_client()
+
+    spec = client.get("/apispec.json")
+    assert spec.status_code == 200
+    assert "/categorize" in spec.get_json()["paths"]
+    assert service.swagger.loaded
+
+    assert client.get("/apidocs/").status_code == 200
+    assert client.get("/status").status_code == 200
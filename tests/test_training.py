@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from src.ml.training import TrainingError, _build_search, build_models, halving_fits, search_best_model
+
+def make_dataset():
+    rng = np.random.RandomState(0)
+    X = rng.rand(120, 6)
+    y = np.where(X[:, 0] > 0.5, "Bug", "Task")
+    X[:, 1] += (y == "Bug") * 0.5
+    return csr_matrix(X[:90]), y[:90], csr_matrix(X[90:]), y[90:]
+
+def test_halving_fits_counts_rounds():
+    assert halving_fits(1, 3) == 3
+    assert halving_fits(9, 3) == 3 * (9 + 3 + 1)
+    assert halving_fits(10, 3) == 3 * (10 + 4 + 2)
+
+def test_halving_search_reports_pruned_fits():
+    X_train, y_train, X_test, y_test = make_dataset()
+    name, model, accuracy, results, summary = search_best_model(
+        X_train, y_train, X_test, y_test, n_jobs=1, model_names=["KNN"], strategy="halving"
+    )
+
+    assert name == "KNN"
+    assert model is not None
+    assert summary["strategy"] == "halving"
+    assert summary["fits_pruned"] > 0
+    assert results["KNN"]["fits"] == summary["fits"]
+
+def test_search_skips_models_over_budget():
+    X_train, y_train, X_test, y_test = make_dataset()
+    _, _, _, results, summary = search_best_model(
+        X_train, y_train, X_test, y_test, n_jobs=1, model_names=["KNN", "SVM"], max_fits=20
+    )
+
+    assert list(results) == ["KNN"]
+    assert summary["skipped_models"] == ["SVM"]
+
+def test_halving_skipped_model_counts_planned_fits():
+    X_train, y_train, X_test, y_test = make_dataset()
+    models, param_grids = build_models()
+    knn_fits = _build_search("KNN", models["KNN"], param_grids["KNN"], "halving", 3, 1)[1]
+    svm_fits = _build_search("SVM", models["SVM"], param_grids["SVM"], "halving", 3, 1)[1]
+    _, _, _, results, summary = search_best_model(
+        X_train, y_train, X_test, y_test, n_jobs=1, model_names=["KNN", "SVM"], strategy="halving",
+        max_fits=knn_fits
+    )
+
+    assert summary["skipped_models"] == ["SVM"]
+    # Пропущенная модель считается по обучениям halving, а не полного перебора
+    assert summary["fits_pruned"] == results["KNN"]["fits_pruned"] + svm_fits
+
+def test_search_fails_when_budget_allows_nothing():
+    X_train, y_train, X_test, y_test = make_dataset()
+    with pytest.raises(TrainingError) as error:
+        search_best_model(X_train, y_train, X_test, y_test, n_jobs=1, model_names=["KNN"], max_fits=1)
+    assert error.value.status_code == 400
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from src.db.writer import PredictionWriter
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def make_row(i):
+    return (f"id-{i}", "Title", f"Description {i}", "Bug")
+
+def test_writer_flushes_by_batch_size():
+    written = []
+    writer = PredictionWriter(write_fn=lambda rows: written.append(list(rows)), batch_size=2, flush_interval=10)
+    for i in range(4):
+        assert writer.put(make_row(i))
+
+    assert wait_for(lambda: writer.stats()["flushed"] == 4)
+    assert [len(batch) for batch in written] == [2, 2]
+    writer.stop()
+
+def test_writer_flushes_pending_rows_on_stop():
+    written = []
+    writer = PredictionWriter(write_fn=lambda rows: written.extend(rows), batch_size=100, flush_interval=0.5)
+    for i in range(3):
+        writer.put(make_row(i))
+    writer.stop()
+
+    assert written == [make_row(i) for i in range(3)]
+    assert writer.stats()["pending"] == 0
+
+def blocking_writer(**kwargs):
+    started, release = threading.Event(), threading.Event()
+    written = []
+
+    def write(rows):
+        started.set()
+        release.wait(5)
+        written.extend(rows)
+
+    writer = PredictionWriter(write_fn=write, queue_size=1, batch_size=1, flush_interval=0.1, **kwargs)
+    writer.put(make_row(0))
+    assert started.wait(5)
+    return writer, release, written
+
+def test_writer_drop_new_policy():
+    writer, release, written = blocking_writer(overflow="drop_new")
+    assert writer.put(make_row(1))
+    assert not writer.put(make_row(2))
+    release.set()
+    writer.stop()
+
+    assert written == [make_row(0), make_row(1)]
+    assert writer.stats()["dropped"] == 1
+
+def test_writer_drop_oldest_policy():
+    writer, release, written = blocking_writer(overflow="drop_oldest")
+    assert writer.put(make_row(1))
+    assert writer.put(make_row(2))
+    release.set()
+    writer.stop()
+
+    assert written == [make_row(0), make_row(2)]
+    assert writer.stats()["dropped"] == 1
+
+def test_writer_counts_failed_rows():
+    def failing_write(rows):
+        raise RuntimeError("БД недоступна")
+
+    writer = PredictionWriter(write_fn=failing_write, batch_size=10, flush_interval=0.1, max_retries=1)
+    writer.put(make_row(0))
+    writer.put(make_row(1))
+
+    assert wait_for(lambda: writer.stats()["failed"] == 2)
+    assert writer.stats()["flushed"] == 0
+    writer.stop()